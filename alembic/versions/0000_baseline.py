@@ -0,0 +1,220 @@
+"""baseline: the schema as it stood before migrations were introduced
+
+Revision ID: 0000_baseline
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.models import GUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0000_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps():
+    return [sa.Column("created_at", sa.DateTime(), nullable=True), sa.Column("updated_at", sa.DateTime(), nullable=True)]
+
+
+def _fk(target: str, nullable: bool = False, name: str = None):
+    table = target.split(".")[0]
+    return sa.Column(name or f"{table[:-1]}_id", GUID(), sa.ForeignKey(target), nullable=nullable)
+
+
+# (table, columns/constraints, indexed columns, unique indexed columns), in foreign key order.
+# Later revisions add their own columns and indexes on top of these.
+TABLES = [
+    ("users", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+        sa.Column("xp", sa.Integer(), nullable=True),
+        sa.Column("level", sa.Integer(), nullable=True),
+        sa.Column("avatar_url", sa.String(500), nullable=True),
+        sa.Column("profile", sa.Text(), nullable=True),
+        *_timestamps(),
+        sa.Column("last_login", sa.DateTime(), nullable=True),
+    ], [], ["email"]),
+    ("communities", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        sa.Column("name", sa.String(150), nullable=False, unique=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        _fk("users.id", name="owner_id"),
+        *_timestamps(),
+    ], ["owner_id"], []),
+    ("habits", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("users.id"),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("category", sa.String(50), nullable=True),
+        sa.Column("frequency", sa.String(20), nullable=True),
+        sa.Column("target_count", sa.Integer(), nullable=True),
+        sa.Column("current_streak", sa.Integer(), nullable=True),
+        sa.Column("best_streak", sa.Integer(), nullable=True),
+        sa.Column("total_completions", sa.Integer(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("reminder_time", sa.String(10), nullable=True),
+        sa.Column("color", sa.String(7), nullable=True),
+        *_timestamps(),
+    ], ["user_id"], []),
+    ("habit_logs", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("habits.id"),
+        _fk("users.id"),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=True),
+        sa.Column("count", sa.Integer(), nullable=True),
+        sa.Column("mood", sa.String(20), nullable=True),
+        sa.Column("note", sa.Text(), nullable=True),
+        *_timestamps(),
+    ], ["habit_id", "user_id", "date"], []),
+    ("challenges", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("category", sa.String(50), nullable=True),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=False),
+        sa.Column("reward_xp", sa.Integer(), nullable=True),
+        sa.Column("reward_badge", sa.String(100), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("max_members", sa.Integer(), nullable=True),
+        sa.Column("is_public", sa.Boolean(), nullable=True),
+        _fk("communities.id", nullable=True, name="community_id"),
+        _fk("users.id", name="owner_id"),
+        *_timestamps(),
+    ], ["community_id", "owner_id"], []),
+    ("challenge_members", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("challenges.id", name="challenge_id"),
+        _fk("users.id"),
+        sa.Column("progress", sa.Float(), nullable=True),
+        sa.Column("completed_days", sa.Integer(), nullable=True),
+        sa.Column("total_days", sa.Integer(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("completion_date", sa.DateTime(), nullable=True),
+        sa.Column("joined_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    ], ["challenge_id", "user_id"], []),
+    ("reflections", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("users.id"),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("mood", sa.String(20), nullable=False),
+        sa.Column("energy_level", sa.Integer(), nullable=True),
+        sa.Column("note", sa.Text(), nullable=True),
+        sa.Column("gratitude", sa.Text(), nullable=True),
+        sa.Column("lessons_learned", sa.Text(), nullable=True),
+        sa.Column("tomorrow_focus", sa.Text(), nullable=True),
+        *_timestamps(),
+    ], ["user_id", "date"], []),
+    ("badges", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False, unique=True),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("icon", sa.String(50), nullable=False),
+        sa.Column("color", sa.String(7), nullable=True),
+        sa.Column("requirement_type", sa.String(50), nullable=False),
+        sa.Column("requirement_value", sa.Integer(), nullable=False),
+        sa.Column("category", sa.String(50), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("rarity", sa.String(20), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    ], [], []),
+    ("user_badges", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("users.id"),
+        _fk("badges.id", name="badge_id"),
+        sa.Column("earned_at", sa.DateTime(), nullable=True),
+        sa.Column("progress_snapshot", sa.Text(), nullable=True),
+    ], ["user_id", "badge_id"], []),
+    ("community_members", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("communities.id", name="community_id"),
+        _fk("users.id"),
+        sa.Column("role", sa.String(20), nullable=True),
+        sa.Column("joined_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("community_id", "user_id"),
+    ], ["community_id", "user_id"], []),
+    ("friendships", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("users.id", name="requester_id"),
+        _fk("users.id", name="addressee_id"),
+        sa.Column("status", sa.String(20), nullable=True),
+        *_timestamps(),
+        sa.UniqueConstraint("requester_id", "addressee_id"),
+    ], ["requester_id", "addressee_id"], []),
+    ("posts", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("users.id"),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("image_url", sa.String(500), nullable=True),
+        sa.Column("is_public", sa.Boolean(), nullable=True),
+        _fk("challenges.id", nullable=True, name="challenge_id"),
+        *_timestamps(),
+    ], ["user_id", "challenge_id"], []),
+    ("post_likes", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("posts.id"),
+        _fk("users.id"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("post_id", "user_id"),
+    ], ["post_id", "user_id"], []),
+    ("post_comments", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("posts.id"),
+        _fk("users.id"),
+        _fk("post_comments.id", nullable=True, name="parent_id"),
+        sa.Column("content", sa.Text(), nullable=False),
+        *_timestamps(),
+    ], ["post_id", "user_id", "parent_id"], []),
+    ("comment_likes", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("post_comments.id", name="comment_id"),
+        _fk("users.id"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("comment_id", "user_id"),
+    ], ["comment_id", "user_id"], []),
+    ("follows", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("users.id", name="follower_id"),
+        _fk("users.id", name="followed_id"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("follower_id", "followed_id"),
+    ], ["follower_id", "followed_id"], []),
+    ("messages", lambda: [
+        sa.Column("id", GUID(), primary_key=True),
+        _fk("users.id", name="sender_id"),
+        _fk("users.id", name="recipient_id"),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("read_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("id", name="uq_messages_id"),
+    ], ["sender_id", "recipient_id", "created_at"], []),
+]
+
+
+def upgrade() -> None:
+    # Databases created before migrations existed are stamped at this revision
+    # instead (python -m app.core.database, run by docker/start.sh)
+    for table, columns, indexed, unique in TABLES:
+        op.create_table(table, *columns())
+        for column in indexed:
+            op.create_index(f"ix_{table}_{column}", table, [column])
+        for column in unique:
+            op.create_index(f"ix_{table}_{column}", table, [column], unique=True)
+
+
+def downgrade() -> None:
+    for table, _columns, _indexed, _unique in reversed(TABLES):
+        op.drop_table(table)
@@ -0,0 +1,37 @@
+"""denormalized like/comment counters on posts
+
+Revision ID: 0001_post_counters
+Revises: 0000_baseline
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_post_counters"
+down_revision: Union[str, None] = "0000_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.add_column(sa.Column("like_count", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("comment_count", sa.Integer(), nullable=False, server_default="0"))
+
+    # Backfill from the existing like/comment rows
+    op.execute(
+        "UPDATE posts SET "
+        "like_count = (SELECT COUNT(*) FROM post_likes WHERE post_likes.post_id = posts.id), "
+        "comment_count = (SELECT COUNT(*) FROM post_comments WHERE post_comments.post_id = posts.id)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.drop_column("comment_count")
+        batch_op.drop_column("like_count")
@@ -0,0 +1,28 @@
+"""composite indexes for keyset pagination on posts
+
+Revision ID: 0002_post_keyset_indexes
+Revises: 0001_post_counters
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_post_keyset_indexes"
+down_revision: Union[str, None] = "0001_post_counters"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_posts_created_at_id", "posts", ["created_at", "id"])
+    op.create_index("ix_posts_user_id_created_at", "posts", ["user_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_posts_user_id_created_at", table_name="posts")
+    op.drop_index("ix_posts_created_at_id", table_name="posts")
@@ -0,0 +1,44 @@
+"""materialized home timeline for fan-out-on-write
+
+Revision ID: 0003_timeline_entries
+Revises: 0002_post_keyset_indexes
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.models import GUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_timeline_entries"
+down_revision: Union[str, None] = "0002_post_keyset_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "timeline_entries",
+        sa.Column("id", GUID(), primary_key=True),
+        sa.Column("user_id", GUID(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("post_id", GUID(), sa.ForeignKey("posts.id"), nullable=False),
+        sa.Column("author_id", GUID(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("user_id", "post_id"),
+    )
+    op.create_index("ix_timeline_entries_post_id", "timeline_entries", ["post_id"])
+    op.create_index(
+        "ix_timeline_entries_user_id_created_at",
+        "timeline_entries",
+        ["user_id", "created_at", "post_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_timeline_entries_user_id_created_at", table_name="timeline_entries")
+    op.drop_index("ix_timeline_entries_post_id", table_name="timeline_entries")
+    op.drop_table("timeline_entries")
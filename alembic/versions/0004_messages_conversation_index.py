@@ -0,0 +1,30 @@
+"""composite index for range-scanning both directions of a conversation
+
+Revision ID: 0004_messages_conversation_index
+Revises: 0003_timeline_entries
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_messages_conversation_index"
+down_revision: Union[str, None] = "0003_timeline_entries"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_messages_sender_recipient_created_at",
+        "messages",
+        ["sender_id", "recipient_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_sender_recipient_created_at", table_name="messages")
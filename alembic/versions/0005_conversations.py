@@ -0,0 +1,93 @@
+"""conversation inbox with last message and unread counters
+
+Revision ID: 0005_conversations
+Revises: 0004_messages_conversation_index
+Create Date: 2026-10-18 00:00:00
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.models import GUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_conversations"
+down_revision: Union[str, None] = "0004_messages_conversation_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.create_table(
+        "conversations",
+        sa.Column("id", GUID(), primary_key=True),
+        sa.Column("user_a_id", GUID(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("user_b_id", GUID(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("last_message_at", sa.DateTime(), nullable=True),
+        sa.Column("last_message_preview", sa.String(200), nullable=True),
+        sa.Column("last_sender_id", GUID(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("unread_a", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("unread_b", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("user_a_id", "user_b_id"),
+    )
+    op.create_index("ix_conversations_user_a_last_message_at", "conversations", ["user_a_id", "last_message_at"])
+    op.create_index("ix_conversations_user_b_last_message_at", "conversations", ["user_b_id", "last_message_at"])
+
+    # Backfill one row per existing DM pair
+    messages = sa.table(
+        "messages",
+        sa.column("sender_id", GUID()),
+        sa.column("recipient_id", GUID()),
+        sa.column("content", sa.Text()),
+        sa.column("created_at", sa.DateTime()),
+        sa.column("read_at", sa.DateTime()),
+    )
+    conversations = sa.table(
+        "conversations",
+        sa.column("id", GUID()),
+        sa.column("user_a_id", GUID()),
+        sa.column("user_b_id", GUID()),
+        sa.column("last_message_at", sa.DateTime()),
+        sa.column("last_message_preview", sa.String()),
+        sa.column("last_sender_id", GUID()),
+        sa.column("unread_a", sa.Integer()),
+        sa.column("unread_b", sa.Integer()),
+        sa.column("created_at", sa.DateTime()),
+        sa.column("updated_at", sa.DateTime()),
+    )
+    pairs = {}
+    rows = bind.execute(sa.select(messages).order_by(messages.c.created_at.asc()))
+    for m in rows:
+        a, b = sorted([str(m.sender_id), str(m.recipient_id)])
+        row = pairs.setdefault((a, b), {"unread_a": 0, "unread_b": 0})
+        row.update(
+            last_message_at=m.created_at,
+            last_message_preview=(m.content or "")[:200],
+            last_sender_id=m.sender_id,
+        )
+        if m.read_at is None:
+            row["unread_a" if str(m.recipient_id) == a else "unread_b"] += 1
+
+    now = datetime.utcnow()
+    if pairs:
+        op.bulk_insert(
+            conversations,
+            [
+                {"id": uuid.uuid4(), "user_a_id": a, "user_b_id": b, "created_at": now, "updated_at": now, **row}
+                for (a, b), row in pairs.items()
+            ],
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_conversations_user_b_last_message_at", table_name="conversations")
+    op.drop_index("ix_conversations_user_a_last_message_at", table_name="conversations")
+    op.drop_table("conversations")
@@ -0,0 +1,52 @@
+"""one log per habit per day, plus the idempotency key of the last applied request
+
+Revision ID: 0007_habit_logs_unique_day
+Revises: 0006_user_token_version
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_habit_logs_unique_day"
+down_revision: Union[str, None] = "0006_user_token_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    with op.batch_alter_table("habit_logs") as batch_op:
+        batch_op.add_column(sa.Column("idempotency_key", sa.String(64), nullable=True))
+
+    # Keep the most recently updated log of each duplicated day
+    duplicates = bind.execute(sa.text(
+        "SELECT habit_id, date FROM habit_logs GROUP BY habit_id, date HAVING COUNT(*) > 1"
+    )).all()
+    for habit_id, day in duplicates:
+        ids = bind.execute(sa.text(
+            "SELECT id FROM habit_logs WHERE habit_id = :habit_id AND date = :day "
+            "ORDER BY updated_at DESC, created_at DESC"
+        ), {"habit_id": habit_id, "day": day}).scalars().all()
+        for stale_id in ids[1:]:
+            bind.execute(sa.text("DELETE FROM habit_logs WHERE id = :id"), {"id": stale_id})
+
+    if duplicates:
+        # Duplicate completions were counted too
+        bind.execute(sa.text(
+            "UPDATE habits SET total_completions = ("
+            "SELECT COUNT(*) FROM habit_logs "
+            "WHERE habit_logs.habit_id = habits.id AND habit_logs.status = 'completed')"
+        ))
+
+    op.create_index("uq_habit_logs_habit_id_date", "habit_logs", ["habit_id", "date"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_habit_logs_habit_id_date", table_name="habit_logs")
+    with op.batch_alter_table("habit_logs") as batch_op:
+        batch_op.drop_column("idempotency_key")
@@ -0,0 +1,63 @@
+"""follower counter on users; backfill timeline_entries from existing posts
+
+Revision ID: 0008_timeline_backfill
+Revises: 0007_habit_logs_unique_day
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_timeline_backfill"
+down_revision: Union[str, None] = "0007_habit_logs_unique_day"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# A random id per row: GUID stores CHAR(36) text on SQLite and a native uuid on Postgres
+_NEW_ID = {
+    "sqlite": (
+        "lower(hex(randomblob(4)) || '-' || hex(randomblob(2)) || '-' || hex(randomblob(2)) "
+        "|| '-' || hex(randomblob(2)) || '-' || hex(randomblob(6)))"
+    ),
+    "postgresql": "gen_random_uuid()",
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(sa.Column("follower_count", sa.Integer(), nullable=False, server_default="0"))
+    op.execute(
+        "UPDATE users SET follower_count = "
+        "(SELECT COUNT(*) FROM follows WHERE follows.followed_id = users.id)"
+    )
+
+    # Followers-only posts written before fan-out existed, into the timelines of
+    # their authors' followers. High-fanout authors are merged at read time instead.
+    bind.execute(
+        sa.text(
+            "INSERT INTO timeline_entries (id, user_id, post_id, author_id, created_at) "
+            f"SELECT {_NEW_ID[bind.dialect.name]}, follows.follower_id, posts.id, posts.user_id, posts.created_at "
+            "FROM posts "
+            "JOIN users ON users.id = posts.user_id "
+            "JOIN follows ON follows.followed_id = posts.user_id "
+            "WHERE posts.is_public = :public AND posts.created_at IS NOT NULL "
+            "AND users.follower_count <= :max_followers "
+            "AND NOT EXISTS (SELECT 1 FROM timeline_entries t "
+            "WHERE t.user_id = follows.follower_id AND t.post_id = posts.id)"
+        ),
+        {"public": False, "max_followers": settings.FEED_FANOUT_MAX_FOLLOWERS},
+    )
+
+
+def downgrade() -> None:
+    # Backfilled timeline rows are indistinguishable from fanned-out ones and are kept
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("follower_count")
@@ -0,0 +1,32 @@
+"""covering index for the analytics scan of completed habit logs
+
+Revision ID: 0009_habit_logs_analytics_index
+Revises: 0008_timeline_backfill
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_habit_logs_analytics_index"
+down_revision: Union[str, None] = "0008_timeline_backfill"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Equality on habit_id and status, a range on date, and count carried along:
+    # every column user_analytics reads, in the index itself
+    op.create_index(
+        "ix_habit_logs_habit_id_status_date_count",
+        "habit_logs",
+        ["habit_id", "status", "date", "count"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_habit_logs_habit_id_status_date_count", table_name="habit_logs")
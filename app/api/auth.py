@@ -7,9 +7,9 @@ from sqlalchemy.orm import Session
 from app.config import settings
 from app.core.database import get_db
 from app.core.security import (
-    verify_password, 
-    get_password_hash, 
-    create_access_token,
+    verify_password_async,
+    get_password_hash_async,
+    create_user_token,
     get_current_user
 )
 from app.db.models import User
@@ -33,7 +33,7 @@ async def register(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         email=user_data.email,
         name=user_data.name,
@@ -46,9 +46,7 @@ async def register(
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": db_user.email}, expires_delta=access_token_expires
-    )
+    access_token = create_user_token(db_user, expires_delta=access_token_expires)
     
     # Set cookie
     response.set_cookie(
@@ -70,7 +68,7 @@ async def login(
     """Login user"""
     user = db.query(User).filter(User.email == form_data.username).first()
     
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -84,9 +82,7 @@ async def login(
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    access_token = create_user_token(user, expires_delta=access_token_expires)
     
     # Set cookie
     response.set_cookie(
@@ -1,4 +1,6 @@
 # app/api/challenges.py
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import Optional
@@ -17,6 +19,8 @@ from app.db.models import (
     FriendshipStatus,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.get("/", tags=["Challenges"])
@@ -35,7 +39,7 @@ def create_community(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: create_community called with params: name={name}")
+    logger.debug("create_community called with params: name=%s", name)
     if db.query(Community).filter(Community.name == name).first():
         raise HTTPException(status_code=400, detail="Community name already exists")
 
@@ -63,7 +67,7 @@ def list_communities(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: list_communities called with params: q={q}")
+    logger.debug("list_communities called with params: q=%s", q)
     query = db.query(Community)
     if q:
         like = f"%{q}%"
@@ -85,7 +89,7 @@ def join_community(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: join_community called with params: community_id={community_id}")
+    logger.debug("join_community called with params: community_id=%s", community_id)
     comm = db.query(Community).filter(Community.id == community_id).first()
     if not comm:
         raise HTTPException(status_code=404, detail="Community not found")
@@ -108,7 +112,7 @@ def leave_community(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: leave_community called with params: community_id={community_id}")
+    logger.debug("leave_community called with params: community_id=%s", community_id)
     m = db.query(CommunityMember).filter(
         CommunityMember.community_id == community_id,
         CommunityMember.user_id == current_user.id,
@@ -126,7 +130,7 @@ def community_members(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: community_members called with params: community_id={community_id}")
+    logger.debug("community_members called with params: community_id=%s", community_id)
     comm = db.query(Community).filter(Community.id == community_id).first()
     if not comm:
         raise HTTPException(status_code=404, detail="Community not found")
@@ -147,7 +151,7 @@ def get_user_communities(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: get_user_communities called")
+    logger.debug("get_user_communities called")
     """Get communities where the current user is a member"""
     communities = db.query(Community).join(CommunityMember).filter(
         CommunityMember.user_id == current_user.id
@@ -179,7 +183,7 @@ def create_challenge(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: create_challenge called with params: name={name}, is_public={is_public}")
+    logger.debug("create_challenge called with params: name=%s, is_public=%s", name, is_public)
     
     # Only check membership for private challenges
     if community_id and not is_public:
@@ -228,7 +232,7 @@ def edit_challenge(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: edit_challenge called for challenge_id={challenge_id}")
+    logger.debug("edit_challenge called for challenge_id=%s", challenge_id)
     
     challenge = db.query(Challenge).filter(Challenge.id == challenge_id).first()
     if not challenge:
@@ -276,7 +280,7 @@ def get_challenge_details(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: get_challenge_details called for challenge_id={challenge_id}")
+    logger.debug("get_challenge_details called for challenge_id=%s", challenge_id)
     
     challenge = db.query(Challenge).filter(Challenge.id == challenge_id).first()
     if not challenge:
@@ -316,7 +320,7 @@ def list_challenges(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: list_challenges called with params: public={public}, community_id={community_id}, q={q}")
+    logger.debug("list_challenges called with params: public=%s, community_id=%s, q=%s", public, community_id, q)
     qy = db.query(Challenge)
     if public is not None:
         qy = qy.filter(Challenge.is_public == public)
@@ -349,7 +353,7 @@ def invite_user_to_challenge(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: invite_user_to_challenge called with params: challenge_id={challenge_id}, user_id={user_id}")
+    logger.debug("invite_user_to_challenge called with params: challenge_id=%s, user_id=%s", challenge_id, user_id)
     ch = db.query(Challenge).filter(Challenge.id == challenge_id).first()
     if not ch:
         raise HTTPException(status_code=404, detail="Challenge not found")
@@ -385,7 +389,7 @@ def join_challenge(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: join_challenge called with params: challenge_id={challenge_id}")
+    logger.debug("join_challenge called with params: challenge_id=%s", challenge_id)
     """Allow the current user to join a challenge.
     Rules:
     - If the challenge is community-bound and not public: must be a community member.
@@ -432,7 +436,7 @@ def send_friend_request(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: send_friend_request called with params: addressee_id={addressee_id}")
+    logger.debug("send_friend_request called with params: addressee_id=%s", addressee_id)
     if addressee_id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot friend yourself")
 
@@ -458,7 +462,7 @@ def accept_friend_request(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: accept_friend_request called with params: request_id={request_id}")
+    logger.debug("accept_friend_request called with params: request_id=%s", request_id)
     req = db.query(Friendship).filter(Friendship.id == request_id).first()
     if not req or req.addressee_id != current_user.id:
         raise HTTPException(status_code=404, detail="Request not found")
@@ -473,7 +477,7 @@ def decline_friend_request(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: decline_friend_request called with params: request_id={request_id}")
+    logger.debug("decline_friend_request called with params: request_id=%s", request_id)
     req = db.query(Friendship).filter(Friendship.id == request_id).first()
     if not req or req.addressee_id != current_user.id:
         raise HTTPException(status_code=404, detail="Request not found")
@@ -487,7 +491,7 @@ def list_friends(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: list_friends called")
+    logger.debug("list_friends called")
     rows = db.query(Friendship).filter(
         (Friendship.status == FriendshipStatus.ACCEPTED)
         & ((Friendship.requester_id == current_user.id) | (Friendship.addressee_id == current_user.id))
@@ -502,7 +506,7 @@ def list_friend_requests(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: list_friend_requests called with params: incoming={incoming}")
+    logger.debug("list_friend_requests called with params: incoming=%s", incoming)
     q = db.query(Friendship).filter(Friendship.status == FriendshipStatus.PENDING)
     if incoming:
         q = q.filter(Friendship.addressee_id == current_user.id)
@@ -531,7 +535,7 @@ def update_profile(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    print(f"DEBUG: update_profile called with params: profile={profile}, avatar_url={avatar_url}")
+    logger.debug("update_profile called with params: profile=%s, avatar_url=%s", profile, avatar_url)
     current_user.profile = profile if profile is not None else current_user.profile
     current_user.avatar_url = avatar_url if avatar_url is not None else current_user.avatar_url
     db.add(current_user)
@@ -5,6 +5,7 @@ from typing import List, Optional
 from uuid import UUID
 
 from app.core.database import get_db
+from app.core.events import event_bus
 from app.core.security import get_current_user
 from app.db.models import User, Friendship
 
@@ -49,6 +50,13 @@ def send_friend_request(
     )
     db.add(friendship)
     db.commit()
+    event_bus.publish(
+        "friend_request",
+        [user_id],
+        friendship_id=str(friendship.id),
+        status="pending",
+        user_id=str(current_user.id),
+    )
     
     return {"message": f"Friend request sent to {target_user.name}"}
 
@@ -70,6 +78,13 @@ def accept_friend_request(
     
     friendship.status = "accepted"
     db.commit()
+    event_bus.publish(
+        "friend_request",
+        [friendship.requester_id],
+        friendship_id=str(friendship.id),
+        status="accepted",
+        user_id=str(current_user.id),
+    )
     
     requester = db.query(User).filter(User.id == friendship.requester_id).first()
     return {"message": f"You are now friends with {requester.name}"}
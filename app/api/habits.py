@@ -1,34 +1,95 @@
 # app/api/habits.py
 from typing import List, Optional
 from datetime import date, datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, select
 from uuid import UUID
 
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_db, get_async_db, get_async_read_db
+from app.core.security import get_current_user, get_current_user_async
 from app.db.models import User, Habit, HabitLog, LogStatus
-from app.schemas.habit import HabitCreate, HabitUpdate, HabitResponse, HabitLogCreate, HabitLogResponse
+from app.schemas.habit import (
+    HabitCreate, HabitUpdate, HabitResponse, HabitLogCreate, HabitLogResponse, HabitStatusResponse,
+    HabitAnalyticsSummary,
+)
+from app.services.analytics_service import AnalyticsService
 from app.services.habit_service import HabitService
-from app.services.gamification import GamificationService
 
 router = APIRouter()
 
+MAX_STATUS_DAYS = 366
+MAX_ANALYTICS_DAYS = 730
+
 @router.get("", response_model=List[HabitResponse])
 @router.get("/", response_model=List[HabitResponse])
 async def get_habits(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's habits"""
-    habits = db.query(Habit).filter(
+    habits = (await db.scalars(select(Habit).where(
         Habit.user_id == current_user.id,
         Habit.is_active == True
-    ).all()
+    ))).all()
     
     return [HabitResponse.model_validate(habit) for habit in habits]
 
+@router.get("/status", response_model=List[HabitStatusResponse])
+async def get_habits_status(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Active habits with their logs, completed count and target for [start, end] (default: today).
+
+    One joined query, so the dashboard no longer fetches logs habit by habit.
+    """
+    end = end or date.today()
+    start = start or end
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    days = (end - start).days + 1
+    if days > MAX_STATUS_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range is limited to {MAX_STATUS_DAYS} days"
+        )
+
+    rows = (await db.execute(
+        select(Habit, HabitLog)
+        .outerjoin(HabitLog, and_(
+            HabitLog.habit_id == Habit.id,
+            HabitLog.date >= start,
+            HabitLog.date <= end,
+        ))
+        .where(Habit.user_id == current_user.id, Habit.is_active == True)
+        .order_by(Habit.created_at, Habit.id, HabitLog.date)
+    )).all()
+
+    habits = {}
+    for habit, log in rows:
+        entry = habits.setdefault(habit.id, {"habit": habit, "logs": [], "count": 0})
+        if log is not None:
+            entry["logs"].append(HabitLogResponse.model_validate(log))
+            if log.status == LogStatus.COMPLETED:
+                entry["count"] += log.count or 1
+
+    return [
+        HabitStatusResponse(
+            **HabitResponse.model_validate(entry["habit"]).model_dump(),
+            logs=entry["logs"],
+            count=entry["count"],
+            target=(entry["habit"].target_count or 1) * days,
+        )
+        for entry in habits.values()
+    ]
+
 @router.post("", response_model=HabitResponse)
 @router.post("/", response_model=HabitResponse)
 async def create_habit(
@@ -51,14 +112,14 @@ async def create_habit(
 @router.get("/{habit_id}", response_model=HabitResponse)
 async def get_habit(
     habit_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get specific habit"""
-    habit = db.query(Habit).filter(
+    habit = await db.scalar(select(Habit).where(
         Habit.id == habit_id,
         Habit.user_id == current_user.id
-    ).first()
+    ))
     
     if not habit:
         raise HTTPException(
@@ -126,10 +187,11 @@ async def delete_habit(
 async def log_habit(
     habit_id: UUID,
     log_data: HabitLogCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=64),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Log habit completion"""
+    """Log habit completion; retries with the same Idempotency-Key header are not applied twice"""
     habit = db.query(Habit).filter(
         Habit.id == habit_id,
         Habit.user_id == current_user.id
@@ -141,50 +203,13 @@ async def log_habit(
             detail="Habit not found"
         )
     
-    # Check if already logged today
-    log_date = log_data.date or date.today()
-    existing_log = db.query(HabitLog).filter(
-        and_(
-            HabitLog.habit_id == habit_id,
-            HabitLog.user_id == current_user.id,
-            HabitLog.date == log_date
-        )
-    ).first()
-    
-    if existing_log:
-        # Update existing log
-        update_data = log_data.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            if value is not None:
-                setattr(existing_log, field, value)
-        
-        existing_log.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(existing_log)
-        log = existing_log
-    else:
-        # Create new log
-        db_log = HabitLog(
-            habit_id=habit_id,
-            user_id=current_user.id,
-            date=log_date,
-            **log_data.dict(exclude={"date"})
-        )
-        db.add(db_log)
-        db.commit()
-        db.refresh(db_log)
-        log = db_log
-    
-    # Update habit statistics if completed
-    if log_data.status == LogStatus.COMPLETED:
-        habit_service = HabitService(db)
-        habit_service.update_habit_progress(habit, log_date)
-        
-        # Ensure the current user is attached before awarding XP
-        current_user = db.merge(current_user, load=True)
-        # Award XP
-        gamification = GamificationService(db)
-        gamification.award_xp(current_user, 10, "habit_completion")
+    log = HabitService(db).log_habit(
+        habit,
+        current_user.id,
+        log_data.date or date.today(),
+        log_data.dict(exclude={"date"}, exclude_unset=True),
+        idempotency_key,
+    )
     
     return HabitLogResponse.model_validate(log)
 
@@ -192,14 +217,14 @@ async def log_habit(
 async def get_habit_logs(
     habit_id: UUID,
     days: Optional[int] = 30,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get habit logs"""
-    habit = db.query(Habit).filter(
+    habit = await db.scalar(select(Habit).where(
         Habit.id == habit_id,
         Habit.user_id == current_user.id
-    ).first()
+    ))
     
     if not habit:
         raise HTTPException(
@@ -211,32 +236,32 @@ async def get_habit_logs(
     from datetime import timedelta
     start_date = date.today() - timedelta(days=days)
     
-    logs = db.query(HabitLog).filter(
-        HabitLog.habit_id == habit_id,
-        HabitLog.date >= start_date
-    ).order_by(HabitLog.date.desc()).all()
+    logs = (await db.scalars(
+        select(HabitLog)
+        .where(HabitLog.habit_id == habit_id, HabitLog.date >= start_date)
+        .order_by(HabitLog.date.desc())
+    )).all()
     
     return [HabitLogResponse.model_validate(log) for log in logs]
 
 @router.get("/stats/heatmap")
 async def get_heatmap(
     days: int = 180,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Aggregate per-day completion counts for all user's habits for a calendar heatmap.
     Returns: [{"date": "YYYY-MM-DD", "count": int}]
     """
     from datetime import timedelta
-    from sqlalchemy import func
 
     start_date = date.today() - timedelta(days=days)
 
     # Sum 'completed' logs across all habits owned by the user per day
-    q = (
-        db.query(HabitLog.date.label("d"), func.sum(HabitLog.count).label("c"))
+    stmt = (
+        select(HabitLog.date.label("d"), func.sum(HabitLog.count).label("c"))
         .join(Habit, Habit.id == HabitLog.habit_id)
-        .filter(
+        .where(
             Habit.user_id == current_user.id,
             HabitLog.date >= start_date,
             HabitLog.status == LogStatus.COMPLETED,
@@ -245,6 +270,17 @@ async def get_heatmap(
         .order_by(HabitLog.date.asc())
     )
 
-    rows = q.all()
+    rows = (await db.execute(stmt)).all()
     data = [{"date": d.strftime("%Y-%m-%d"), "count": int(c or 0)} for d, c in rows]
     return {"days": days, "data": data}
+
+@router.get("/stats/analytics", response_model=List[HabitAnalyticsSummary])
+async def get_analytics(
+    days: int = Query(365, ge=1, le=MAX_ANALYTICS_DAYS),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Completion rate, rolling 7/30-day rates, weekday distribution and streak histogram
+    for every active habit over the last ``days`` days, computed together in one pass.
+    """
+    return await db.run_sync(lambda session: AnalyticsService(session).user_analytics(current_user.id, days))
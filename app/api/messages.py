@@ -3,13 +3,17 @@ from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, select
 
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_db, get_async_db, SessionLocal
+from app.core.events import event_bus
+from app.core.realtime import manager
+from app.core.security import get_current_user, get_current_user_async, get_current_user_optional
 from app.db.models import User, Message, Friendship
+from app.services.conversation_service import ConversationService
 
 router = APIRouter()
 
@@ -25,51 +29,100 @@ def _are_friends(db: Session, user_a: UUID, user_b: UUID) -> bool:
     return friendship is not None
 
 
+def _serialize_message(m: Message) -> dict:
+    return {
+        "id": str(m.id),
+        "sender_id": str(m.sender_id),
+        "recipient_id": str(m.recipient_id),
+        "content": m.content,
+        "created_at": m.created_at.isoformat(),
+        "read_at": m.read_at.isoformat() if m.read_at else None,
+    }
+
+
+def _parse_timestamp(value: str, name: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"Invalid '{name}' timestamp")
+
+
 @router.get("/messages/with/{other_user_id}")
-def get_conversation(
+async def get_conversation(
     other_user_id: UUID,
     limit: int = Query(50, ge=1, le=200),
     before: Optional[str] = Query(None, description="ISO timestamp to paginate older messages"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    after: Optional[str] = Query(None, description="ISO timestamp; only return newer messages (polling fallback)"),
+    since_id: Optional[UUID] = Query(None, description="Message id; only return messages sent after it"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """Fetch recent direct messages between current user and other_user_id, most recent first."""
     # Validate other user
-    other = db.query(User).filter(User.id == other_user_id).first()
+    other = await db.scalar(select(User.id).where(User.id == other_user_id))
     if not other:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Optional: ensure they are friends (can relax if you want open DMs)
-    if not _are_friends(db, current_user.id, other_user_id):
+    if not await db.run_sync(_are_friends, current_user.id, other_user_id):
         raise HTTPException(status_code=403, detail="You can only message friends")
 
-    q = db.query(Message).filter(
-        or_(
-            and_(Message.sender_id == current_user.id, Message.recipient_id == other_user_id),
-            and_(Message.sender_id == other_user_id, Message.recipient_id == current_user.id),
-        )
+    between = or_(
+        and_(Message.sender_id == current_user.id, Message.recipient_id == other_user_id),
+        and_(Message.sender_id == other_user_id, Message.recipient_id == current_user.id),
     )
+    stmt = select(Message).where(between)
 
     if before:
-        try:
-            before_dt = datetime.fromisoformat(before)
-            q = q.filter(Message.created_at < before_dt)
-        except Exception:
-            raise HTTPException(status_code=400, detail="Invalid 'before' timestamp")
-
-    items = q.order_by(Message.created_at.desc()).limit(limit).all()
-
-    return [
-        {
-            "id": str(m.id),
-            "sender_id": str(m.sender_id),
-            "recipient_id": str(m.recipient_id),
-            "content": m.content,
-            "created_at": m.created_at.isoformat(),
-            "read_at": m.read_at.isoformat() if m.read_at else None,
-        }
-        for m in items
-    ]
+        stmt = stmt.where(Message.created_at < _parse_timestamp(before, "before"))
+
+    if after:
+        stmt = stmt.where(Message.created_at > _parse_timestamp(after, "after"))
+
+    if since_id:
+        anchor = (await db.execute(
+            select(Message.created_at, Message.id).where(between, Message.id == since_id)
+        )).first()
+        if anchor is None:
+            raise HTTPException(status_code=400, detail="Unknown 'since_id' message")
+        # (created_at, id) tiebreak so messages sharing the anchor's timestamp are not skipped
+        stmt = stmt.where(
+            or_(
+                Message.created_at > anchor.created_at,
+                and_(Message.created_at == anchor.created_at, Message.id > anchor.id),
+            )
+        )
+
+    if after or since_id:
+        # Oldest-first so a client catching up never skips messages past the limit
+        items = list(await db.scalars(stmt.order_by(Message.created_at.asc(), Message.id.asc()).limit(limit)))
+        items.reverse()
+    else:
+        items = list(await db.scalars(stmt.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)))
+
+    return [_serialize_message(m) for m in items]
+
+
+@router.get("/messages/conversations")
+async def list_conversations(
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    """Inbox: the current user's conversations with last-message preview and unread count."""
+    return await db.run_sync(lambda session: ConversationService(session).inbox(current_user.id, limit))
+
+
+@router.post("/messages/with/{other_user_id}/read")
+def mark_conversation_read(
+    other_user_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Mark all messages from other_user_id to the current user as read."""
+    updated = ConversationService(db).mark_read(current_user.id, other_user_id)
+    db.commit()
+    return {"updated": updated}
 
 
 @router.post("/messages/send")
@@ -92,15 +145,35 @@ def send_message(
     if not _are_friends(db, current_user.id, to):
         raise HTTPException(status_code=403, detail="You can only message friends")
 
-    msg = Message(sender_id=current_user.id, recipient_id=to, content=content.strip())
+    msg = Message(sender_id=current_user.id, recipient_id=to, content=content.strip(), created_at=datetime.utcnow())
     db.add(msg)
+    ConversationService(db).record_message(msg)
     db.commit()
     db.refresh(msg)
 
-    return {
-        "id": str(msg.id),
-        "sender_id": str(msg.sender_id),
-        "recipient_id": str(msg.recipient_id),
-        "content": msg.content,
-        "created_at": msg.created_at.isoformat(),
-    }
+    payload = _serialize_message(msg)
+    event_bus.publish("message", [msg.sender_id, msg.recipient_id], message=payload)
+    return payload
+
+
+@router.websocket("/messages/ws")
+async def messages_ws(websocket: WebSocket):
+    """Push new direct messages to the connected user as they are sent."""
+    db = SessionLocal()
+    try:
+        user = get_current_user_optional(websocket.cookies.get("access_token"), db)
+    finally:
+        db.close()
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await manager.connect(user.id, websocket)
+    try:
+        while True:
+            # Clients only send keepalives; all traffic is server -> client
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(user.id, websocket)
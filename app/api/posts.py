@@ -1,14 +1,20 @@
 # app/api/posts.py
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi import Body
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, desc
+from sqlalchemy import Select, desc, select
 from datetime import datetime
+from uuid import UUID
+import base64
 
-from app.core.database import get_db
-from app.core.security import get_current_user
-from app.db.models import User, Post, PostLike, PostComment, Follow
+from app.core.database import get_db, get_async_db, get_async_read_db
+from app.core.events import event_bus
+from app.core.security import get_current_user, get_current_user_async
+from app.db.models import User, Post, PostLike, PostComment
+from app.services.post_service import PostService
+from app.services.timeline_service import TimelineService, keyset_before
 
 router = APIRouter()
 
@@ -32,144 +38,145 @@ async def create_post(
         updated_at=datetime.utcnow(),
     )
     db.add(post)
+    db.flush()
+    TimelineService(db).fan_out(post)
     db.commit()
     db.refresh(post)
     return {"id": str(post.id)}
 
 
-@router.get("/posts/feed")
-async def get_feed(
-    limit: int = Query(20, ge=1, le=50),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    # following ids
-    following_rows = db.query(Follow.followed_id).filter(Follow.follower_id == current_user.id).all()
-    following_ids = [row[0] for row in following_rows]
-
-    # fetch posts: from following OR public
-    q = (
-        db.query(Post)
-        .filter(or_(Post.user_id.in_(following_ids), Post.is_public == True))
-        .order_by(desc(Post.created_at))
-        .limit(limit)
-        .all()
+async def _serialize_posts(db: AsyncSession, posts: List[Post], viewer: User) -> List[dict]:
+    """Serialize a page of posts with author info, counts and the viewer's like state.
+
+    Authors and ``you_liked`` are resolved for the whole page with one query
+    each; like/comment counts come from the denormalized columns on Post.
+    """
+    if not posts:
+        return []
+    post_ids = [p.id for p in posts]
+
+    authors = {
+        u.id: u
+        for u in await db.scalars(select(User).where(User.id.in_({p.user_id for p in posts})))
+    }
+    liked_ids = set(
+        await db.scalars(
+            select(PostLike.post_id).where(PostLike.post_id.in_(post_ids), PostLike.user_id == viewer.id)
+        )
     )
 
-    # serialize with counts and basic author info
     result = []
-    for p in q:
-        like_count = db.query(PostLike).filter(PostLike.post_id == p.id).count()
-        comment_count = db.query(PostComment).filter(PostComment.post_id == p.id).count()
-        you_liked = (
-            db.query(PostLike)
-            .filter(PostLike.post_id == p.id, PostLike.user_id == current_user.id)
-            .first()
-            is not None
-        )
-        author = db.query(User).filter(User.id == p.user_id).first()
+    for p in posts:
+        author = authors.get(p.user_id)
         result.append({
             "id": str(p.id),
             "user": {
-                "id": str(author.id),
-                "name": author.name,
-                "avatar_url": author.avatar_url,
+                "id": str(p.user_id),
+                "name": author.name if author else "User",
+                "avatar_url": author.avatar_url if author else None,
             },
             "content": p.content,
             "image_url": p.image_url,
             "is_public": p.is_public,
             "created_at": p.created_at.isoformat(),
-            "like_count": like_count,
-            "comment_count": comment_count,
-            "you_liked": you_liked,
+            "like_count": p.like_count or 0,
+            "comment_count": p.comment_count or 0,
+            "you_liked": p.id in liked_ids,
         })
     return result
 
 
+def _encode_cursor(post: Post) -> str:
+    raw = f"{post.created_at.isoformat()}|{post.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, post_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(post_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _paginate(
+    db: AsyncSession, stmt: Select, cursor: Optional[str], limit: int, response: Response
+) -> List[Post]:
+    """Keyset-paginate a Post select newest first on (created_at, id).
+
+    The next page's opaque cursor is returned in the ``X-Next-Cursor`` header
+    (absent on the last page), so every page costs one index range scan.
+    """
+    before = _decode_cursor(cursor) if cursor else None
+    posts = (await db.scalars(
+        stmt.where(keyset_before(Post.created_at, Post.id, before))
+        .order_by(desc(Post.created_at), desc(Post.id))
+        .limit(limit + 1)
+    )).all()
+    return _next_page(list(posts), limit, response)
+
+
+def _next_page(posts: List[Post], limit: int, response: Response) -> List[Post]:
+    if len(posts) > limit:
+        posts = posts[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(posts[-1])
+    return posts
+
+
+@router.get("/posts/feed")
+async def get_feed(
+    response: Response,
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    # public posts + fanned-out timeline + high-fanout followees, merged
+    before = _decode_cursor(cursor) if cursor else None
+    posts = await db.run_sync(
+        lambda session: TimelineService(session).home_feed(current_user.id, limit + 1, before)
+    )
+    posts = _next_page(posts, limit, response)
+
+    return await _serialize_posts(db, posts, current_user)
+
+
 @router.get("/posts/user/{user_id}")
 async def get_user_posts(
     user_id: str,
+    response: Response,
     limit: int = Query(20, ge=1, le=50),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
 ):
+    author = await db.scalar(select(User).where(User.id == user_id))
+    if not author:
+        raise HTTPException(status_code=404, detail="User not found")
+
     # If viewing someone else, only show public posts; if self, show all
     is_self = str(current_user.id) == str(user_id)
-    q = db.query(Post).filter(Post.user_id == user_id)
+    stmt = select(Post).where(Post.user_id == author.id)
     if not is_self:
-        q = q.filter(Post.is_public == True)
-    posts = q.order_by(desc(Post.created_at)).limit(limit).all()
+        stmt = stmt.where(Post.is_public == True)
+    posts = await _paginate(db, stmt, cursor, limit, response)
+
+    return await _serialize_posts(db, posts, current_user)
 
-    author = db.query(User).filter(User.id == user_id).first()
-    if not author:
-        raise HTTPException(status_code=404, detail="User not found")
 
-    result = []
-    for p in posts:
-        like_count = db.query(PostLike).filter(PostLike.post_id == p.id).count()
-        comment_count = db.query(PostComment).filter(PostComment.post_id == p.id).count()
-        you_liked = (
-            db.query(PostLike)
-            .filter(PostLike.post_id == p.id, PostLike.user_id == current_user.id)
-            .first()
-            is not None
-        )
-        result.append({
-            "id": str(p.id),
-            "user": {
-                "id": str(author.id),
-                "name": author.name,
-                "avatar_url": author.avatar_url,
-            },
-            "content": p.content,
-            "image_url": p.image_url,
-            "is_public": p.is_public,
-            "created_at": p.created_at.isoformat(),
-            "like_count": like_count,
-            "comment_count": comment_count,
-            "you_liked": you_liked,
-        })
-    return result
 @router.get("/posts/me")
 async def get_my_posts(
+    response: Response,
     limit: int = Query(20, ge=1, le=50),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async),
 ):
-    q = (
-        db.query(Post)
-        .filter(Post.user_id == current_user.id)
-        .order_by(desc(Post.created_at))
-        .limit(limit)
-        .all()
-    )
+    stmt = select(Post).where(Post.user_id == current_user.id)
+    posts = await _paginate(db, stmt, cursor, limit, response)
 
-    result = []
-    for p in q:
-        like_count = db.query(PostLike).filter(PostLike.post_id == p.id).count()
-        comment_count = db.query(PostComment).filter(PostComment.post_id == p.id).count()
-        you_liked = (
-            db.query(PostLike)
-            .filter(PostLike.post_id == p.id, PostLike.user_id == current_user.id)
-            .first()
-            is not None
-        )
-        result.append({
-            "id": str(p.id),
-            "user": {
-                "id": str(current_user.id),
-                "name": current_user.name,
-                "avatar_url": current_user.avatar_url,
-            },
-            "content": p.content,
-            "image_url": p.image_url,
-            "is_public": p.is_public,
-            "created_at": p.created_at.isoformat(),
-            "like_count": like_count,
-            "comment_count": comment_count,
-            "you_liked": you_liked,
-        })
-    return result
+    return await _serialize_posts(db, posts, current_user)
 
 
 @router.post("/posts/{post_id}/like")
@@ -186,7 +193,9 @@ async def like_post(
         return {"status": "ok"}
     like = PostLike(post_id=post_id, user_id=current_user.id)
     db.add(like)
+    PostService(db).adjust_like_count(post.id, 1)
     db.commit()
+    event_bus.publish("like", [post.user_id], post_id=str(post.id), user_id=str(current_user.id))
     return {"status": "ok"}
 
 
@@ -196,9 +205,13 @@ async def unlike_post(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    like = db.query(PostLike).filter(PostLike.post_id == post_id, PostLike.user_id == current_user.id).first()
-    if like:
-        db.delete(like)
+    deleted = (
+        db.query(PostLike)
+        .filter(PostLike.post_id == post_id, PostLike.user_id == current_user.id)
+        .delete(synchronize_session=False)
+    )
+    if deleted:
+        PostService(db).adjust_like_count(post_id, -deleted)
         db.commit()
     return {"status": "ok"}
 
@@ -248,5 +261,13 @@ async def add_comment(
         raise HTTPException(status_code=404, detail="Post not found")
     comment = PostComment(post_id=post_id, user_id=current_user.id, content=content, parent_id=parent_id)
     db.add(comment)
+    PostService(db).adjust_comment_count(post.id, 1)
     db.commit()
+    event_bus.publish(
+        "comment",
+        [post.user_id],
+        post_id=str(post.id),
+        comment_id=str(comment.id),
+        user_id=str(current_user.id),
+    )
     return {"status": "ok"}
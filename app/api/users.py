@@ -2,14 +2,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.core.security import get_current_user
 from app.db.models import User
 
 router = APIRouter()
 
 @router.get("/users/{user_id}")
-async def get_user(user_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_user(user_id: str, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
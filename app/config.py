@@ -6,15 +6,65 @@ class Settings(BaseSettings):
     # Database
     # Use SQLite by default for easier local development. Override via env var DATABASE_URL.
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./habitverse.db")
+    # Comma-separated read replica URLs; read-only endpoints are spread across them
+    DATABASE_READ_URLS: str = os.getenv("DATABASE_READ_URLS", "")
+    # After a request commits, that client reads from the primary for this long
+    READ_YOUR_WRITES_SECONDS: int = int(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Tokens used to carry the email in "sub"; turn off once those have expired
+    ACCEPT_LEGACY_EMAIL_TOKENS: bool = os.getenv("ACCEPT_LEGACY_EMAIL_TOKENS", "True").lower() == "true"
+    # Authenticated-user snapshot cache (per worker)
+    AUTH_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    # bcrypt runs on its own pool; beyond PASSWORD_POOL_MAX_PENDING jobs logins get a 503
+    PASSWORD_POOL_WORKERS: int = int(os.getenv("PASSWORD_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_POOL_MAX_PENDING: int = int(os.getenv("PASSWORD_POOL_MAX_PENDING", "64"))
+    
+    # SQLite connection profile, applied to every new connection.
+    # WAL lets readers run alongside the single writer and, with
+    # synchronous=NORMAL, fsyncs at checkpoints instead of on every commit.
+    SQLITE_TUNING: bool = os.getenv("SQLITE_TUNING", "True").lower() == "true"
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative = KiB
+    SQLITE_TEMP_STORE: str = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
     
     # Application
     APP_NAME: str = "HabitVerse"
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
+    # Logging: "json" for log shippers, "text" for local reading
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG else "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text" if DEBUG else "json")
+    # N+1 detector (DEBUG only): flag a request running the same SQL shape this many times
+    NPLUSONE_THRESHOLD: int = int(os.getenv("NPLUSONE_THRESHOLD", "5"))
+    NPLUSONE_REPORT_HEADER: bool = os.getenv("NPLUSONE_REPORT_HEADER", "False").lower() == "true"
+    # Slow-query log: statements over SLOW_QUERY_MS (0 = off) go to a rotating JSONL file.
+    # On by default only under DEBUG; production opts in by setting the threshold
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "200" if DEBUG else "0"))
+    SLOW_QUERY_LOG: str = os.getenv("SLOW_QUERY_LOG", "logs/slow_queries.jsonl")
+    SLOW_QUERY_LOG_MAX_BYTES: int = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    SLOW_QUERY_LOG_BACKUPS: int = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+    SLOW_QUERY_EXPLAIN: bool = os.getenv("SLOW_QUERY_EXPLAIN", "True").lower() == "true"
+    # Response compression: bodies under COMPRESSION_MIN_SIZE bytes are sent as-is
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "6"))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", "4"))
+    # Where .gz/.br copies of /static live; empty means beside the source files
+    STATIC_PRECOMPRESSED_DIR: str = os.getenv("STATIC_PRECOMPRESSED_DIR", "")
+    
+    # Feed: authors with more followers than this are merged into home feeds
+    # at read time instead of being fanned out on write
+    FEED_FANOUT_MAX_FOLLOWERS: int = int(os.getenv("FEED_FANOUT_MAX_FOLLOWERS", "1000"))
+    
+    # Realtime event bus: "memory" (single worker) or "unix" (all workers on one host)
+    EVENT_BUS_BACKEND: str = os.getenv("EVENT_BUS_BACKEND", "memory")
+    EVENT_BUS_SOCKET_DIR: str = os.getenv("EVENT_BUS_SOCKET_DIR", "/tmp/habitverse-events")
     
     # CORS
     ALLOWED_ORIGINS: list = ["http://localhost:3000", "http://localhost:8000"]
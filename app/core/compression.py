@@ -0,0 +1,246 @@
+# app/core/compression.py
+"""Response compression: gzip/brotli middleware and precompressed static files.
+
+Write ``.gz``/``.br`` siblings for static assets with
+``python -m app.core.compression [--directory app/static] [--output DIR]``.
+With ``--output`` they go to a mirrored tree under DIR instead of beside the
+sources, e.g. when the sources are mounted read-only.
+"""
+import argparse
+import gzip
+import os
+import zlib
+from mimetypes import guess_type
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+)
+COMPRESSIBLE_EXTENSIONS = (".css", ".html", ".js", ".json", ".map", ".svg", ".txt", ".xml")
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def _is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith("text/event-stream")
+
+
+def negotiate(accept_encoding: str, offered: Iterable[str]) -> Optional[str]:
+    """First of ``offered`` that the Accept-Encoding header allows"""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    for coding in offered:
+        if coding in accepted or "*" in accepted:
+            return coding
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        # Sync-flush each streamed chunk so the client is not kept waiting on our buffer
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing text responses of at least ``minimum_size`` bytes.
+
+    Brotli is preferred when the ``brotli`` package is installed and the client
+    accepts it, gzip otherwise. Responses that already carry a Content-Encoding
+    (e.g. precompressed static files) are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.offered = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.offered)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows how large the response is
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start["headers"])
+                if (
+                    "content-encoding" in headers
+                    or start["status"] in (204, 206, 304)
+                    or not _is_compressible(headers.get("content-type", ""))
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    return await send(message)
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                body = compressor.compress(body, final=not more_body)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                return await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+            body = compressor.compress(body, final=not more_body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves a ``.br``/``.gz`` sibling when the client accepts it.
+
+    Siblings are looked up beside each file, or at the same relative path under
+    ``precompressed_directory`` when one is given.
+    """
+
+    def __init__(self, *args, precompressed_directory: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.precompressed_directory = precompressed_directory
+
+    def _sibling_base(self, full_path) -> str:
+        if self.precompressed_directory is None:
+            return str(full_path)
+        return os.path.join(self.precompressed_directory, os.path.relpath(full_path, os.path.realpath(self.directory)))
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        if status_code == 200 and str(full_path).endswith(COMPRESSIBLE_EXTENSIONS):
+            request_headers = Headers(scope=scope)
+            accept_encoding = request_headers.get("accept-encoding", "")
+            for encoding, suffix in SUFFIXES.items():
+                if negotiate(accept_encoding, (encoding,)) is None:
+                    continue
+                sibling = self._sibling_base(full_path) + suffix
+                sibling_stat = _stat(sibling)
+                # A sibling older than its source is stale
+                if sibling_stat is None or sibling_stat.st_mtime < stat_result.st_mtime:
+                    continue
+                response = FileResponse(
+                    sibling,
+                    stat_result=sibling_stat,
+                    media_type=guess_type(str(full_path))[0] or "text/plain",
+                    headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+                )
+                if self.is_not_modified(response.headers, request_headers):
+                    return NotModifiedResponse(response.headers)
+                return response
+        return super().file_response(full_path, stat_result, scope, status_code)
+
+
+def _stat(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def precompress(
+    directory: str, output: Optional[str] = None, gzip_level: int = 9, brotli_quality: int = 11
+) -> list:
+    """Write ``.gz`` (and, with brotli installed, ``.br``) siblings for compressible files.
+
+    Siblings go beside their sources, or under ``output`` at the same relative
+    path. Siblings that are up to date are left alone, and one that would not
+    be smaller than its source is not written. Returns the paths written.
+    """
+    written = []
+    for root, _dirs, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            target_base = path if output is None else os.path.join(output, os.path.relpath(path, directory))
+            source_mtime = os.path.getmtime(path)
+            data = None
+            for encoding, suffix in SUFFIXES.items():
+                if encoding == "br" and brotli is None:
+                    continue
+                target = target_base + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+                    continue
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                if encoding == "br":
+                    compressed = brotli.compress(data, quality=brotli_quality)
+                else:
+                    compressed = gzip.compress(data, compresslevel=gzip_level, mtime=0)
+                if len(compressed) >= len(data):
+                    if os.path.exists(target):
+                        os.remove(target)
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "wb") as f:
+                    f.write(compressed)
+                written.append(target)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write precompressed siblings for static assets")
+    parser.add_argument("--directory", default="app/static")
+    parser.add_argument("--output", default=None, help="write siblings under this directory instead of beside sources")
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli not installed; writing .gz only")
+    written = precompress(args.directory, args.output)
+    for path in written:
+        print(path)
+    print(f"{len(written)} file(s) written")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,24 @@
 # app/core/database.py
-from sqlalchemy import create_engine
+import itertools
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from fastapi import Cookie
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from app.config import settings
 from app.db.models import Base  # import the declarative Base
 
+# Repository root, where alembic.ini and the migrations live
+ROOT = Path(__file__).resolve().parents[2]
+
 # Create database engine (handle SQLite separately)
 if settings.DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
@@ -19,6 +33,33 @@ else:
         pool_pre_ping=True,
     )
 
+def sqlite_pragmas() -> dict:
+    """PRAGMAs of the configured SQLite profile (empty when tuning is off)"""
+    if not settings.SQLITE_TUNING:
+        return {}
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "temp_store": settings.SQLITE_TEMP_STORE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+    }
+
+def apply_sqlite_pragmas(sync_engine, pragmas: dict) -> None:
+    """Run the given PRAGMAs on every new connection of a SQLite engine"""
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+if settings.DATABASE_URL.startswith("sqlite"):
+    apply_sqlite_pragmas(engine, sqlite_pragmas())
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
@@ -31,7 +72,140 @@ def get_db() -> Session:
         db.close()
 
 
-def init_db() -> None:
-    """Initialize database tables (for development without migrations)."""
-    # NOTE: In production use Alembic migrations instead.
-    Base.metadata.create_all(bind=engine)
+# Async engine on the same database for async route handlers; the sync engine
+# above stays for sync routes, scripts and migrations
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def _async_url(url: str):
+    """DATABASE_URL rewritten to use the backend's asyncio driver"""
+    sync_url = make_url(url)
+    backend = sync_url.get_backend_name()
+    return sync_url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+if settings.DATABASE_URL.startswith("sqlite"):
+    async_engine = create_async_engine(_async_url(settings.DATABASE_URL))
+    apply_sqlite_pragmas(async_engine.sync_engine, sqlite_pragmas())
+else:
+    async_engine = create_async_engine(
+        _async_url(settings.DATABASE_URL),
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+    )
+
+# expire_on_commit=False: attribute refreshes would need an implicit await
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db() -> AsyncSession:
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Read replicas. Read-only endpoints take get_read_db / get_async_read_db and are
+# spread round-robin across DATABASE_READ_URLS; without replicas they use the primary.
+READ_URLS = [url.strip() for url in settings.DATABASE_READ_URLS.split(",") if url.strip()]
+PRIMARY_UNTIL_COOKIE = "db_primary_until"
+
+read_engines = [
+    create_engine(url, pool_size=10, max_overflow=20, pool_pre_ping=True) for url in READ_URLS
+]
+async_read_engines = [
+    create_async_engine(_async_url(url), pool_size=10, max_overflow=20, pool_pre_ping=True)
+    for url in READ_URLS
+]
+_replica_counter = itertools.count()
+
+def _read_bind(engines: list, primary_until: Optional[str]):
+    """Next replica engine, or None to stay on the primary"""
+    if not engines:
+        return None
+    try:
+        if float(primary_until or 0) > time.time():
+            return None  # this client committed recently: read its own writes
+    except ValueError:
+        pass
+    return engines[next(_replica_counter) % len(engines)]
+
+def get_read_db(db_primary_until: Optional[str] = Cookie(None)) -> Session:
+    """Dependency to get a database session for read-only endpoints"""
+    bind = _read_bind(read_engines, db_primary_until)
+    db = SessionLocal(bind=bind) if bind is not None else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(db_primary_until: Optional[str] = Cookie(None)) -> AsyncSession:
+    """Dependency to get an async database session for read-only endpoints"""
+    bind = _read_bind(async_read_engines, db_primary_until)
+    async with (AsyncSessionLocal(bind=bind) if bind is not None else AsyncSessionLocal()) as db:
+        yield db
+
+# Read-your-writes: sessions that commit changes flag the current request, and
+# the HTTP middleware then pins the client to the primary for a short window.
+_request_writes: ContextVar[Optional[dict]] = ContextVar("request_writes", default=None)
+
+def track_request_writes() -> dict:
+    """Start tracking commits for the current request; the dict is shared with worker threads"""
+    state = {"committed": False}
+    _request_writes.set(state)
+    return state
+
+@event.listens_for(Session, "after_flush")
+def _note_pending_write(session, flush_context):
+    session.info["has_writes"] = True
+
+@event.listens_for(Session, "after_commit")
+def _note_committed_write(session):
+    if session.info.pop("has_writes", False):
+        state = _request_writes.get()
+        if state is not None:
+            state["committed"] = True
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_write(session):
+    session.info.pop("has_writes", None)
+
+
+def alembic_config(connection) -> Config:
+    """Alembic configuration running on ``connection``, leaving logging alone"""
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    config.attributes["connection"] = connection
+    return config
+
+
+def init_db(bind: Engine = engine) -> None:
+    """Create the schema on an empty development database.
+
+    The schema belongs to Alembic (``alembic upgrade head``, run by
+    docker/start.sh). An empty database is created from the models in one go
+    and stamped at the head revision, so later migrations apply on top of it;
+    any other database is left to the migrations.
+    """
+    with bind.begin() as conn:
+        if inspect(conn).get_table_names():
+            return
+        Base.metadata.create_all(bind=conn)
+        command.stamp(alembic_config(conn), "head")
+
+
+def stamp_legacy_baseline(bind: Engine = engine) -> bool:
+    """Stamp a database created by create_all() before migrations existed at
+    the baseline revision, so ``alembic upgrade head`` can take it from there.
+
+    Returns True when the database was stamped.
+    """
+    with bind.begin() as conn:
+        tables = set(inspect(conn).get_table_names())
+        if not tables or "alembic_version" in tables:
+            return False
+        command.stamp(alembic_config(conn), "0000_baseline")
+        return True
+
+
+if __name__ == "__main__":
+    # Run before `alembic upgrade head`: python -m app.core.database
+    if stamp_legacy_baseline():
+        print("Stamped a pre-migration database at 0000_baseline")
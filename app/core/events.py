@@ -0,0 +1,144 @@
+# app/core/events.py
+import json
+import logging
+import os
+import socket
+import threading
+from typing import Callable, Iterable, List
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Event shape: {"type": "message", "recipients": ["<user id>", ...], "data": {...}}
+EventHandler = Callable[[dict], None]
+
+
+class EventBus:
+    """Publish/subscribe bus for realtime events (messages, likes, comments, friend requests).
+
+    Handlers receive every event published by any process sharing the bus.
+    This base class is the in-process backend.
+    """
+
+    def __init__(self):
+        self._handlers: List[EventHandler] = []
+
+    def subscribe(self, handler: EventHandler) -> None:
+        self._handlers.append(handler)
+
+    def publish(self, event_type: str, recipients: Iterable, **data) -> None:
+        """Publish an event addressed to the given user ids"""
+        event = {
+            "type": event_type,
+            "recipients": sorted({str(r) for r in recipients}),
+            "data": data,
+        }
+        self._deliver(event)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def _deliver(self, event: dict) -> None:
+        self._dispatch(event)
+
+    def _dispatch(self, event: dict) -> None:
+        for handler in self._handlers:
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Event handler failed for %s event", event.get("type"))
+
+
+class InMemoryEventBus(EventBus):
+    """Single-process bus; events never leave the current worker."""
+
+
+class UnixSocketEventBus(EventBus):
+    """Bus shared by all workers on one host via Unix datagram sockets.
+
+    Each worker binds ``<socket_dir>/<pid>.sock``; publishing delivers locally and
+    sends one datagram to every other socket in the directory. Delivery is
+    best-effort: clients recover anything dropped through their polling fallback.
+    """
+
+    MAX_DATAGRAM = 256 * 1024
+
+    def __init__(self, socket_dir: str):
+        super().__init__()
+        self.socket_dir = socket_dir
+        self._path = None
+        self._recv_sock = None
+        self._send_sock = None
+
+    def start(self) -> None:
+        os.makedirs(self.socket_dir, exist_ok=True)
+        # Resolved here, not in __init__, so each forked/spawned worker gets its own socket
+        self._path = os.path.join(self.socket_dir, f"{os.getpid()}.sock")
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+
+        self._recv_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._recv_sock.bind(self._path)
+        self._recv_sock.settimeout(1.0)  # lets the receive thread notice stop()
+        self._send_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # Never block a request thread on a slow peer; a full queue drops the event
+        self._send_sock.setblocking(False)
+
+        threading.Thread(target=self._receive_loop, name="event-bus", daemon=True).start()
+
+    def stop(self) -> None:
+        for sock in (self._recv_sock, self._send_sock):
+            if sock is not None:
+                sock.close()
+        self._recv_sock = self._send_sock = None
+        if self._path and os.path.exists(self._path):
+            os.unlink(self._path)
+
+    def _deliver(self, event: dict) -> None:
+        self._dispatch(event)
+        if self._send_sock is not None:
+            self._broadcast(json.dumps(event, default=str).encode())
+
+    def _broadcast(self, payload: bytes) -> None:
+        for name in os.listdir(self.socket_dir):
+            peer = os.path.join(self.socket_dir, name)
+            if peer == self._path or not name.endswith(".sock"):
+                continue
+            try:
+                self._send_sock.sendto(payload, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker exited without cleaning up its socket
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except OSError:
+                logger.warning("Dropped event for peer %s", peer)
+
+    def _receive_loop(self) -> None:
+        sock = self._recv_sock
+        while self._recv_sock is sock:
+            try:
+                payload = sock.recv(self.MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            except OSError:
+                return  # socket closed by stop()
+            try:
+                event = json.loads(payload)
+            except ValueError:
+                continue
+            self._dispatch(event)
+
+
+def create_event_bus() -> EventBus:
+    if settings.EVENT_BUS_BACKEND == "unix":
+        return UnixSocketEventBus(settings.EVENT_BUS_SOCKET_DIR)
+    return InMemoryEventBus()
+
+
+event_bus = create_event_bus()
@@ -0,0 +1,212 @@
+# app/core/metrics.py
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Prometheus text exposition without a client library: counters, histograms
+# and callback gauges/counters, rendered by GET /metrics.
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        # label values -> [per-bucket counts, sum, count]
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.setdefault(label_values, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, (bucket_counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    labels = _format_labels(self.labels, values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                inf_labels = _format_labels(self.labels, values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf_labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {count}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose samples are read from ``collect()`` at scrape time"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], collect: Callable[[], Dict[LabelValues, float]]):
+        self.name, self.help, self.labels, self.collect = name, help, labels, collect
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for values, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, values)} {value}")
+        return lines
+
+
+class CallbackCounter(Gauge):
+    """Counter whose running totals are kept elsewhere and read at scrape time.
+
+    Name it ``*_total``; the totals must only ever go up (a restart resets them).
+    """
+
+    type = "counter"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route", "status")
+))
+db_queries = registry.register(Counter(
+    "db_queries_total", "SQL statements executed, by route", ("route",)
+))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements per request, by route", ("route",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 250),
+))
+
+
+def register_pools(engines: Dict[str, Engine]) -> None:
+    """Expose checked-out/overflow/size gauges for the named engines' pools"""
+    def sample(method: str) -> Callable[[], Dict[LabelValues, float]]:
+        def collect():
+            samples = {}
+            for name, engine in engines.items():
+                fn = getattr(engine.pool, method, None)  # NullPool/StaticPool track nothing
+                if fn is not None:
+                    # QueuePool.overflow() is negative until pool_size connections exist
+                    samples[(name,)] = max(0, fn())
+            return samples
+        return collect
+
+    registry.register(Gauge("db_pool_checked_out", "Connections currently checked out", ("engine",), sample("checkedout")))
+    registry.register(Gauge("db_pool_overflow", "Connections open beyond pool_size", ("engine",), sample("overflow")))
+    registry.register(Gauge("db_pool_size", "Configured pool_size", ("engine",), sample("size")))
+
+
+def register_cache(name: str, cache) -> None:
+    """Expose hit/miss counters and the hit ratio of a TTLCache"""
+    def collect(kind: str):
+        def _collect():
+            if kind == "ratio":
+                lookups = cache.hits + cache.misses
+                return {(name,): cache.hits / lookups if lookups else 0.0}
+            return {(name,): getattr(cache, kind)}
+        return _collect
+
+    registry.register(CallbackCounter("cache_hits_total", "Cache hits since start", ("cache",), collect("hits")))
+    registry.register(CallbackCounter("cache_misses_total", "Cache misses since start", ("cache",), collect("misses")))
+    registry.register(Gauge("cache_hit_ratio", "hits / (hits + misses) since start", ("cache",), collect("ratio")))
+
+
+# Per-request DB tallies. The dict is created by the middleware and shared by
+# reference with threadpool workers, which copy the context.
+_request_stats: ContextVar[Optional[dict]] = ContextVar("request_stats", default=None)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["queries"] += 1
+
+
+def current_route() -> Optional[str]:
+    """Route template of the request being served, if any"""
+    stats = _request_stats.get()
+    if stats is None:
+        return None
+    return getattr(stats["scope"].get("route"), "path", stats["scope"]["path"])
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and DB usage per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = {"queries": 0, "scope": scope}
+        token = _request_stats.set(stats)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            # Route template, not the raw path, to keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_duration.observe(elapsed, scope["method"], route, str(status["code"]))
+            db_queries.inc(route, amount=stats["queries"])
+            db_queries_per_request.observe(stats["queries"], route)
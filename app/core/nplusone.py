@@ -0,0 +1,106 @@
+# app/core/nplusone.py
+import logging
+import os
+import re
+import traceback
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+REPORT_HEADER = "X-NPlusOne"
+MAX_HEADER_LENGTH = 1024
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_CORE_DIR = os.path.join(_APP_DIR, "core")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|\$\d+|:\w+|\?")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement with literals and bind parameters collapsed, so per-row variants match"""
+    text = _STRING.sub("?", statement)
+    text = _NUMBER.sub("?", text)
+    text = _PARAM.sub("?", text)
+    text = _PARAM_LIST.sub("(?)", text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def _call_site() -> str:
+    """Innermost app frame outside app/core that led to the query"""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(_APP_DIR) and not frame.filename.startswith(_CORE_DIR):
+            return f"{os.path.relpath(frame.filename, os.path.dirname(_APP_DIR))}:{frame.lineno}"
+    return "unknown"
+
+
+# fingerprint -> {"count", "site"} for the current request, shared by reference
+# with threadpool workers, which copy the context
+_request_queries: ContextVar[Optional[Dict[str, dict]]] = ContextVar("request_queries", default=None)
+
+
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    queries = _request_queries.get()
+    if queries is None:
+        return
+    fp = fingerprint(statement)
+    entry = queries.setdefault(fp, {"count": 0, "site": None})
+    entry["count"] += 1
+    if entry["count"] == 2:
+        # Where the shape first repeats is the loop worth looking at
+        entry["site"] = _call_site()
+
+
+class NPlusOneMiddleware:
+    """Dev-mode ASGI middleware flagging SQL shapes repeated within one request.
+
+    Any fingerprint executed at least ``threshold`` times is logged with the
+    route and the call site of its first repeat; with ``report_header`` the
+    findings are also returned in an ``X-NPlusOne`` response header.
+    """
+
+    def __init__(self, app, threshold: int, report_header: bool = False):
+        self.app = app
+        self.threshold = threshold
+        self.report_header = report_header
+        if not event.contains(Engine, "before_cursor_execute", _record_query):
+            event.listen(Engine, "before_cursor_execute", _record_query)
+
+    def _findings(self, queries: Dict[str, dict]) -> List[tuple]:
+        return sorted(
+            ((entry["count"], fp, entry["site"]) for fp, entry in queries.items() if entry["count"] >= self.threshold),
+            reverse=True,
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        queries: Dict[str, dict] = {}
+        token = _request_queries.set(queries)
+
+        async def send_wrapper(message):
+            # The endpoint has finished by the time headers go out
+            if message["type"] == "http.response.start" and self.report_header:
+                findings = self._findings(queries)
+                if findings:
+                    report = "; ".join(f"{count}x {site} {fp[:120]}" for count, fp, site in findings)
+                    headers = list(message.get("headers", []))
+                    headers.append((REPORT_HEADER.lower().encode(), report[:MAX_HEADER_LENGTH].encode("latin-1", "replace")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_queries.reset(token)
+            route = getattr(scope.get("route"), "path", scope["path"])
+            for count, fp, site in self._findings(queries):
+                logger.warning("Possible N+1 on %s %s: %d x %s (repeated at %s)", scope["method"], route, count, fp, site)
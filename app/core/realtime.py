@@ -0,0 +1,56 @@
+# app/core/realtime.py
+import asyncio
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import WebSocket
+
+from app.core.events import event_bus
+
+
+class ConnectionManager:
+    """Tracks open WebSockets per user and pushes JSON events to them.
+
+    ``publish`` is safe to call from sync route handlers running in the
+    threadpool; delivery is scheduled onto the event loop that owns the sockets.
+    """
+
+    def __init__(self):
+        self._connections: Dict[str, Set[WebSocket]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def connect(self, user_id, websocket: WebSocket) -> None:
+        await websocket.accept()
+        self._loop = asyncio.get_running_loop()
+        self._connections[str(user_id)].add(websocket)
+
+    def disconnect(self, user_id, websocket: WebSocket) -> None:
+        sockets = self._connections.get(str(user_id))
+        if sockets is None:
+            return
+        sockets.discard(websocket)
+        if not sockets:
+            del self._connections[str(user_id)]
+
+    async def send_to_user(self, user_id, payload: dict) -> None:
+        for websocket in list(self._connections.get(str(user_id), ())):
+            try:
+                await websocket.send_json(payload)
+            except Exception:
+                self.disconnect(user_id, websocket)
+
+    def publish(self, user_ids: Iterable, payload: dict) -> None:
+        """Push payload to every open socket of the given users (fire-and-forget)"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        for user_id in {str(u) for u in user_ids}:
+            if user_id in self._connections:
+                asyncio.run_coroutine_threadsafe(self.send_to_user(user_id, payload), self._loop)
+
+    def handle_event(self, event: dict) -> None:
+        """Event bus subscriber: forward an event to its recipients' sockets"""
+        self.publish(event["recipients"], {"type": event["type"], **event["data"]})
+
+
+manager = ConnectionManager()
+event_bus.subscribe(manager.handle_event)
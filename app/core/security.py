@@ -1,22 +1,34 @@
 # app/core/security.py
 from datetime import datetime, timedelta
 from typing import Optional, Union
+import logging
+import uuid
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Cookie
 from fastapi.security import HTTPBearer
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.core.database import get_db
+from app.core.cache import TTLCache
+from app.core.database import get_db, get_async_db
+from app.core.events import event_bus
+from app.core.workers import BoundedPool, PoolSaturated
 from app.db.models import User
 
+logger = logging.getLogger(__name__)
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # JWT token scheme
 security = HTTPBearer(auto_error=False)
 
+# token -> detached User snapshot, so repeat requests within the TTL skip the lookup
+user_cache = TTLCache(maxsize=settings.AUTH_CACHE_MAX_ENTRIES, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -25,6 +37,32 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+# bcrypt releases the GIL, so a small thread pool hashes in parallel without
+# blocking the event loop or the threadpool that serves sync routes
+password_pool = BoundedPool(
+    "password",
+    max_workers=settings.PASSWORD_POOL_WORKERS,
+    max_pending=settings.PASSWORD_POOL_MAX_PENDING,
+)
+
+async def _run_password_job(fn, *args):
+    try:
+        return await password_pool.run(fn, *args)
+    except PoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the password pool, for async routes"""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the password pool, for async routes"""
+    return await _run_password_job(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
@@ -37,24 +75,91 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify JWT token and return user email"""
+def create_user_token(user: User, expires_delta: Optional[timedelta] = None) -> str:
+    """Create an access token identifying the user by primary key and token version"""
+    return create_access_token(
+        data={"sub": str(user.id), "ver": user.token_version or 0},
+        expires_delta=expires_delta,
+    )
+
+def verify_token(token: str) -> Optional[dict]:
+    """Verify JWT token and return its claims"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+        if payload.get("sub") is None:
             return None
-        return email
+        return payload
     except JWTError:
         return None
 
+def invalidate_user_cache(user_id) -> None:
+    """Drop cached snapshots of a user after their row changes"""
+    user_cache.invalidate_tag(str(user_id))
+
+def mark_user_changed(session: Session, user_id) -> None:
+    """Invalidate a user changed outside the ORM (e.g. a bulk UPDATE), here now and elsewhere on commit"""
+    session.info.setdefault("changed_user_ids", set()).add(str(user_id))
+    invalidate_user_cache(user_id)
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            mark_user_changed(session, obj.id)
+
+@event.listens_for(Session, "after_commit")
+def _broadcast_changed_users(session):
+    # Other workers hold their own caches; tell them once the change is visible
+    changed = session.info.pop("changed_user_ids", None)
+    if changed:
+        event_bus.publish("user_changed", [], user_ids=sorted(changed))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("changed_user_ids", None)
+
+def _on_user_changed(event: dict) -> None:
+    if event["type"] == "user_changed":
+        for user_id in event["data"]["user_ids"]:
+            invalidate_user_cache(user_id)
+
+event_bus.subscribe(_on_user_changed)
+
+def _lookup_user(db: Session, claims: dict) -> Optional[User]:
+    subject = claims["sub"]
+    try:
+        user_id = uuid.UUID(subject)
+    except ValueError:
+        # Legacy token carrying the email in "sub"; accepted until they have all expired
+        if not settings.ACCEPT_LEGACY_EMAIL_TOKENS:
+            return None
+        return db.query(User).filter(User.email == subject).first()
+    return db.query(User).filter(User.id == user_id).first()
+
+def _load_user(db: Session, token: str, claims: dict) -> Optional[User]:
+    """Resolve the token's user, from the snapshot cache when possible.
+
+    The snapshot is merged into ``db`` without a SELECT, so routes can still
+    modify and commit the returned user as usual. Tokens issued before the
+    user's last token_version bump (e.g. a password change) are rejected.
+    """
+    snapshot = user_cache.get(token)
+    if snapshot is None:
+        user = _lookup_user(db, claims)
+        if user is None:
+            return None
+        db.expunge(user)
+        snapshot = user
+        user_cache.set(token, snapshot, tag=str(user.id))
+    if "ver" in claims and claims["ver"] != (snapshot.token_version or 0):
+        return None
+    return db.merge(snapshot, load=False)
+
 def get_current_user(
     access_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ) -> User:
     """Get current user from JWT token (required)"""
-    print(f"DEBUG: get_current_user called, access_token: {access_token is not None}")
-    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -62,20 +167,19 @@ def get_current_user(
     )
     
     if not access_token:
-        print("DEBUG: No access token provided")
+        logger.debug("No access token provided")
         raise credentials_exception
         
-    email = verify_token(access_token)
-    if email is None:
-        print("DEBUG: Token verification failed")
+    claims = verify_token(access_token)
+    if claims is None:
+        logger.debug("Token verification failed")
         raise credentials_exception
         
-    user = db.query(User).filter(User.email == email).first()
+    user = _load_user(db, access_token, claims)
     if user is None:
-        print(f"DEBUG: User not found for email: {email}")
+        logger.debug("User not found for subject %s", claims["sub"])
         raise credentials_exception
     
-    print(f"DEBUG: User authenticated: {user.email}")
     return user
 
 def get_current_user_optional(
@@ -86,9 +190,29 @@ def get_current_user_optional(
     if not access_token:
         return None
         
-    email = verify_token(access_token)
-    if email is None:
+    claims = verify_token(access_token)
+    if claims is None:
         return None
         
-    user = db.query(User).filter(User.email == email).first()
-    return user
\ No newline at end of file
+    user = _load_user(db, access_token, claims)
+    return user
+
+async def get_current_user_async(
+    access_token: Optional[str] = Cookie(None),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user for routes on the async session"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    claims = verify_token(access_token) if access_token else None
+    if claims is None:
+        raise credentials_exception
+
+    # Same cache/lookup as the sync path, run on the async connection
+    user = await db.run_sync(_load_user, access_token, claims)
+    if user is None:
+        raise credentials_exception
+    return user
@@ -0,0 +1,163 @@
+# app/core/slow_queries.py
+"""Slow-query log: statements over a threshold are written, with their plan, to a JSONL file.
+
+Aggregate the log with ``python -m app.core.slow_queries [--limit N] [--path FILE]``.
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.core.logging_config import queued
+from app.core.metrics import current_route
+from app.core.nplusone import fingerprint
+
+slow_query_log = logging.getLogger("app.slow_queries.records")
+
+# EXPLAIN only reads; writes are logged without a plan
+EXPLAINABLE = ("select", "with")
+
+
+def _params_shape(parameters, executemany: bool):
+    """Parameter names/positions and types, never the values"""
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "first": _params_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    return [type(value).__name__ for value in (parameters or ())]
+
+
+def _explain(conn, statement: str, parameters) -> Optional[list]:
+    if not statement.lstrip().lower().startswith(EXPLAINABLE):
+        return None
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    # Raw DB-API cursor on the same connection, so it sees the request's own
+    # uncommitted rows and does not re-enter these events. The savepoint keeps a
+    # failed EXPLAIN from aborting the request's transaction (Postgres).
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [str(row[-1]) for row in cursor.fetchall()]
+        except Exception as exc:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return [f"EXPLAIN failed: {exc}"]
+        finally:
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    except Exception as exc:
+        return [f"EXPLAIN skipped: {exc}"]
+    finally:
+        cursor.close()
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._slow_query_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_started", None)
+    if started is None:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < settings.SLOW_QUERY_MS:
+        return
+
+    record = {
+        "ts": datetime.utcnow().isoformat(),
+        "duration_ms": round(duration_ms, 3),
+        "route": current_route(),
+        "fingerprint": fingerprint(statement),
+        "statement": statement,
+        "params": _params_shape(parameters, executemany),
+        "plan": _explain(conn, statement, parameters) if settings.SLOW_QUERY_EXPLAIN and not executemany else None,
+    }
+    slow_query_log.info(json.dumps(record, default=str))
+
+
+def install_slow_query_log() -> None:
+    """Start timing statements on every engine and logging the slow ones"""
+    if slow_query_log.handlers:
+        return
+    directory = os.path.dirname(settings.SLOW_QUERY_LOG)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handler = RotatingFileHandler(
+        settings.SLOW_QUERY_LOG,
+        maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    slow_query_log.addHandler(queued(handler))
+    slow_query_log.setLevel(logging.INFO)
+    slow_query_log.propagate = False
+
+    event.listen(Engine, "before_cursor_execute", _before_execute)
+    event.listen(Engine, "after_cursor_execute", _after_execute)
+
+
+def top_offenders(path: str, limit: int = 20) -> list:
+    """Aggregate the log and its rotated backups by fingerprint, worst total time first"""
+    groups = {}
+    for log_file in sorted(glob.glob(glob.escape(path) + "*")):
+        with open(log_file) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                group = groups.setdefault(record["fingerprint"], {
+                    "fingerprint": record["fingerprint"],
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "routes": set(),
+                    "plan": None,
+                })
+                group["count"] += 1
+                group["total_ms"] += record["duration_ms"]
+                if record["duration_ms"] >= group["max_ms"]:
+                    group["max_ms"] = record["duration_ms"]
+                    group["plan"] = record.get("plan")
+                if record.get("route"):
+                    group["routes"].add(record["route"])
+
+    ranked = sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)
+    return ranked[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Top slow queries by fingerprint")
+    parser.add_argument("--path", default=settings.SLOW_QUERY_LOG)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--plans", action="store_true", help="show the plan of each group's slowest run")
+    args = parser.parse_args()
+
+    offenders = top_offenders(args.path, args.limit)
+    if not offenders:
+        print(f"No slow queries recorded in {args.path}")
+        return
+    for g in offenders:
+        print(
+            f"{g['total_ms']:10.1f} ms total  {g['count']:6d} x  avg {g['total_ms'] / g['count']:8.1f}  "
+            f"max {g['max_ms']:8.1f}  {', '.join(sorted(g['routes'])) or '-'}"
+        )
+        print(f"    {g['fingerprint'][:300]}")
+        if args.plans and g["plan"]:
+            for step in g["plan"]:
+                print(f"      | {step}")
+
+
+if __name__ == "__main__":
+    main()
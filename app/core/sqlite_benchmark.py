@@ -0,0 +1,77 @@
+# app/core/sqlite_benchmark.py
+"""Compare SQLite write throughput with and without the tuning profile.
+
+Run with ``python -m app.core.sqlite_benchmark [--writers N] [--commits N]``.
+Each writer thread commits one message per transaction, like send_message.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import apply_sqlite_pragmas, sqlite_pragmas
+from app.db.models import Base, Message
+
+
+def run(pragmas: dict, writers: int, commits: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},  # same as the app engine
+        pool_size=writers,
+    )
+    apply_sqlite_pragmas(engine, pragmas)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    errors = []
+
+    def writer():
+        sender, recipient = uuid.uuid4(), uuid.uuid4()
+        for i in range(commits):
+            db = Session()
+            try:
+                db.add(Message(sender_id=sender, recipient_id=recipient, content=f"m{i}", created_at=datetime.utcnow()))
+                db.commit()
+            except OperationalError:
+                db.rollback()
+                errors.append(1)
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    committed = writers * commits - len(errors)
+    return {"commits_per_sec": committed / elapsed, "locked_errors": len(errors), "seconds": elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--commits", type=int, default=200, help="commits per writer")
+    args = parser.parse_args()
+
+    for label, pragmas in (("sqlite defaults", {}), ("tuning profile", sqlite_pragmas())):
+        result = run(pragmas, args.writers, args.commits)
+        print(
+            f"{label:16} {result['commits_per_sec']:9.0f} commits/s  "
+            f"{result['locked_errors']:5d} 'database is locked'  ({result['seconds']:.2f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
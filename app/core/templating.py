@@ -0,0 +1,43 @@
+# app/core/templating.py
+from functools import lru_cache
+from typing import Tuple
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+from app.config import settings
+
+TEMPLATE_DIR = "app/templates"
+
+# Compiled templates are kept in memory and their bytecode on disk, so a fresh
+# worker skips parsing too. Templates are only re-checked for edits in DEBUG.
+env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"]),
+    bytecode_cache=FileSystemBytecodeCache(),
+    auto_reload=settings.DEBUG,
+)
+templates = Jinja2Templates(env=env)
+
+_BODY_SLOT = "\x00page-body\x00"
+
+
+def _render_shell(template: str, title: str, options: Tuple[tuple, ...]) -> Tuple[str, str]:
+    html = env.get_template(template).render(title=title, body=Markup(_BODY_SLOT), **dict(options))
+    head, tail = html.split(_BODY_SLOT)
+    return head, tail
+
+
+_cached_shell = lru_cache(maxsize=256)(_render_shell)
+
+
+def page_shell(title: str, body: str, template: str = "base.html", **options) -> str:
+    """Wrap a page body in the shared layout.
+
+    The layout around ``body`` is rendered once per title/options and reused,
+    so a request only pays for concatenating its own body.
+    """
+    shell = _render_shell if settings.DEBUG else _cached_shell
+    head, tail = shell(template, title, tuple(sorted(options.items())))
+    return head + body + tail
@@ -0,0 +1,75 @@
+# app/core/workers.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class PoolSaturated(Exception):
+    """Raised when a BoundedPool already has max_pending jobs queued or running."""
+
+
+class BoundedPool:
+    """Fixed-size thread pool for CPU-heavy calls made from async routes.
+
+    Keeps that work off the event loop and out of the shared threadpool used by
+    sync routes. At most ``max_pending`` jobs may be queued or running; beyond
+    that ``run`` fails fast with PoolSaturated instead of growing the backlog.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        """Jobs queued or running"""
+        return self._pending
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker"""
+        return max(0, self._pending - self.max_workers)
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturated(f"{self.name} pool is saturated")
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run fn(*args) on the pool and await its result"""
+        self._admit()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # Released when the job itself finishes, not when the caller stops
+        # waiting: a cancelled request leaves a running job behind
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "pending": self._pending,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
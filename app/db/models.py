@@ -1,7 +1,8 @@
 # app/db/models.py
 from datetime import datetime, date
 from enum import Enum
-from sqlalchemy import Column, Integer, String, DateTime, Date, Boolean, Text, ForeignKey, Float, UniqueConstraint
+from typing import Optional
+from sqlalchemy import Column, Integer, String, DateTime, Date, Boolean, Text, ForeignKey, Float, UniqueConstraint, Index
 
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -78,6 +79,10 @@ class User(Base):
     email = Column(String(255), unique=True, nullable=False, index=True)
     name = Column(String(100), nullable=False)
     password_hash = Column(String(255), nullable=False)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # bump to revoke issued tokens
+    # Denormalized count of follows rows naming this user, maintained by
+    # TimelineService.follow/unfollow and refreshed by fan_out (see app/services/timeline_service.py)
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Gamification
     xp = Column(Integer, default=0)
@@ -143,27 +148,12 @@ class Habit(Base):
     user = relationship("User", back_populates="habits")
     logs = relationship("HabitLog", back_populates="habit", cascade="all, delete-orphan")
     
-    def update_streak(self, completion_date: date) -> None:
-        """Update streak counters based on completion date"""
-        from datetime import timedelta
+    def update_streak(self, today: Optional[date] = None) -> None:
+        """Recompute streak counters from this habit's completed logs"""
+        from sqlalchemy.orm import object_session
+        from app.services.streak_service import StreakService
         
-        # Get latest log before today
-        latest_log = (
-            session.query(HabitLog)
-            .filter(HabitLog.habit_id == self.id, HabitLog.date < completion_date)
-            .order_by(HabitLog.date.desc())
-            .first()
-        )
-        
-        if latest_log and latest_log.date == completion_date - timedelta(days=1):
-            # Consecutive day, increment streak
-            self.current_streak += 1
-        else:
-            # New streak starts
-            self.current_streak = 1
-            
-        # Update best streak
-        self.best_streak = max(self.best_streak, self.current_streak)
+        StreakService(object_session(self)).recompute(self, today)
 
 class HabitLog(Base):
     __tablename__ = "habit_logs"
@@ -178,6 +168,8 @@ class HabitLog(Base):
     count = Column(Integer, default=1)  # How many times completed that day
     mood = Column(String(20), nullable=True)
     note = Column(Text, nullable=True)
+    # Idempotency-Key of the last request applied to this log, so retries are not re-applied
+    idempotency_key = Column(String(64), nullable=True)
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -187,9 +179,11 @@ class HabitLog(Base):
     habit = relationship("Habit", back_populates="logs")
     user = relationship("User", back_populates="habit_logs")
     
-    # Unique constraint: one log per habit per day
+    # Unique constraint: one log per habit per day; also the upsert's conflict target
     __table_args__ = (
-        {"schema": None},
+        Index("uq_habit_logs_habit_id_date", "habit_id", "date", unique=True),
+        # Covers AnalyticsService's completed-days scan, so it never visits the table
+        Index("ix_habit_logs_habit_id_status_date_count", "habit_id", "status", "date", "count"),
     )
 
 class Challenge(Base):
@@ -405,6 +399,11 @@ class Post(Base):
     is_public = Column(Boolean, default=True)
     challenge_id = Column(GUID(), ForeignKey("challenges.id"), nullable=True, index=True)
 
+    # Denormalized counters, maintained by PostService in the same transaction
+    # as the like/comment row (see app/services/post_service.py)
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -412,6 +411,27 @@ class Post(Base):
     user = relationship("User")
     challenge = relationship("Challenge", backref="shared_posts")
 
+    # Back keyset pagination on (created_at, id) for the feed and per-user listings
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_user_id_created_at", "user_id", "created_at"),
+    )
+
+class TimelineEntry(Base):
+    """Materialized home-timeline row: post_id was fanned out to user_id's feed on write."""
+    __tablename__ = "timeline_entries"
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    user_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
+    post_id = Column(GUID(), ForeignKey("posts.id"), nullable=False, index=True)
+    author_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, nullable=False)  # copy of Post.created_at, the sort key
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "post_id"),
+        Index("ix_timeline_entries_user_id_created_at", "user_id", "created_at", "post_id"),
+    )
+
 class PostLike(Base):
     __tablename__ = "post_likes"
 
@@ -473,4 +493,32 @@ class Message(Base):
 
     __table_args__ = (
         UniqueConstraint("id", name="uq_messages_id"),
-    )
\ No newline at end of file
+        # Range scans of each direction of a conversation, ordered by time
+        Index("ix_messages_sender_recipient_created_at", "sender_id", "recipient_id", "created_at"),
+    )
+
+class Conversation(Base):
+    """One row per DM pair (user_a_id < user_b_id), kept current by send_message."""
+    __tablename__ = "conversations"
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    user_a_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
+    user_b_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
+
+    last_message_at = Column(DateTime, nullable=True)
+    last_message_preview = Column(String(200), nullable=True)
+    last_sender_id = Column(GUID(), ForeignKey("users.id"), nullable=True)
+
+    # Messages addressed to that participant and not yet read
+    unread_a = Column(Integer, nullable=False, default=0, server_default="0")
+    unread_b = Column(Integer, nullable=False, default=0, server_default="0")
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("user_a_id", "user_b_id"),
+        # Inbox listing for either participant, newest first
+        Index("ix_conversations_user_a_last_message_at", "user_a_id", "last_message_at"),
+        Index("ix_conversations_user_b_last_message_at", "user_b_id", "last_message_at"),
+    )
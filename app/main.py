@@ -1,14 +1,26 @@
 # app/main.py
 from fastapi import FastAPI, Request, Depends
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, RedirectResponse
 from sqlalchemy.orm import Session
+import gc
+import logging
 import os
-
-from app.core.database import get_db, init_db
-from app.core.security import get_current_user_optional
+import time
+
+from app.config import settings
+from app.core import metrics
+from app.core.compression import CompressionMiddleware, PrecompressedStaticFiles
+from app.core.logging_config import setup_logging
+from app.core.nplusone import NPlusOneMiddleware
+from app.core.slow_queries import install_slow_query_log
+from app.core.templating import templates
+from app.core.database import (
+    get_db, init_db, engine, async_engine, read_engines, async_read_engines,
+    READ_URLS, PRIMARY_UNTIL_COOKIE, track_request_writes,
+)
+from app.core.events import event_bus
+from app.core.security import get_current_user_optional, password_pool, user_cache
 from app.db.models import User
 
 # Import routers
@@ -27,6 +39,9 @@ from app.routes import (
     friends as friends_routes,
 )
 
+setup_logging()
+logger = logging.getLogger(__name__)
+
 # Create FastAPI app
 app = FastAPI(
     title="HabitVerse",
@@ -44,11 +59,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """Pin a client to the primary database briefly after it commits a write."""
+    writes = track_request_writes()
+    response = await call_next(request)
+    if READ_URLS and writes["committed"]:
+        response.set_cookie(
+            key=PRIMARY_UNTIL_COOKIE,
+            value=str(time.time() + settings.READ_YOUR_WRITES_SECONDS),
+            httponly=True,
+            max_age=settings.READ_YOUR_WRITES_SECONDS,
+            samesite="lax",
+        )
+    return response
+
+# Dev only: warn about SQL repeated per row within a request
+if settings.DEBUG:
+    app.add_middleware(
+        NPlusOneMiddleware,
+        threshold=settings.NPLUSONE_THRESHOLD,
+        report_header=settings.NPLUSONE_REPORT_HEADER,
+    )
+
+if settings.SLOW_QUERY_MS > 0:
+    install_slow_query_log()
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
 
-# Templates
-templates = Jinja2Templates(directory="app/templates")
+# Outermost, so its timings include the other middleware
+app.add_middleware(metrics.MetricsMiddleware)
+
+metrics.register_pools({
+    "primary": engine,
+    "primary_async": async_engine.sync_engine,
+    **{f"replica{i}": e for i, e in enumerate(read_engines)},
+    **{f"replica{i}_async": e.sync_engine for i, e in enumerate(async_read_engines)},
+})
+metrics.register_cache("auth_user", user_cache)
+metrics.registry.register(metrics.Gauge(
+    "password_pool_queue_depth", "Password hashing jobs waiting for a worker", (),
+    lambda: {(): password_pool.queue_depth},
+))
+metrics.registry.register(metrics.CallbackCounter(
+    "password_pool_rejected_total", "Password hashing jobs refused by admission control", (),
+    lambda: {(): password_pool.rejected},
+))
+
+# Static files, with .br/.gz siblings from `python -m app.core.compression` when present
+app.mount(
+    "/static",
+    PrecompressedStaticFiles(
+        directory="app/static",
+        precompressed_directory=settings.STATIC_PRECOMPRESSED_DIR or None,
+    ),
+    name="static",
+)
 
 # Add template globals
 @app.on_event("startup")
@@ -56,12 +127,14 @@ async def setup_template_globals():
     """Add global functions to Jinja2 templates and init DB."""
     # Initialize DB tables (dev convenience)
     init_db()
+
+    # Join the realtime event bus shared by the other workers
+    event_bus.start()
     
-    # Debug: Print registered routes
-    print("DEBUG: Registered routes:")
-    for route in app.routes:
-        if hasattr(route, 'methods') and hasattr(route, 'path'):
-            print(f"  {route.methods} {route.path}")
+    if logger.isEnabledFor(logging.DEBUG):
+        for route in app.routes:
+            if hasattr(route, 'methods') and hasattr(route, 'path'):
+                logger.debug("Route %s %s", ",".join(sorted(route.methods)), route.path)
 
     def format_date(date_obj):
         """Format date for templates"""
@@ -89,6 +162,24 @@ async def setup_template_globals():
     templates.env.globals["format_streak"] = format_streak
     templates.env.globals["calculate_progress_percent"] = calculate_progress_percent
 
+    # Modules, routes and templates live for the whole process; moving them out
+    # of the collector's reach keeps full collections, which request-sized
+    # allocations (e.g. analytics over thousands of log rows) trigger, short
+    gc.collect()
+    gc.freeze()
+
+@app.on_event("shutdown")
+async def stop_event_bus():
+    """Leave the realtime event bus."""
+    event_bus.stop()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    """Close pooled async database connections."""
+    await async_engine.dispose()
+    for read_engine in async_read_engines:
+        await read_engine.dispose()
+
 # Web Routes (HTML pages) - Register FIRST to avoid conflicts
 app.include_router(dashboard.router, prefix="", tags=["Dashboard"])
 app.include_router(auth_routes.router, prefix="/auth", tags=["Auth Pages"])
@@ -129,10 +220,15 @@ async def root(
     return RedirectResponse(url="/auth/login", status_code=302)
 
 # Health check endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     """Health check for deployment monitoring"""
-    return {"status": "healthy", "version": "1.0.0"}
+    return {"status": "healthy", "version": "1.0.0", "password_pool": password_pool.stats()}
 
 # 404 handler
 @app.exception_handler(404)
@@ -4,7 +4,7 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.security import verify_password_async, get_password_hash_async, create_user_token
 from app.db.models import User
 from app.config import settings
 from datetime import timedelta
@@ -72,7 +72,7 @@ async def login_submit(
     """Handle login form submission"""
     user = db.query(User).filter(User.email == email).first()
 
-    if not user or not verify_password(password, user.password_hash):
+    if not user or not await verify_password_async(password, user.password_hash):
         error_html = f"""
         <!doctype html><html><head><meta charset="utf-8"><script src="https://cdn.tailwindcss.com"></script></head>
         <body class="min-h-screen flex items-center justify-center bg-rose-50">
@@ -87,9 +87,7 @@ async def login_submit(
 
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    access_token = create_user_token(user, expires_delta=access_token_expires)
 
     # Set cookie and redirect
     redirect = RedirectResponse(url="/dashboard", status_code=302)
@@ -203,7 +201,7 @@ async def register_submit(
         return HTMLResponse(content=error_html, status_code=400)
 
     # Create user
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash_async(password)
     user = User(
         name=name,
         email=email,
@@ -215,9 +213,7 @@ async def register_submit(
 
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    access_token = create_user_token(user, expires_delta=access_token_expires)
 
     # Set cookie and redirect
     redirect = RedirectResponse(url="/dashboard", status_code=302)
@@ -5,68 +5,12 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.core.templating import page_shell
 from app.db.models import User, Challenge, ChallengeMember
 
 router = APIRouter()
 
-
-def page_shell(title: str, body: str) -> str:
-    return f"""
-    <!doctype html>
-    <html lang=\"en\">
-    <head>
-      <meta charset=\"utf-8\">
-      <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">
-      <title>{title} • HabitVerse</title>
-      <script src=\"https://cdn.tailwindcss.com\"></script>
-      <link href=\"https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap\" rel=\"stylesheet\">
-      <style>
-        html,body{{font-family:'Inter',system-ui,Segoe UI,Roboto,Helvetica,Arial,sans-serif}}
-        @keyframes floaty{{0%{{transform:translateY(0) rotate(0deg)}}50%{{transform:translateY(-12px) rotate(3deg)}}100%{{transform:translateY(0) rotate(0deg)}}}}
-        .aurora{{filter: blur(60px); opacity:.55; animation: floaty 12s ease-in-out infinite}}
-        .glass{{background:rgba(255,255,255,.3); backdrop-filter:blur(18px); border:1px solid rgba(255,255,255,.25); box-shadow:0 8px 30px rgba(31,38,135,.15)}}
-        .btn-primary{{background-image:linear-gradient(135deg,#6366F1,#A855F7); color:#fff}}
-        .btn-primary:hover{{filter:brightness(1.05)}}
-      </style>
-    </head>
-    <body class=\"relative bg-gradient-to-br from-indigo-50 via-purple-50 to-pink-50 text-slate-800\">
-      <!-- Animated aurora background -->
-      <div aria-hidden=\"true\" class=\"pointer-events-none fixed inset-0 -z-10 overflow-hidden\">
-        <div class=\"aurora absolute -top-20 -left-20 w-[380px] h-[380px] bg-gradient-to-br from-indigo-300 to-purple-300 rounded-full\"></div>
-        <div class=\"aurora absolute bottom-0 right-[-60px] w-[420px] h-[420px] bg-gradient-to-br from-pink-300 to-rose-300 rounded-full\" style=\"animation-delay: -6s\"></div>
-      </div>
-      <header class="bg-white/10 backdrop-blur-md border-b border-white/20 text-slate-900">
-        <div class="max-w-5xl mx-auto px-4 py-6 flex items-center justify-between">
-          <a href="/dashboard" class="text-xl font-semibold tracking-tight bg-clip-text text-transparent bg-gradient-to-r from-indigo-600 to-fuchsia-600">HabitVerse</a>
-          <nav class="hidden sm:flex space-x-4 text-sm">
-            <a class="hover:underline/50" href="/dashboard">Dashboard</a>
-            <a class="hover:underline/50" href="/habits">Habits</a>
-            <a class="hover:underline/50" href="/community">Community</a>
-            <a class="hover:underline/50" href="/friends">Friends</a>
-            <a class="hover:underline/50" href="/profile">Profile</a>
-            <a class="hover:underline/50" href="/coach">AI Coach</a>
-          </nav>
-        </div>
-      </header>
-      <main class="max-w-5xl mx-auto px-4 py-6 sm:py-8 pb-24">{body}</main>
-      <!-- Floating chat button -->
-      <a href="/dm" class="fixed bottom-20 right-4 sm:right-8 z-40 inline-flex items-center justify-center w-14 h-14 rounded-full btn-primary shadow-xl">
-        💬
-      </a>
-      <!-- Mobile bottom nav -->
-      <nav class="sm:hidden fixed bottom-0 inset-x-0 bg-white/80 backdrop-blur-md border-t border-slate-200/60 shadow-lg">
-        <div class="max-w-5xl mx-auto grid grid-cols-5">
-          <a href="/dashboard" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">Home</a>
-          <a href="/habits" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">Habits</a>
-          <a href="/community" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">Community</a>
-          <a href="/coach" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">Coach</a>
-          <a href="/profile" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">Profile</a>
-        </div>
-      </nav>
-      <footer class=\"py-8 text-center text-sm text-slate-500\">Grow together • Join a challenge ✨</footer>
-    </body>
-    </html>
-    """
+FOOTER = "Grow together • Join a challenge ✨"
 
 
 @router.get("/community", response_class=HTMLResponse)
@@ -624,4 +568,4 @@ async def community(
 """
     )
 
-    return HTMLResponse(content=page_shell("Community", body))
+    return HTMLResponse(content=page_shell("Community", body, footer=FOOTER, chat_button=True))
@@ -6,81 +6,12 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.core.templating import page_shell
 from app.db.models import User
 
 router = APIRouter()
 
-
-def page_shell(title: str, body: str) -> str:
-    return f"""
-    <!doctype html>
-    <html lang=\"en\">
-    <head>
-      <meta charset=\"utf-8\">
-      <meta name=\"viewport\" content=\"width=device-width, initial-scale=1, viewport-fit=cover\">
-      <title>{title} • HabitVerse</title>
-      <script src=\"https://cdn.tailwindcss.com\"></script>
-      <script src=\"https://cdn.jsdelivr.net/npm/canvas-confetti@1.9.2/dist/confetti.browser.min.js\"></script>
-      <link rel=\"preconnect\" href=\"https://fonts.gstatic.com\" crossorigin>
-      <link href=\"https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap\" rel=\"stylesheet\">
-      <style>
-        html,body{{font-family:'Inter',system-ui,Segoe UI,Roboto,Helvetica,Arial,sans-serif}}
-        @keyframes floaty{{0%{{transform:translateY(0) rotate(0deg)}}50%{{transform:translateY(-12px) rotate(3deg)}}100%{{transform:translateY(0) rotate(0deg)}}}}
-        .aurora{{filter: blur(60px); opacity:.55; animation: floaty 12s ease-in-out infinite}}
-        .glass{{background:rgba(255,255,255,.3); backdrop-filter:blur(18px); border:1px solid rgba(255,255,255,.25); box-shadow:0 8px 30px rgba(31,38,135,.15)}}
-        .btn-primary{{background-image:linear-gradient(135deg,#6366F1,#A855F7); color:#fff}}
-        .btn-primary:hover{{filter:brightness(1.05)}}
-      </style>
-    </head>
-    <body class=\"relative bg-gradient-to-br from-indigo-50 via-purple-50 to-pink-50 text-slate-800\">
-      <!-- Animated aurora background -->
-      <div aria-hidden=\"true\" class=\"pointer-events-none fixed inset-0 -z-10 overflow-hidden\">
-        <div class=\"aurora absolute -top-20 -left-20 w-[380px] h-[380px] bg-gradient-to-br from-indigo-300 to-purple-300 rounded-full\"></div>
-        <div class=\"aurora absolute bottom-0 right-[-60px] w-[420px] h-[420px] bg-gradient-to-br from-pink-300 to-rose-300 rounded-full\" style=\"animation-delay: -6s\"></div>
-      </div>
-      <header class="bg-white/10 backdrop-blur-md border-b border-white/20 text-slate-900">
-        <div class="max-w-5xl mx-auto px-4 py-6 flex items-center justify-between">
-          <a href="/dashboard" class="text-xl font-semibold tracking-tight bg-clip-text text-transparent bg-gradient-to-r from-indigo-600 to-fuchsia-600">HabitVerse</a>
-          <nav class="hidden sm:flex space-x-4 text-sm">
-            <a class="hover:underline/50" href="/dashboard">Dashboard</a>
-            <a class="hover:underline/50" href="/habits">Habits</a>
-            <a class="hover:underline/50" href="/community">Community</a>
-            <a class="hover:underline/50" href="/friends">Friends</a>
-            <a class="hover:underline/50" href="/profile">Profile</a>
-            <a class="hover:underline/50" href="/coach">AI Coach</a>
-          </nav>
-        </div>
-      </header>
-      <main class=\"max-w-5xl mx-auto px-4 py-6 sm:py-8 pb-24\">{body}</main>
-      <!-- Mobile bottom nav -->
-      <nav class="sm:hidden fixed bottom-0 inset-x-0 bg-white/80 backdrop-blur-md border-t border-slate-200/60 shadow-lg">
-        <div class="max-w-5xl mx-auto grid grid-cols-5">
-          <a href="/dashboard" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">
-            <svg xmlns="http://www.w3.org/2000/svg" class="w-5 h-5" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="1.5" d="M3 12l2-2m0 0l7-7 7 7M5 10v10a1 1 0 001 1h3m10-11l2 2m-2-2v10a1 1 0 01-1 1h-3m-6 0h6"/></svg>
-            Home
-          </a>
-          <a href="/habits" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">
-            <svg xmlns="http://www.w3.org/2000/svg" class="w-5 h-5" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="1.5" d="M12 8c-1.657 0-3 1.343-3 3v7m6-10a3 3 0 00-3-3m0 0a3 3 0 013 3m-3-3v0"/></svg>
-            Habits
-          </a>
-          <a href="/community" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">
-            <svg xmlns="http://www.w3.org/2000/svg" class="w-5 h-5" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="1.5" d="M17 20h5V4H2v16h5m10 0V10M7 20v-6"/></svg>
-            Community
-          </a>
-          <a href="/coach" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">
-            <svg xmlns="http://www.w3.org/2000/svg" class="w-5 h-5" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="1.5" d="M12 18l-3.5 2 1-3.9L6 12.5l4-.3L12 8l2 4.2 4 .3-3.5 3.6 1 3.9z"/></svg>
-            Coach
-          </a>
-          <a href="/profile" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">
-            <svg xmlns="http://www.w3.org/2000/svg" class="w-5 h-5" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="1.5" d="M5.121 17.804A7 7 0 0112 15a7 7 0 016.879 2.804M15 10a3 3 0 11-6 0 3 3 0 016 0z"/></svg>
-            Profile
-          </a>
-        </div>
-      </nav>
-      <footer class=\"py-8 text-center text-sm text-slate-500\">Made with intent • Keep the streak alive ✨</footer>
-    </body>
-    </html>
-    """
+FOOTER = "Made with intent • Keep the streak alive ✨"
 
 
 def _level_and_progress(xp: int) -> tuple[int, int, int, float]:
@@ -364,19 +295,11 @@ async def dashboard(
           const container = document.getElementById('today-progress'); if (!container) return;
           container.innerHTML = '';
           try {{
-            const res = await fetch('/api/habits'); if (!res.ok) throw new Error('habits');
+            // One request: every active habit with today's count and target
+            const res = await fetch('/api/habits/status'); if (!res.ok) throw new Error('habits');
             const habits = await res.json();
-            const todayISO = new Date().toISOString().slice(0,10);
             for (const h of habits) {{
-              let count = 0; let target = h.target_count || 1;
-              try {{
-                const lr = await fetch(`/api/habits/${{h.id}}/logs?days=1`);
-                if (lr.ok) {{
-                  const logs = await lr.json();
-                  const today = logs.find(x => x.date && x.date.startsWith(todayISO));
-                  if (today && today.status === 'completed') count = today.count || 1;
-                }}
-              }} catch(e) {{}}
+              const count = h.count; const target = h.target || 1;
               const pct = Math.min(100, Math.round((count/Math.max(1,target))*100));
               const card = document.createElement('div');
               card.className = 'p-3 rounded-xl border border-white/40 bg-white/50 flex items-center gap-3';
@@ -447,4 +370,4 @@ async def dashboard(
       </script>
     """
 
-    return HTMLResponse(content=page_shell("Dashboard", body))
+    return HTMLResponse(content=page_shell("Dashboard", body, footer=FOOTER, confetti=True))
@@ -5,33 +5,12 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.core.templating import page_shell
 from app.db.models import User
 
 router = APIRouter()
 
 
-def page_shell(title: str, body: str) -> str:
-    return f"""
-    <!doctype html>
-    <html lang=\"en\">
-    <head>
-      <meta charset=\"utf-8\">
-      <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">
-      <title>{title} • HabitVerse</title>
-      <script src=\"https://cdn.tailwindcss.com\"></script>
-      <style>
-        html,body{{font-family:ui-sans-serif,system-ui,Segoe UI,Roboto,Helvetica,Arial}}
-        .glass{{background:rgba(255,255,255,.6);backdrop-filter:blur(12px);border:1px solid rgba(15,23,42,.06)}}
-        .btn-primary{{background-image:linear-gradient(135deg,#6366F1,#A855F7); color:#fff}}
-      </style>
-    </head>
-    <body class=\"bg-gradient-to-br from-indigo-50 via-purple-50 to-pink-50 text-slate-800 min-h-screen\">\n
-      <header class=\"glass sticky top-0 z-30\">\n        <div class=\"max-w-5xl mx-auto px-4 py-4 flex items-center justify-between\">\n          <a href=\"/dashboard\" class=\"font-semibold text-indigo-600\">HabitVerse</a>\n          <div class=\"text-sm text-slate-600\">Direct Messages</div>\n        </div>\n      </header>\n
-      <main class=\"max-w-5xl mx-auto px-4 py-6 sm:py-8 pb-24\">{body}</main>\n
-      <!-- Mobile bottom nav -->\n      <nav class=\"sm:hidden fixed bottom-0 inset-x-0 bg-white/80 backdrop-blur border-t border-slate-200/60 shadow-lg\">\n        <div class=\"max-w-5xl mx-auto grid grid-cols-5\">\n          <a href=\"/dashboard\" class=\"flex flex-col items-center justify-center py-3 text-[11px] text-slate-700\">Home</a>\n          <a href=\"/habits\" class=\"flex flex-col items-center justify-center py-3 text-[11px] text-slate-700\">Habits</a>\n          <a href=\"/community\" class=\"flex flex-col items-center justify-center py-3 text-[11px] text-slate-700\">Community</a>\n          <a href=\"/coach\" class=\"flex flex-col items-center justify-center py-3 text-[11px] text-slate-700\">Coach</a>\n          <a href=\"/profile\" class=\"flex flex-col items-center justify-center py-3 text-[11px] text-slate-700\">Profile</a>\n        </div>\n      </nav>\n    </body>\n    </html>
-    """
-
-
 @router.get("/dm", response_class=HTMLResponse)
 async def dm_home(
     request: Request,
@@ -39,9 +18,10 @@ async def dm_home(
     db: Session = Depends(get_db),
 ):
     body = """
-    <div class=\"grid gap-4 md:grid-cols-3\">\n      <!-- Sidebar: Friends + Search -->\n      <aside class=\"md:col-span-1 space-y-3\">\n        <div class=\"flex items-center justify-between\">\n          <h2 class=\"text-lg font-semibold\">Chats</h2>\n          <a href=\"/friends\" class=\"text-sm text-indigo-600 hover:text-indigo-700\">Find friends</a>\n        </div>\n        <div>\n          <input id=\"dm-search\" class=\"w-full border rounded-lg px-3 py-2\" placeholder=\"Search users...\" />\n        </div>\n        <div id=\"dm-search-results\" class=\"rounded-2xl glass divide-y hidden\"></div>\n        <div class=\"text-sm text-slate-500\">Your friends</div>\n        <div id=\"dm-friends\" class=\"rounded-2xl glass divide-y\">\n          <div class=\"p-3 text-sm text-slate-500\">Loading friends...</div>\n        </div>\n      </aside>\n
+    <div class=\"grid gap-4 md:grid-cols-3\">\n      <!-- Sidebar: Friends + Search -->\n      <aside class=\"md:col-span-1 space-y-3\">\n        <div class=\"flex items-center justify-between\">\n          <h2 class=\"text-lg font-semibold\">Chats</h2>\n          <a href=\"/friends\" class=\"text-sm text-indigo-600 hover:text-indigo-700\">Find friends</a>\n        </div>\n        <div>\n          <input id=\"dm-search\" class=\"w-full border rounded-lg px-3 py-2\" placeholder=\"Search users...\" />\n        </div>\n        <div id=\"dm-search-results\" class=\"rounded-2xl glass divide-y hidden\"></div>\n        <div id=\"dm-conversations\" class=\"rounded-2xl glass divide-y hidden\"></div>\n        <div class=\"text-sm text-slate-500\">Your friends</div>\n        <div id=\"dm-friends\" class=\"rounded-2xl glass divide-y\">\n          <div class=\"p-3 text-sm text-slate-500\">Loading friends...</div>\n        </div>\n      </aside>\n
       <!-- Messages area -->\n      <section class=\"md:col-span-2 rounded-2xl glass p-4 flex flex-col h-[60vh]\">\n        <div id=\"dm-header\" class=\"pb-3 border-b mb-3 hidden\"></div>\n        <div id=\"dm-messages\" class=\"flex-1 overflow-auto space-y-2\">\n          <div class=\"text-center text-sm text-slate-500 my-4\">Start a conversation. Group chats and 1:1 will be supported.</div>\n        </div>\n        <div class=\"mt-3 flex items-center gap-2\">\n          <input id=\"dm-input\" class=\"flex-1 border rounded-lg px-3 py-2\" placeholder=\"Type a message... (coming soon)\" disabled />\n          <button id=\"dm-send\" class=\"px-4 py-2 rounded-lg btn-primary opacity-60 cursor-not-allowed\" disabled>Send</button>\n        </div>\n      </section>\n    </div>
     <script>
+      const ME_ID = '__ME_ID__';
       const qs = (k)=> new URLSearchParams(location.search).get(k);
 
       async function loadFriends(){
@@ -65,6 +45,27 @@ async def dm_home(
         }
       }
 
+      async function loadConversations(){
+        const wrap = document.getElementById('dm-conversations');
+        try{
+          const res = await fetch('/api/messages/conversations', { credentials:'include' });
+          if(!res.ok) return;
+          const convs = await res.json();
+          if(!convs.length){ wrap.classList.add('hidden'); return; }
+          wrap.classList.remove('hidden');
+          wrap.innerHTML = convs.map(c=>`
+            <a class="flex items-center gap-3 p-3 hover:bg-white/70" href="/dm?to=${c.user.id}">
+              ${c.user.avatar_url ? `<img src="${c.user.avatar_url}" class="w-8 h-8 rounded-full object-cover"/>` : `<div class=\"w-8 h-8 rounded-full bg-indigo-200 flex items-center justify-center text-xs text-indigo-800\">${(c.user.name||'?').slice(0,1).toUpperCase()}</div>`}
+              <div class="min-w-0 flex-1">
+                <div class="text-sm font-medium">${c.user.name}</div>
+                <div class="text-xs text-slate-500 truncate">${(c.last_message_preview||'').replace(/</g,'&lt;')}</div>
+              </div>
+              ${c.unread_count ? `<span class="text-[10px] px-2 py-0.5 rounded-full bg-indigo-600 text-white">${c.unread_count}</span>` : ''}
+            </a>
+          `).join('');
+        }catch(e){ /* sidebar falls back to the friends list */ }
+      }
+
       // Live search users
       let searchTimer;
       document.getElementById('dm-search').addEventListener('input',(e)=>{
@@ -140,23 +141,72 @@ async def dm_home(
         wrap.scrollTop = wrap.scrollHeight;
       }
 
-      async function loadMessagesLoop(otherId){
+      // Newest first, as returned by /api/messages/with/{id}
+      let chatItems = [];
+      let activeChatId = null;
+      let pollTimer = null;
+
+      function mergeMessages(list){
+        const seen = new Set(chatItems.map(m=>m.id));
+        const fresh = list.filter(m=>!seen.has(m.id));
+        if(!fresh.length) return;
+        chatItems = fresh.concat(chatItems).sort((a,b)=> b.created_at.localeCompare(a.created_at));
+        renderMessages(chatItems, ME_ID);
+        if(activeChatId && fresh.some(m=> m.sender_id === activeChatId)) markRead(activeChatId);
+      }
+
+      async function markRead(otherId){
+        try{
+          await fetch(`/api/messages/with/${otherId}/read`, { method:'POST', credentials:'include' });
+        }catch(e){ /* ignore */ }
+      }
+
+      async function loadMessages(otherId){
         try{
           const res = await fetch(`/api/messages/with/${otherId}`, { credentials:'include' });
           if(!res.ok) return;
-          const items = await res.json();
-          // current user id is not exposed here; infer from sender/recipient by finding a friend anchor selected is not ideal.
-          // Simpler approach: we request /api/users/${otherId} above; use a crude way to infer: pick any message and if sender != otherId -> that's me.
-          let me = null;
-          if(items.length){
-            const any = items[0];
-            me = (any.sender_id === otherId) ? any.recipient_id : any.sender_id;
-          }
-          renderMessages(items, me);
+          chatItems = await res.json();
+          renderMessages(chatItems, ME_ID);
+          if(chatItems.some(m=> m.sender_id === otherId && !m.read_at)) markRead(otherId);
+        }catch(e){ /* ignore */ }
+      }
+
+      // Fallback when the socket is down: only fetch messages newer than the last one we have
+      async function pollNewMessages(otherId){
+        if(!chatItems.length) return loadMessages(otherId);
+        try{
+          const res = await fetch(`/api/messages/with/${otherId}?since_id=${encodeURIComponent(chatItems[0].id)}`, { credentials:'include' });
+          if(!res.ok) return;
+          mergeMessages(await res.json());
         }catch(e){ /* ignore */ }
       }
 
+      function startPolling(otherId){
+        if(!pollTimer) pollTimer = setInterval(()=> pollNewMessages(otherId), 4000);
+      }
+
+      function stopPolling(){
+        if(pollTimer){ clearInterval(pollTimer); pollTimer = null; }
+      }
+
+      function connectRealtime(otherId){
+        if(!('WebSocket' in window)){ startPolling(otherId); return; }
+        const proto = location.protocol === 'https:' ? 'wss' : 'ws';
+        const ws = new WebSocket(`${proto}://${location.host}/api/messages/ws`);
+        ws.onopen = ()=>{ stopPolling(); pollNewMessages(otherId); };
+        ws.onmessage = (ev)=>{
+          try{
+            const data = JSON.parse(ev.data);
+            if(data.type !== 'message') return;
+            const m = data.message;
+            if(m.sender_id === otherId || m.recipient_id === otherId) mergeMessages([m]);
+          }catch(e){ /* ignore */ }
+        };
+        ws.onclose = ()=>{ startPolling(otherId); setTimeout(()=> connectRealtime(otherId), 5000); };
+      }
+
       function enableMessaging(user){
+        activeChatId = user.id;
         const input = document.getElementById('dm-input');
         const btn = document.getElementById('dm-send');
         input.disabled = false;
@@ -174,8 +224,7 @@ async def dm_home(
             });
             if(res.ok){
               input.value = '';
-              // refresh messages quickly
-              loadMessagesLoop(user.id);
+              mergeMessages([await res.json()]);
             }
           } finally {
             btn.disabled = false;
@@ -185,13 +234,14 @@ async def dm_home(
         btn.addEventListener('click', send);
         input.addEventListener('keydown', (e)=>{ if(e.key==='Enter' && !e.shiftKey){ e.preventDefault(); send(); } });
 
-        // initial load and polling
-        loadMessagesLoop(user.id);
-        setInterval(()=> loadMessagesLoop(user.id), 4000);
+        // initial load, then live updates over WebSocket (polling only while it is down)
+        loadMessages(user.id).then(()=> connectRealtime(user.id));
       }
 
+      loadConversations();
       loadFriends();
       loadTarget();
     </script>
     """
-    return HTMLResponse(content=page_shell("Direct Messages", body))
+    body = body.replace("__ME_ID__", str(current_user.id))
+    return HTMLResponse(content=page_shell("Direct Messages", body, template="dm.html"))
@@ -3,6 +3,7 @@ from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.core.templating import page_shell
 from app.db.models import User
 
 router = APIRouter()
@@ -13,17 +14,7 @@ def friends_page(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return HTMLResponse(
-        content=f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Friends - HabitVerse</title>
-            <script src="https://cdn.tailwindcss.com"></script>
-        </head>
-        <body class="bg-slate-50 min-h-screen">
+    body = f"""
             <nav class="bg-white shadow-sm border-b px-6 py-4">
                 <div class="flex items-center justify-between max-w-6xl mx-auto">
                     <div class="flex items-center space-x-8">
@@ -326,7 +317,5 @@ def friends_page(
                 loadFriendRequests();
                 loadFriends();
             </script>
-        </body>
-        </html>
-        """
-    )
+    """
+    return HTMLResponse(content=page_shell("Friends", body, template="friends.html"))
@@ -1,56 +1,22 @@
 from fastapi import APIRouter, Request, Depends, Form, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_current_user, get_password_hash, verify_password
+from app.core.database import get_db, get_read_db
+from app.core.security import get_current_user, get_password_hash, verify_password, create_user_token
+from app.core.templating import page_shell
 from app.db.models import User
+from app.config import settings
+from datetime import timedelta
 
 router = APIRouter()
 
 @router.get("/profile", response_class=HTMLResponse)
 def profile_page(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    return HTMLResponse(
-        content=f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Profile - HabitVerse</title>
-            <script src="https://cdn.tailwindcss.com"></script>
-            <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">
-            <style>
-                html,body{{font-family:'Inter',system-ui,Segoe UI,Roboto,Helvetica,Arial,sans-serif}}
-                .glass{{background:rgba(255,255,255,.3); backdrop-filter:blur(18px); border:1px solid rgba(255,255,255,.25); box-shadow:0 8px 30px rgba(31,38,135,.15)}}
-                .btn-primary{{background-image:linear-gradient(135deg,#6366F1,#A855F7); color:#fff}}
-                .btn-primary:hover{{filter:brightness(1.05)}}
-            </style>
-        </head>
-        <body class="relative bg-gradient-to-br from-indigo-50 via-purple-50 to-pink-50 text-slate-800 min-h-screen">
-            <!-- Animated aurora background -->
-            <div aria-hidden="true" class="pointer-events-none fixed inset-0 -z-10 overflow-hidden">
-                <div class="aurora absolute -top-20 -left-20 w-[380px] h-[380px] bg-gradient-to-br from-indigo-300 to-purple-300 rounded-full"></div>
-                <div class="aurora absolute bottom-0 right-[-60px] w-[420px] h-[420px] bg-gradient-to-br from-pink-300 to-rose-300 rounded-full" style="animation-delay: -6s"></div>
-            </div>
-            <header class="bg-white/10 backdrop-blur-md border-b border-white/20 text-slate-900">
-                <div class="max-w-5xl mx-auto px-4 py-6 flex items-center justify-between">
-                    <a href="/dashboard" class="text-xl font-semibold tracking-tight bg-clip-text text-transparent bg-gradient-to-r from-indigo-600 to-fuchsia-600">HabitVerse</a>
-                    <nav class="hidden sm:flex space-x-4 text-sm">
-                        <a class="hover:underline/50" href="/dashboard">Dashboard</a>
-                        <a class="hover:underline/50" href="/habits">Habits</a>
-                        <a class="hover:underline/50" href="/community">Community</a>
-                        <a class="hover:underline/50" href="/friends">Friends</a>
-                        <a class="hover:underline/50" href="/profile">Profile</a>
-                        <a class="hover:underline/50" href="/coach">AI Coach</a>
-                    </nav>
-                </div>
-            </header>
-
-            <main class="max-w-5xl mx-auto px-4 py-6 sm:py-8 pb-24">
+    body = f"""
                 <div class="bg-white rounded-xl shadow-sm p-6">
                     <div class="flex items-center space-x-6 mb-8">
                         <div id="avatar-box" class="w-20 h-20 rounded-full bg-gradient-to-br from-blue-500 to-purple-600 flex items-center justify-center overflow-hidden">
@@ -133,22 +99,7 @@ def profile_page(
                         <div class="text-slate-600 text-sm">Memuat postingan…</div>
                     </div>
                 </div>
-            </main>
-
-            <!-- Floating chat button -->
-            <a href="/dm" class="fixed bottom-20 right-4 sm:right-8 z-40 inline-flex items-center justify-center w-14 h-14 rounded-full btn-primary shadow-xl">💬</a>
-            <!-- Mobile bottom nav -->
-            <nav class="sm:hidden fixed bottom-0 inset-x-0 bg-white/80 backdrop-blur-md border-t border-slate-200/60 shadow-lg">
-                <div class="max-w-5xl mx-auto grid grid-cols-5">
-                    <a href="/dashboard" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">Home</a>
-                    <a href="/habits" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">Habits</a>
-                    <a href="/community" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">Community</a>
-                    <a href="/coach" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">Coach</a>
-                    <a href="/profile" class="flex flex-col items-center justify-center py-3 text-[11px] text-slate-700 hover:bg-white/60">Profile</a>
-                </div>
-            </nav>
-            """
-            + """
+    """ + """
             <script>
               (function(){
                 const fileInput = document.getElementById('avatar-file');
@@ -276,12 +227,8 @@ def profile_page(
                 loadMyPosts();
               })();
             </script>
-            """
-            + f"""
-        </body>
-        </html>
-        """
-    )
+    """
+    return HTMLResponse(content=page_shell("Profile", body, chat_button=True))
 
 @router.post("/profile/update")
 def update_profile(
@@ -326,8 +273,20 @@ def change_password(
     if new_password != confirm_password:
         raise HTTPException(status_code=400, detail="New password and confirmation do not match")
 
-    # Update password hash
+    # Update password hash and revoke every token issued before the change
     current_user.password_hash = get_password_hash(new_password)
-    current_user.updated_at = current_user.updated_at  # trigger update
+    current_user.token_version = (current_user.token_version or 0) + 1
     db.commit()
-    return RedirectResponse(url="/profile", status_code=302)
+
+    # Re-issue this session's cookie so only other sessions are signed out
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_user_token(current_user, expires_delta=access_token_expires)
+    redirect = RedirectResponse(url="/profile", status_code=302)
+    redirect.set_cookie(
+        key="access_token",
+        value=access_token,
+        httponly=True,
+        max_age=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        samesite="lax",
+    )
+    return redirect
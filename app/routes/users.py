@@ -2,46 +2,22 @@ from fastapi import APIRouter, Request, Depends
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.core.security import get_current_user
+from app.core.templating import page_shell
 from app.db.models import User
 
 router = APIRouter()
 
 @router.get("/u/{user_id}", response_class=HTMLResponse)
-def public_profile_page(user_id: str, request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Build HTML without f-string to avoid JS template literal conflicts
+def public_profile_page(user_id: str, request: Request, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
+    # Build the body without f-string to avoid JS template literal conflicts
     head = """
-<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="utf-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1" />
-  <title>Profile • HabitVerse</title>
-  <script src="https://cdn.tailwindcss.com"></script>
-  <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">
-</head>
-<body class="bg-gradient-to-br from-indigo-50 via-purple-50 to-pink-50 text-slate-800">
-  <header class="bg-white/10 backdrop-blur-md border-b border-white/20">
-    <div class="max-w-5xl mx-auto px-4 py-6 flex items-center justify-between">
-      <a href="/dashboard" class="text-xl font-semibold bg-clip-text text-transparent bg-gradient-to-r from-indigo-600 to-fuchsia-600">HabitVerse</a>
-      <nav class="hidden sm:flex space-x-4 text-sm">
-        <a class="hover:underline/50" href="/dashboard">Dashboard</a>
-        <a class="hover:underline/50" href="/habits">Habits</a>
-        <a class="hover:underline/50" href="/community">Community</a>
-        <a class="hover:underline/50" href="/friends">Friends</a>
-        <a class="hover:underline/50" href="/profile">Profile</a>
-        <a class="hover:underline/50" href="/coach">AI Coach</a>
-      </nav>
-    </div>
-  </header>
-  <main class="max-w-5xl mx-auto px-4 py-6 sm:py-8 pb-24">
     <div id="user-head" class="bg-white rounded-xl shadow-sm p-6"></div>
     <div class="bg-white rounded-xl shadow-sm p-6 mt-6">
       <h2 class="text-xl font-semibold mb-4">Posts</h2>
       <div id="user-posts" class="space-y-3"><div class="text-slate-600 text-sm">Memuat…</div></div>
     </div>
-  </main>
   <script>
 """
     uid_line = "    const uid = " + repr(user_id) + ";\n"
@@ -141,7 +117,5 @@ def public_profile_page(user_id: str, request: Request, db: Session = Depends(ge
     }
     loadUser(); loadPosts();
   </script>
-</body>
-</html>
 """
-    return HTMLResponse(content=head + uid_line + tail)
+    return HTMLResponse(content=page_shell("Profile", head + uid_line + tail))
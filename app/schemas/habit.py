@@ -1,7 +1,8 @@
 # app/schemas/habit.py
+import datetime as dt
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime, date
-from typing import Optional
+from typing import Dict, List, Optional
 from app.db.models import HabitCategory, HabitFrequency, LogStatus, Mood
 from uuid import UUID
 
@@ -47,7 +48,8 @@ class HabitLogBase(BaseModel):
     note: Optional[str] = None
 
 class HabitLogCreate(HabitLogBase):
-    date: Optional[date] = None
+    # dt.date: a bare ``date`` here would resolve to this field's own default
+    date: Optional[dt.date] = None
 
 class HabitLogUpdate(BaseModel):
     status: Optional[LogStatus] = None
@@ -65,6 +67,12 @@ class HabitLogResponse(HabitLogBase):
     # Pydantic v2 ORM mode
     model_config = ConfigDict(from_attributes=True)
 
+class HabitStatusResponse(HabitResponse):
+    """Habit with its logs for a date range; count is completed units, target is target_count per day"""
+    logs: List[HabitLogResponse]
+    count: int
+    target: int
+
 class HabitAnalytics(BaseModel):
     total_days: int
     completed_days: int
@@ -72,3 +80,13 @@ class HabitAnalytics(BaseModel):
     current_streak: int
     best_streak: int
     total_completions: int
+
+class HabitAnalyticsSummary(HabitAnalytics):
+    """Window analytics for one of the user's habits; rates are percentages"""
+    habit_id: UUID
+    name: str
+    completed_units: int
+    rolling_7_rate: float
+    rolling_30_rate: float
+    weekday_completions: List[int]  # Monday first
+    streak_histogram: Dict[str, int]  # runs of consecutive completed days by length
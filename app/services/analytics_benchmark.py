@@ -0,0 +1,103 @@
+# app/services/analytics_benchmark.py
+"""Time AnalyticsService.user_analytics with and without the covering index.
+
+Run with ``python -m app.services.analytics_benchmark [--habits N] [--days N] [--runs N]``.
+Each habit gets a log on about 60% of the days, 80% of them completed, on a
+throwaway SQLite database with the app's tuning profile. Like the app after
+startup, the heap is frozen (gc.freeze) before timing.
+"""
+import argparse
+import gc
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from app.core.database import apply_sqlite_pragmas, sqlite_pragmas
+from app.db.models import Base, Habit, HabitLog, LogStatus, User
+from app.services.analytics_service import AnalyticsService
+
+COVERING_INDEX = "ix_habit_logs_habit_id_status_date_count"
+
+
+def seed(engine, habits: int, days: int, today: date) -> uuid.UUID:
+    rng = random.Random(1)
+    user_id = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": user_id, "email": "bench@example.com", "name": "Bench", "password_hash": "x"}])
+        habit_ids = [uuid.uuid4() for _ in range(habits)]
+        conn.execute(insert(Habit), [
+            {"id": habit_id, "user_id": user_id, "name": f"habit {i}", "created_at": datetime(2020, 1, 1, 0, 0, i % 60)}
+            for i, habit_id in enumerate(habit_ids)
+        ])
+        conn.execute(insert(HabitLog), [
+            {
+                "id": uuid.uuid4(),
+                "habit_id": habit_id,
+                "user_id": user_id,
+                "date": today - timedelta(days=offset),
+                "status": LogStatus.COMPLETED if rng.random() < 0.8 else LogStatus.SKIPPED,
+                "count": rng.randint(1, 3),
+            }
+            for habit_id in habit_ids
+            # A month of older history the range has to skip
+            for offset in range(days + 30)
+            if rng.random() < 0.6
+        ])
+    return user_id
+
+
+def run(engine, user_id, days: int, today: date, runs: int) -> dict:
+    with Session(engine) as db:
+        service = AnalyticsService(db)
+        service.user_analytics(user_id, days, today)  # warm up caches and compiled statements
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            service.user_analytics(user_id, days, today)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.mean(timings),
+        "p95_ms": timings[int(len(timings) * 0.95) - 1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--runs", type=int, default=100)
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    apply_sqlite_pragmas(engine, sqlite_pragmas())
+    Base.metadata.create_all(bind=engine)
+    today = date.today()
+    user_id = seed(engine, args.habits, args.days, today)
+    gc.collect()
+    gc.freeze()
+
+    with_index = run(engine, user_id, args.days, today, args.runs)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX {COVERING_INDEX}"))
+    without_index = run(engine, user_id, args.days, today, args.runs)
+    engine.dispose()
+
+    print(f"{args.habits} habits x {args.days} days, {args.runs} runs")
+    for label, result in (("without covering index", without_index), ("with covering index", with_index)):
+        print(
+            f"{label:24} median {result['median_ms']:6.2f} ms  mean {result['mean_ms']:6.2f} ms  "
+            f"p95 {result['p95_ms']:6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
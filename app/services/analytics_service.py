@@ -0,0 +1,126 @@
+# app/services/analytics_service.py
+"""Habit analytics for many habits at once, vectorized with NumPy.
+
+Logs are read as plain columns rather than ORM objects and laid out as a
+habits x days completion matrix; each statistic is an array operation on it.
+"""
+from datetime import date, timedelta
+from typing import List, Optional, Sequence
+import uuid
+import numpy as np
+from sqlalchemy import String, func, select, type_coerce
+from sqlalchemy.orm import Session
+from app.db.models import Habit, HabitLog, LogStatus
+
+ROLLING_WINDOWS = (7, 30)
+# (shortest run in the bucket, label) for the streak-length histogram
+STREAK_BUCKETS = ((1, "1"), (2, "2"), (3, "3-6"), (7, "7-13"), (14, "14-29"), (30, "30-59"), (60, "60+"))
+_STREAK_EDGES = np.array([low for low, _ in STREAK_BUCKETS])
+
+
+def completion_matrix(habit_index: np.ndarray, day_index: np.ndarray, n_habits: int, n_days: int) -> np.ndarray:
+    """Boolean habits x days matrix, True at each (habit, day) of a completed log"""
+    done = np.zeros((n_habits, n_days), dtype=bool)
+    done[habit_index, day_index] = True
+    return done
+
+
+def rolling_rates(done: np.ndarray, window: int) -> np.ndarray:
+    """Share of completed days over the trailing ``window`` days, per habit"""
+    # Ranges shorter than the window average over the days they have
+    return done[:, -window:].mean(axis=1)
+
+
+def weekday_counts(done: np.ndarray, first_day: date) -> np.ndarray:
+    """Completed days per weekday (Monday first), habits x 7"""
+    weekdays = (first_day.weekday() + np.arange(done.shape[1])) % 7
+    return done.astype(np.int64) @ np.eye(7, dtype=np.int64)[weekdays]
+
+
+def streak_histograms(done: np.ndarray) -> np.ndarray:
+    """Runs of consecutive completed days per STREAK_BUCKETS bucket, habits x buckets"""
+    n_habits, n_days = done.shape
+    padded = np.zeros((n_habits, n_days + 2), dtype=np.int8)
+    padded[:, 1:-1] = done
+    edges = np.diff(padded, axis=1)
+    # Row-major order pairs each run's start with its end
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    buckets = np.searchsorted(_STREAK_EDGES, ends - starts, side="right") - 1
+    counts = np.bincount(rows * len(STREAK_BUCKETS) + buckets, minlength=n_habits * len(STREAK_BUCKETS))
+    return counts.reshape(n_habits, len(STREAK_BUCKETS))
+
+
+class AnalyticsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def user_analytics(self, user_id, days: int = 365, today: Optional[date] = None,
+                       habit_ids: Optional[Sequence] = None) -> List[dict]:
+        """Per-habit analytics over the ``days`` days ending ``today``.
+
+        Covers the user's active habits, or exactly ``habit_ids`` when given.
+        """
+        end = today or date.today()
+        start = end - timedelta(days=days - 1)
+
+        scope = [Habit.user_id == user_id]
+        if habit_ids is None:
+            scope.append(Habit.is_active == True)
+        else:
+            scope.append(Habit.id.in_(habit_ids))
+
+        # Ids as their stored text: skips building a UUID object for every log row
+        habits = self.db.execute(
+            select(
+                type_coerce(Habit.id, String), Habit.name,
+                Habit.current_streak, Habit.best_streak, Habit.total_completions,
+            )
+            .where(*scope)
+            .order_by(Habit.created_at)
+        ).all()
+        if not habits:
+            return []
+        index = {row[0]: i for i, row in enumerate(habits)}
+
+        # Only completed days count; read through the Core connection, which
+        # skips the ORM result machinery
+        logs = self.db.connection().execute(
+            select(
+                type_coerce(HabitLog.habit_id, String), type_coerce(HabitLog.date, String),
+                func.coalesce(HabitLog.count, 1),
+            )
+            .join(Habit, Habit.id == HabitLog.habit_id)
+            .where(*scope, HabitLog.date >= start, HabitLog.date <= end, HabitLog.status == LogStatus.COMPLETED)
+        ).all()
+
+        n_habits = len(habits)
+        habit_index = np.fromiter((index[row[0]] for row in logs), dtype=np.int64, count=len(logs))
+        # Dates too come back as stored ISO text on SQLite, parsed by NumPy in one call
+        day_index = (np.array([row[1] for row in logs], dtype="datetime64[D]") - np.datetime64(start)).astype(np.int64)
+        units = np.fromiter((row[2] for row in logs), dtype=np.int64, count=len(logs))
+
+        done = completion_matrix(habit_index, day_index, n_habits, days)
+        completed_days = done.sum(axis=1)
+        completed_units = np.bincount(habit_index, weights=units, minlength=n_habits)
+        rolling = {window: rolling_rates(done, window) for window in ROLLING_WINDOWS}
+        weekdays = weekday_counts(done, start)
+        streaks = streak_histograms(done)
+
+        return [
+            {
+                "habit_id": uuid.UUID(str(habit_id)),
+                "name": name,
+                "total_days": days,
+                "completed_days": int(completed_days[i]),
+                "completion_rate": round(float(completed_days[i]) / days * 100, 1),
+                "completed_units": int(completed_units[i]),
+                **{f"rolling_{window}_rate": round(float(rates[i]) * 100, 1) for window, rates in rolling.items()},
+                "weekday_completions": weekdays[i].tolist(),
+                "streak_histogram": dict(zip((label for _, label in STREAK_BUCKETS), streaks[i].tolist())),
+                "current_streak": current_streak,
+                "best_streak": best_streak,
+                "total_completions": total_completions,
+            }
+            for i, (habit_id, name, current_streak, best_streak, total_completions) in enumerate(habits)
+        ]
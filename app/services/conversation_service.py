@@ -0,0 +1,111 @@
+# app/services/conversation_service.py
+from datetime import datetime
+from uuid import UUID, uuid4
+from sqlalchemy import case, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.db.models import Conversation, Message, User
+
+PREVIEW_LENGTH = 200
+
+class ConversationService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def ordered_pair(user_x, user_y) -> tuple:
+        """Canonical (user_a_id, user_b_id) ordering for a DM pair"""
+        x, y = UUID(str(user_x)), UUID(str(user_y))
+        return (x, y) if str(x) < str(y) else (y, x)
+
+    def record_message(self, msg: Message) -> Conversation:
+        """Update the pair's conversation for a new message (caller commits).
+
+        One INSERT ... ON CONFLICT (user_a_id, user_b_id), so the first
+        messages of a new pair cannot race each other into a duplicate row.
+        """
+        user_a, user_b = self.ordered_pair(msg.sender_id, msg.recipient_id)
+        to_a = UUID(str(msg.recipient_id)) == user_a
+        now = datetime.utcnow()
+        last_message = {
+            "last_message_at": msg.created_at,
+            "last_message_preview": msg.content[:PREVIEW_LENGTH],
+            "last_sender_id": msg.sender_id,
+            "updated_at": now,
+        }
+
+        # In-place increment so concurrent senders never lose an unread
+        unread_column = Conversation.unread_a if to_a else Conversation.unread_b
+        insert = sqlite_insert if self.db.get_bind().dialect.name == "sqlite" else pg_insert
+        stmt = (
+            insert(Conversation)
+            .values(
+                id=uuid4(),
+                user_a_id=user_a,
+                user_b_id=user_b,
+                unread_a=1 if to_a else 0,
+                unread_b=0 if to_a else 1,
+                created_at=now,
+                **last_message,
+            )
+            .on_conflict_do_update(
+                index_elements=[Conversation.user_a_id, Conversation.user_b_id],
+                set_={unread_column.key: unread_column + 1, **last_message},
+            )
+            .returning(Conversation)
+        )
+        return self.db.scalars(stmt, execution_options={"populate_existing": True}).one()
+
+    def mark_read(self, user_id, other_user_id) -> int:
+        """Mark every message from other_user_id to user_id as read and clear the unread count.
+
+        Returns the number of messages marked read (caller commits).
+        """
+        now = datetime.utcnow()
+        updated = self.db.query(Message).filter(
+            Message.sender_id == other_user_id,
+            Message.recipient_id == user_id,
+            Message.read_at.is_(None),
+        ).update({Message.read_at: now}, synchronize_session=False)
+
+        user_a, user_b = self.ordered_pair(user_id, other_user_id)
+        unread_column = Conversation.unread_a if UUID(str(user_id)) == user_a else Conversation.unread_b
+        self.db.query(Conversation).filter(
+            Conversation.user_a_id == user_a,
+            Conversation.user_b_id == user_b,
+        ).update({unread_column: 0}, synchronize_session=False)
+        return updated
+
+    def inbox(self, user_id, limit: int = 50) -> list:
+        """User's conversations, most recent first, with the other participant joined in"""
+        other_id = case(
+            (Conversation.user_a_id == user_id, Conversation.user_b_id),
+            else_=Conversation.user_a_id,
+        )
+        rows = (
+            self.db.query(Conversation, User)
+            .join(User, User.id == other_id)
+            .filter(or_(Conversation.user_a_id == user_id, Conversation.user_b_id == user_id))
+            .filter(Conversation.last_message_at.isnot(None))
+            .order_by(Conversation.last_message_at.desc())
+            .limit(limit)
+            .all()
+        )
+
+        me = UUID(str(user_id))
+        return [
+            {
+                "id": str(c.id),
+                "user": {
+                    "id": str(other.id),
+                    "name": other.name,
+                    "avatar_url": other.avatar_url,
+                },
+                "last_message_at": c.last_message_at.isoformat() if c.last_message_at else None,
+                "last_message_preview": c.last_message_preview,
+                "last_sender_id": str(c.last_sender_id) if c.last_sender_id else None,
+                "unread_count": (c.unread_a if c.user_a_id == me else c.unread_b) or 0,
+            }
+            for c, other in rows
+        ]
@@ -1,5 +1,7 @@
 # app/services/gamification.py
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
+from app.core.security import mark_user_changed
 from app.db.models import User, Badge, UserBadge
 from datetime import datetime
 
@@ -9,29 +11,42 @@ class GamificationService:
     
     def award_xp(self, user: User, xp_amount: int, reason: str = ""):
         """Award XP to user and update level"""
-        # Ensure the user instance is attached to this session
-        user = self.db.merge(user, load=True)
-        
-        # Safe arithmetic in case of None
-        user.xp = (user.xp or 0) + int(xp_amount)
+        result = self.add_xp(user.id, xp_amount)
+        self.db.commit()
+        return result
+    
+    def add_xp(self, user_id, xp_amount: int) -> dict:
+        """Add XP in the caller's transaction, without committing.
+
+        ``xp = xp + n`` is applied in SQL, so concurrent awards to the same
+        user add up instead of overwriting each other.
+        """
+        total_xp, old_level = self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(xp=func.coalesce(User.xp, 0) + int(xp_amount))
+            .returning(User.xp, User.level)
+            .execution_options(synchronize_session=False)
+        ).one()
+        old_level = old_level or 1
         
         # Calculate new level
-        old_level = user.level or 1
-        new_level = self._calculate_level(user.xp)
-        user.level = new_level
-        
-        # Check for level up
+        new_level = self._calculate_level(total_xp)
         if new_level > old_level:
-            self._handle_level_up(user, new_level)
-        
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+            # Only ever raise it: a concurrent award may already have
+            self.db.execute(
+                update(User)
+                .where(User.id == user_id, User.level < new_level)
+                .values(level=new_level)
+                .execution_options(synchronize_session=False)
+            )
+            self._handle_level_up(user_id, new_level)
+        mark_user_changed(self.db, user_id)
         
         return {
             "xp_awarded": xp_amount,
-            "total_xp": user.xp,
-            "level": user.level,
+            "total_xp": total_xp,
+            "level": max(old_level, new_level),
             "leveled_up": new_level > old_level
         }
     
@@ -48,7 +63,7 @@ class GamificationService:
         else:
             return 5 + ((xp - 1000) // 500)
     
-    def _handle_level_up(self, user: User, new_level: int):
+    def _handle_level_up(self, user_id, new_level: int):
         """Handle level up rewards and notifications"""
         # This could trigger notifications, unlock features, etc.
         pass
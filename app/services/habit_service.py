@@ -1,62 +1,143 @@
 # app/services/habit_service.py
-from datetime import date, timedelta
+from datetime import date, datetime
+from typing import Optional
+import uuid
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from app.db.models import Habit, HabitLog, LogStatus
+from app.services.analytics_service import AnalyticsService
+from app.services.gamification import GamificationService
+from app.services.streak_service import StreakService
+
+COMPLETION_XP = 10
+
+
+def _log_upsert(dialect: str, row: dict, updates: dict, idempotency_key: Optional[str]):
+    """INSERT ... ON CONFLICT (habit_id, date) DO UPDATE ... RETURNING for ``dialect``.
+
+    With a key, the update is skipped (and nothing returned) when the log
+    already carries that key.
+    """
+    insert = sqlite_insert if dialect == "sqlite" else pg_insert
+    return (
+        insert(HabitLog)
+        .values(**row)
+        .on_conflict_do_update(
+            index_elements=[HabitLog.habit_id, HabitLog.date],
+            set_=updates,
+            where=HabitLog.idempotency_key.is_distinct_from(idempotency_key) if idempotency_key else None,
+        )
+        .returning(HabitLog)
+    )
+
 
 class HabitService:
     def __init__(self, db: Session):
         self.db = db
     
-    def update_habit_progress(self, habit: Habit, completion_date: date):
-        """Update habit progress statistics"""
-        # Update total completions
-        habit.total_completions += 1
-        
-        # Update streak
-        self._update_streak(habit, completion_date)
+    def log_habit(
+        self, habit: Habit, user_id, log_date: date, changes: dict, idempotency_key: Optional[str] = None
+    ) -> HabitLog:
+        """Upsert the day's log, update habit counters and award XP as one unit of work.
+
+        The log is written by a single INSERT ... ON CONFLICT (habit_id, date),
+        so concurrent taps cannot create duplicate days. A retry carrying the
+        idempotency key already applied to the log changes nothing and gets the
+        log back as stored. Only the key of the last applied request is kept:
+        a retry of request A arriving after a later request B for the same day
+        is applied again, so clients must retry before sending newer changes
+        for that day. Counters and XP only move when the day's log
+        becomes completed, not on every re-log, and are taken back when a
+        completed day is re-logged as skipped or partial.
+        """
+        now = datetime.utcnow()
+        values = {field: value for field, value in changes.items() if value is not None}
+        completing = values.get("status", LogStatus.COMPLETED) == LogStatus.COMPLETED
         
-        # Update timestamp
-        from datetime import datetime
-        habit.updated_at = datetime.utcnow()
+        # On conflict, status changes are claimed separately so we learn whether this
+        # request completed or un-completed the day
+        updates = {field: value for field, value in values.items() if field != "status"}
+        updates["updated_at"] = now
+        if idempotency_key is not None:
+            updates["idempotency_key"] = idempotency_key
         
-        self.db.commit()
-    
-    def _update_streak(self, habit: Habit, completion_date: date):
-        """Calculate and update habit streak"""
-        yesterday = completion_date - timedelta(days=1)
+        # The id is only written on insert, so getting it back marks a new log
+        new_id = uuid.uuid4()
+        row = {
+            "id": new_id,
+            "habit_id": habit.id,
+            "user_id": user_id,
+            "date": log_date,
+            "idempotency_key": idempotency_key,
+            "created_at": now,
+            "updated_at": now,
+            **values,
+        }
+        stmt = _log_upsert(self.db.get_bind().dialect.name, row, updates, idempotency_key)
+        log = self.db.scalars(stmt, execution_options={"populate_existing": True}).first()
         
-        # Check if there was a completion yesterday
-        yesterday_log = self.db.query(HabitLog).filter(
-            HabitLog.habit_id == habit.id,
-            HabitLog.date == yesterday,
-            HabitLog.status == LogStatus.COMPLETED
-        ).first()
+        if log is None:
+            # Replayed request: already applied and nothing was written, so return
+            # the log as stored and leave the rest of the session alone
+            return self.db.query(HabitLog).filter(
+                HabitLog.habit_id == habit.id,
+                HabitLog.date == log_date
+            ).one()
         
-        if yesterday_log:
-            # Continue streak
-            habit.current_streak += 1
-        else:
-            # New streak starts
-            habit.current_streak = 1
+        completed_now = uncompleted_now = False
+        if log.id == new_id:
+            completed_now = completing
+        elif completing:
+            completed_now = self._claim_status(
+                log, LogStatus.COMPLETED, HabitLog.status.is_distinct_from(LogStatus.COMPLETED)
+            )
+        elif "status" in values:
+            uncompleted_now = self._claim_status(log, values["status"], HabitLog.status == LogStatus.COMPLETED)
+            if not uncompleted_now:
+                self._claim_status(log, values["status"], HabitLog.status.is_distinct_from(values["status"]))
         
-        # Update best streak
-        habit.best_streak = max(habit.best_streak, habit.current_streak)
+        # Completing today extends the streak in place; backdated and un-completed
+        # days can change any part of it, so those rescan the history
+        streaks = StreakService(self.db)
+        if uncompleted_now or (completed_now and not (log_date == date.today() and streaks.extend(habit, log_date))):
+            streaks.recompute(habit)
+        habit.updated_at = now
+        # Counter as SQL, so concurrent logs of one habit both count
+        if completed_now:
+            habit.total_completions = Habit.total_completions + 1
+        elif uncompleted_now:
+            habit.total_completions = Habit.total_completions - 1
+        self.db.flush()
+        if completed_now:
+            GamificationService(self.db).add_xp(user_id, COMPLETION_XP)
+        elif uncompleted_now:
+            GamificationService(self.db).add_xp(user_id, -COMPLETION_XP)
+        self.db.commit()
+        return log
+    
+    def _claim_status(self, log: HabitLog, status: str, condition) -> bool:
+        """Set the log's status if ``condition`` still holds; True when this call changed it"""
+        claimed = self.db.execute(
+            update(HabitLog)
+            .where(HabitLog.id == log.id, condition)
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        ).rowcount == 1
+        if claimed:
+            set_committed_value(log, "status", status)
+        return claimed
     
     def get_habit_analytics(self, habit: Habit, days: int = 30) -> dict:
         """Get habit analytics data"""
-        end_date = date.today()
-        start_date = end_date - timedelta(days=days)
-        
-        # Get all logs in period
-        logs = self.db.query(HabitLog).filter(
-            HabitLog.habit_id == habit.id,
-            HabitLog.date >= start_date,
-            HabitLog.date <= end_date
-        ).all()
+        # The window runs from `days` days ago through today, inclusive
+        stats = AnalyticsService(self.db).user_analytics(habit.user_id, days + 1, habit_ids=[habit.id])[0]
         
         # Calculate statistics
         total_days = days
-        completed_days = len([log for log in logs if log.status == LogStatus.COMPLETED])
+        completed_days = stats["completed_days"]
         completion_rate = (completed_days / total_days) * 100 if total_days > 0 else 0
         
         return {
@@ -0,0 +1,62 @@
+# app/services/post_service.py
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.db.models import Post, PostLike, PostComment
+
+class PostService:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def adjust_like_count(self, post_id, delta: int):
+        """Atomically add delta to a post's like counter (caller commits)"""
+        self._adjust(post_id, Post.like_count, delta)
+    
+    def adjust_comment_count(self, post_id, delta: int):
+        """Atomically add delta to a post's comment counter (caller commits)"""
+        self._adjust(post_id, Post.comment_count, delta)
+    
+    def _adjust(self, post_id, column, delta: int):
+        # UPDATE ... SET col = col + :delta, so concurrent writers never lose increments
+        self.db.query(Post).filter(Post.id == post_id).update(
+            {column: column + delta},
+            synchronize_session=False,
+        )
+    
+    def reconcile_counters(self) -> int:
+        """Repair drift between the denormalized counters and the like/comment rows.
+        
+        Returns the number of posts whose counters were corrected.
+        """
+        like_total = (
+            select(func.count(PostLike.id))
+            .where(PostLike.post_id == Post.id)
+            .scalar_subquery()
+        )
+        comment_total = (
+            select(func.count(PostComment.id))
+            .where(PostComment.post_id == Post.id)
+            .scalar_subquery()
+        )
+        
+        repaired = (
+            self.db.query(Post)
+            .filter((Post.like_count != like_total) | (Post.comment_count != comment_total))
+            .update(
+                {Post.like_count: like_total, Post.comment_count: comment_total},
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return repaired
+
+
+if __name__ == "__main__":
+    # Reconciliation job: python -m app.services.post_service
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        repaired = PostService(db).reconcile_counters()
+        print(f"Reconciled counters on {repaired} post(s)")
+    finally:
+        db.close()
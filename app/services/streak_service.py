@@ -0,0 +1,157 @@
+# app/services/streak_service.py
+from datetime import date, timedelta
+from itertools import groupby
+from typing import Optional, Sequence, Tuple
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from app.db.models import Habit, HabitFrequency, HabitLog, LogStatus
+
+
+def _period(day: date, frequency: str) -> int:
+    """Consecutive integers for consecutive periods: days, or Monday-based weeks"""
+    if frequency == HabitFrequency.DAILY:
+        return day.toordinal()
+    # Weekly and custom habits both count completions per calendar week; custom
+    # habits carry no schedule of their own beyond target_count
+    return (day.toordinal() - 1) // 7
+
+
+def _required_days(frequency: str, target_count: int) -> int:
+    """Completed days that satisfy one period: one day, or ``target_count`` days of a week"""
+    return 1 if frequency == HabitFrequency.DAILY else max(1, min(target_count or 1, 7))
+
+
+def compute_streaks(dates: Sequence[date], frequency: str, today: date, target_count: int = 1) -> Tuple[int, int]:
+    """(current_streak, best_streak) in periods, from completed dates sorted ascending.
+
+    A daily period needs one completed day; a week needs ``target_count``
+    completed days (at most 7). The current period still in progress does not
+    break a streak until it is over. Single pass over ``dates``.
+    """
+    required = _required_days(frequency, target_count)
+
+    # Completed days per period, in period order
+    periods = []
+    previous_day = None
+    for day in dates:
+        if day == previous_day:
+            continue
+        previous_day = day
+        key = _period(day, frequency)
+        if periods and periods[-1][0] == key:
+            periods[-1][1] += 1
+        else:
+            periods.append([key, 1])
+
+    best = run = 0
+    last_period = None  # last satisfied period
+    for key, days in periods:
+        if days < required:
+            continue
+        run = run + 1 if last_period == key - 1 else 1
+        last_period = key
+        best = max(best, run)
+
+    current_period = _period(today, frequency)
+    current = run if last_period in (current_period, current_period - 1) else 0
+    return current, best
+
+
+class StreakService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _completed_dates(self, habit_ids):
+        return self.db.execute(
+            select(HabitLog.habit_id, HabitLog.date)
+            .where(HabitLog.habit_id.in_(habit_ids), HabitLog.status == LogStatus.COMPLETED)
+            .order_by(HabitLog.habit_id, HabitLog.date)
+        ).all()
+
+    def recompute(self, habit: Habit, today: Optional[date] = None) -> None:
+        """Set the habit's streaks from its log history (no commit)"""
+        dates = [day for _, day in self._completed_dates([habit.id])]
+        habit.current_streak, habit.best_streak = compute_streaks(
+            dates, habit.frequency, today or date.today(), habit.target_count or 1
+        )
+
+    def extend(self, habit: Habit, day: date) -> bool:
+        """Advance the habit's streaks for ``day`` having just become completed (no commit).
+
+        Reads at most the current and previous period instead of the whole
+        history, and relies on the stored streaks being current as of the
+        previous period. Only valid when ``day`` is today. Returns False, with
+        the habit untouched, when a later completion exists and the caller
+        has to recompute.
+        """
+        completed = (HabitLog.habit_id == habit.id, HabitLog.status == LogStatus.COMPLETED)
+        if self.db.execute(select(HabitLog.id).where(*completed, HabitLog.date > day).limit(1)).first():
+            return False
+
+        if habit.frequency == HabitFrequency.DAILY:
+            previous = self.db.execute(select(func.max(HabitLog.date)).where(*completed, HabitLog.date < day)).scalar()
+            extends_run = previous == day - timedelta(days=1)
+            satisfied = True
+        else:
+            required = _required_days(habit.frequency, habit.target_count)
+            week_start = day - timedelta(days=day.weekday())
+            this_week = self._count(completed, week_start, day)
+            if this_week > required:
+                return True  # counted when the week was first satisfied
+            extends_run = self._count(completed, week_start - timedelta(days=7), week_start - timedelta(days=1)) >= required
+            satisfied = this_week == required
+
+        # The stored run only still stands if the previous period was satisfied
+        run = (habit.current_streak or 0) if extends_run else 0
+        habit.current_streak = run + 1 if satisfied else run
+        habit.best_streak = max(habit.best_streak or 0, habit.current_streak)
+        return True
+
+    def _count(self, completed, first: date, last: date) -> int:
+        return self.db.execute(
+            select(func.count(HabitLog.id)).where(*completed, HabitLog.date >= first, HabitLog.date <= last)
+        ).scalar()
+
+    def backfill(self, chunk_size: int = 500, today: Optional[date] = None) -> int:
+        """Recompute streaks of every habit, ``chunk_size`` habits per query and commit"""
+        today = today or date.today()
+        updated = 0
+        after = None
+        while True:
+            stmt = select(Habit.id, Habit.frequency, Habit.target_count).order_by(Habit.id).limit(chunk_size)
+            if after is not None:
+                stmt = stmt.where(Habit.id > after)
+            habits = self.db.execute(stmt).all()
+            if not habits:
+                return updated
+
+            dates_by_habit = {
+                habit_id: [day for _, day in rows]
+                for habit_id, rows in groupby(self._completed_dates([h.id for h in habits]), key=lambda r: r[0])
+            }
+            rows = []
+            for habit_id, frequency, target_count in habits:
+                current, best = compute_streaks(dates_by_habit.get(habit_id, []), frequency, today, target_count or 1)
+                rows.append({"id": habit_id, "current_streak": current, "best_streak": best})
+            self.db.execute(update(Habit), rows)
+            self.db.commit()
+
+            updated += len(habits)
+            after = habits[-1].id
+
+
+if __name__ == "__main__":
+    # Backfill job: python -m app.services.streak_service [--chunk-size N]
+    import argparse
+    from app.core.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Recompute current/best streaks of every habit")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        total = StreakService(db).backfill(args.chunk_size)
+        print(f"Recomputed streaks on {total} habit(s)")
+    finally:
+        db.close()
@@ -0,0 +1,193 @@
+# app/services/timeline_service.py
+from datetime import datetime
+from typing import List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import and_, desc, func, insert, or_, select, true
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.db.models import Follow, Post, TimelineEntry, User
+
+# (created_at, id) of the last item on the previous page
+Keyset = Tuple[datetime, UUID]
+
+
+def keyset_before(created_col, id_col, key: Optional[Keyset]):
+    """SQL predicate selecting rows strictly after ``key`` in (created_at, id) DESC order"""
+    if key is None:
+        return true()
+    created_at, row_id = key
+    return or_(created_col < created_at, and_(created_col == created_at, id_col < row_id))
+
+
+class TimelineService:
+    """Fan-out-on-write home timeline.
+
+    Public posts already reach every reader through the public stream, so only
+    followers-only posts are fanned out into ``timeline_entries``. Authors with
+    more than ``FEED_FANOUT_MAX_FOLLOWERS`` followers are skipped on write and
+    merged into their followers' feeds at read time instead; ``User.follower_count``
+    tells them apart without counting follows on every read, and ``fan_out``
+    refreshes it from the follows rows whenever the author posts.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def fan_out(self, post: Post) -> int:
+        """Copy a new post into its author's followers' timelines (caller commits).
+
+        Returns the number of timeline rows written.
+        """
+        if post.is_public:
+            return 0
+
+        # Follows are counted here rather than read from users.follower_count,
+        # which drifts when follows are written outside follow()/unfollow().
+        # One row past the cap is enough to tell a high-fanout author apart.
+        max_followers = settings.FEED_FANOUT_MAX_FOLLOWERS
+        follower_ids = [
+            row[0]
+            for row in self.db.query(Follow.follower_id)
+            .filter(Follow.followed_id == post.user_id)
+            .limit(max_followers + 1)
+            .all()
+        ]
+        follower_count = len(follower_ids)
+        if follower_count > max_followers:
+            follower_count = self.db.query(func.count(Follow.id)).filter(Follow.followed_id == post.user_id).scalar()
+
+        # Refresh the counter home_feed uses to merge high-fanout authors at read
+        # time, so this post lands on exactly one of the two paths
+        self.db.query(User).filter(User.id == post.user_id, User.follower_count != follower_count).update(
+            {User.follower_count: follower_count}, synchronize_session=False
+        )
+        if not follower_ids or follower_count > max_followers:
+            return 0
+
+        self.db.execute(
+            insert(TimelineEntry),
+            [
+                {
+                    "user_id": follower_id,
+                    "post_id": post.id,
+                    "author_id": post.user_id,
+                    "created_at": post.created_at,
+                }
+                for follower_id in follower_ids
+            ],
+        )
+        return len(follower_ids)
+
+    def home_feed(self, user_id, limit: int, before: Optional[Keyset] = None) -> List[Post]:
+        """Newest-first home feed: public posts, the materialized timeline and
+        followed high-fanout authors, merged on (created_at, id).
+
+        Each source is an index range scan bounded by ``limit``.
+        """
+        public = (
+            self.db.query(Post)
+            .filter(Post.is_public == True, keyset_before(Post.created_at, Post.id, before))
+            .order_by(desc(Post.created_at), desc(Post.id))
+            .limit(limit)
+            .all()
+        )
+
+        timeline_ids = [
+            row[0]
+            for row in self.db.query(TimelineEntry.post_id)
+            .filter(
+                TimelineEntry.user_id == user_id,
+                keyset_before(TimelineEntry.created_at, TimelineEntry.post_id, before),
+            )
+            .order_by(desc(TimelineEntry.created_at), desc(TimelineEntry.post_id))
+            .limit(limit)
+            .all()
+        ]
+        timeline = self.db.query(Post).filter(Post.id.in_(timeline_ids)).all() if timeline_ids else []
+
+        celebrity_ids = self._high_fanout_followees(user_id)
+        celebrity = (
+            self.db.query(Post)
+            .filter(
+                Post.user_id.in_(celebrity_ids),
+                Post.is_public == False,
+                keyset_before(Post.created_at, Post.id, before),
+            )
+            .order_by(desc(Post.created_at), desc(Post.id))
+            .limit(limit)
+            .all()
+            if celebrity_ids
+            else []
+        )
+
+        merged = {p.id: p for p in (*public, *timeline, *celebrity)}
+        return sorted(merged.values(), key=lambda p: (p.created_at, p.id), reverse=True)[:limit]
+
+    def _high_fanout_followees(self, user_id) -> List[UUID]:
+        """Authors the user follows whose posts are not fanned out on write"""
+        followees = self.db.query(Follow.followed_id).filter(Follow.follower_id == user_id)
+        rows = (
+            self.db.query(User.id)
+            .filter(
+                User.id.in_(followees.scalar_subquery()),
+                User.follower_count > settings.FEED_FANOUT_MAX_FOLLOWERS,
+            )
+            .all()
+        )
+        return [row[0] for row in rows]
+
+    def follow(self, follower_id, followed_id) -> bool:
+        """Add a follow and count it on the followed user (caller commits).
+
+        Returns False when the follow already existed.
+        """
+        if self.db.query(Follow.id).filter_by(follower_id=follower_id, followed_id=followed_id).first():
+            return False
+        self.db.add(Follow(follower_id=follower_id, followed_id=followed_id))
+        self.db.flush()
+        self._adjust_follower_count(followed_id, 1)
+        return True
+
+    def unfollow(self, follower_id, followed_id) -> bool:
+        """Remove a follow and uncount it (caller commits). Returns False if there was none."""
+        deleted = (
+            self.db.query(Follow)
+            .filter_by(follower_id=follower_id, followed_id=followed_id)
+            .delete(synchronize_session=False)
+        )
+        if deleted:
+            self._adjust_follower_count(followed_id, -deleted)
+        return bool(deleted)
+
+    def _adjust_follower_count(self, user_id, delta: int):
+        # UPDATE ... SET col = col + :delta, so concurrent writers never lose increments
+        self.db.query(User).filter(User.id == user_id).update(
+            {User.follower_count: User.follower_count + delta},
+            synchronize_session=False,
+        )
+
+    def reconcile_follower_counts(self) -> int:
+        """Repair drift between users.follower_count and the follows rows.
+
+        Returns the number of users whose counter was corrected.
+        """
+        total = select(func.count(Follow.id)).where(Follow.followed_id == User.id).scalar_subquery()
+        repaired = (
+            self.db.query(User)
+            .filter(User.follower_count != total)
+            .update({User.follower_count: total}, synchronize_session=False)
+        )
+        self.db.commit()
+        return repaired
+
+
+if __name__ == "__main__":
+    # Reconciliation job: python -m app.services.timeline_service
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        repaired = TimelineService(db).reconcile_follower_counts()
+        print(f"Reconciled follower counts on {repaired} user(s)")
+    finally:
+        db.close()
@@ -17,6 +17,18 @@ if ! docker compose version &>/dev/null; then
   fi
 fi
 
+# The database used to be mounted as ../habitverse.db; it now lives in ../data/
+# together with its WAL files. Move an existing one over before starting.
+if [ -f ../habitverse.db ] && [ ! -e ../data/habitverse.db ]; then
+  echo "Moving ../habitverse.db to ../data/habitverse.db"
+  mkdir -p ../data
+  for suffix in "" -wal -shm; do
+    if [ -f "../habitverse.db$suffix" ]; then
+      mv "../habitverse.db$suffix" "../data/habitverse.db$suffix"
+    fi
+  done
+fi
+
 # Build and up
 if docker compose version &>/dev/null; then
   docker compose pull || true
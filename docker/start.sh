@@ -0,0 +1,16 @@
+#!/bin/sh
+# Container entrypoint: bring the schema up to date and refresh precompressed
+# static files, then run the given command.
+set -e
+
+# Databases from before migrations existed are stamped at the baseline first;
+# app startup (init_db) never changes a schema Alembic already manages
+python -m app.core.database
+alembic upgrade head
+
+# Static sources may be bind-mounted over the image's copy; recompress what changed
+if [ -n "$STATIC_PRECOMPRESSED_DIR" ]; then
+  python -m app.core.compression --directory app/static --output "$STATIC_PRECOMPRESSED_DIR"
+fi
+
+exec "$@"
@@ -0,0 +1,56 @@
+# tests/conftest.py
+import os
+import tempfile
+import uuid
+
+# Settings are read at import time, so point the app at a throwaway database first
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import SessionLocal
+from app.db.models import User
+from app.main import app
+
+PASSWORD = "pw123456"
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_client():
+    """Factory for signed-in clients, one fresh user each"""
+    clients = []
+
+    def _make(name: str = "Tester") -> TestClient:
+        client = TestClient(app)
+        client.__enter__()  # runs startup, which creates the tables
+        clients.append(client)
+        email = f"{uuid.uuid4().hex}@example.com"
+        response = client.post(
+            "/auth/register",
+            data={"email": email, "name": name, "password": PASSWORD, "confirm_password": PASSWORD},
+            follow_redirects=False,
+        )
+        assert response.status_code == 302, response.text
+        with SessionLocal() as session:
+            user = session.query(User).filter(User.email == email).one()
+        client.user = {"id": user.id, "email": email, "name": name, "password": PASSWORD}
+        return client
+
+    yield _make
+    for client in clients:
+        client.__exit__(None, None, None)
+
+
+@pytest.fixture
+def client(make_client) -> TestClient:
+    return make_client()
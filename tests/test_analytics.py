@@ -0,0 +1,114 @@
+# tests/test_analytics.py
+import random
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app.core.database import engine
+from app.db.models import Habit, HabitLog, LogStatus
+from app.services.analytics_benchmark import COVERING_INDEX
+from app.services.analytics_service import STREAK_BUCKETS, AnalyticsService
+from app.services.habit_service import HabitService
+
+
+def _seed_logs(client, db, today, n_habits=3, history=400):
+    ids = [client.post("/api/habits", json={"name": f"h{i}"}).json()["id"] for i in range(n_habits)]
+    rng = random.Random(7)
+    for habit_id in ids:
+        for offset in range(history):
+            if rng.random() < 0.6:
+                db.add(HabitLog(
+                    habit_id=uuid.UUID(habit_id), user_id=client.user["id"], date=today - timedelta(days=offset),
+                    status=LogStatus.COMPLETED if rng.random() < 0.8 else LogStatus.SKIPPED, count=rng.randint(1, 3),
+                ))
+    db.commit()
+    return ids
+
+
+def _per_habit_analytics(db, habit_id, days, today):
+    """The same statistics one habit at a time, over ORM log objects"""
+    start = today - timedelta(days=days - 1)
+    logs = db.query(HabitLog).filter(
+        HabitLog.habit_id == uuid.UUID(habit_id), HabitLog.date >= start, HabitLog.date <= today
+    ).all()
+    completed = {log.date: log.count for log in logs if log.status == LogStatus.COMPLETED}
+
+    rates = {}
+    for window in (7, 30):
+        span = min(window, days)
+        recent = [today - timedelta(days=offset) for offset in range(span)]
+        rates[f"rolling_{window}_rate"] = round(sum(day in completed for day in recent) / span * 100, 1)
+
+    weekdays = [0] * 7
+    for day in completed:
+        weekdays[day.weekday()] += 1
+
+    runs, run = [], 0
+    for offset in range(days):
+        if start + timedelta(days=offset) in completed:
+            run += 1
+        elif run:
+            runs.append(run)
+            run = 0
+    if run:
+        runs.append(run)
+    histogram = {label: 0 for _, label in STREAK_BUCKETS}
+    for length in runs:
+        label = [label for low, label in STREAK_BUCKETS if length >= low][-1]
+        histogram[label] += 1
+
+    return {
+        "completed_days": len(completed),
+        "completion_rate": round(len(completed) / days * 100, 1),
+        "completed_units": sum(completed.values()),
+        **rates,
+        "weekday_completions": weekdays,
+        "streak_histogram": histogram,
+    }
+
+
+def test_user_analytics_matches_per_habit_computation(client, db):
+    today = date.today()
+    ids = _seed_logs(client, db, today)
+    service = AnalyticsService(db)
+
+    for days in (365, 30, 5):
+        results = service.user_analytics(client.user["id"], days, today)
+        assert [str(result["habit_id"]) for result in results] == ids
+        for habit_id, result in zip(ids, results):
+            expected = _per_habit_analytics(db, habit_id, days, today)
+            assert {key: result[key] for key in expected} == expected, (habit_id, days)
+
+
+def test_habit_analytics_keeps_its_window(client, db):
+    today = date.today()
+    habit_id = _seed_logs(client, db, today, n_habits=1)[0]
+    habit = db.get(Habit, uuid.UUID(habit_id))
+
+    # Counted from `days` days ago through today, over `days` total days
+    start = today - timedelta(days=30)
+    completed = db.query(HabitLog).filter(
+        HabitLog.habit_id == habit.id, HabitLog.date >= start, HabitLog.date <= today,
+        HabitLog.status == LogStatus.COMPLETED,
+    ).count()
+
+    analytics = HabitService(db).get_habit_analytics(habit, 30)
+    assert analytics["total_days"] == 30
+    assert analytics["completed_days"] == completed
+    assert analytics["completion_rate"] == round(completed / 30 * 100, 1)
+
+
+def test_completed_days_scan_reads_only_the_covering_index(client, db):
+    _seed_logs(client, db, date.today(), n_habits=1, history=10)
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        AnalyticsService(db).user_analytics(client.user["id"], 365)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    statement, parameters = next((s, p) for s, p in statements if "FROM habit_logs" in s)
+    plan = " ".join(row[-1] for row in db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+    assert f"USING COVERING INDEX {COVERING_INDEX}" in plan
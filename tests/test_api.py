@@ -0,0 +1,315 @@
+# tests/test_api.py
+import base64
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from starlette.websockets import WebSocketDisconnect
+
+import app.main
+from app.config import settings
+from app.core import database
+from app.core.database import PRIMARY_UNTIL_COOKIE, _read_bind, async_engine, engine, get_read_db
+from app.core.realtime import manager
+from app.db.models import Conversation, Follow, Friendship, FriendshipStatus, Message, Post, PostComment, PostLike, TimelineEntry, User
+from app.services.conversation_service import ConversationService
+from app.services.post_service import PostService
+
+
+def test_read_bind_round_robins_replicas_unless_pinned():
+    replicas = ["replica-1", "replica-2"]
+
+    assert _read_bind([], None) is None
+    assert {_read_bind(replicas, None) for _ in range(4)} == set(replicas)
+    assert _read_bind(replicas, str(time.time() - 1)) in replicas  # pin expired
+    assert _read_bind(replicas, "garbage") in replicas
+    assert _read_bind(replicas, str(time.time() + 5)) is None
+
+
+def test_read_session_uses_primary_after_a_recent_write(monkeypatch, tmp_path):
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(database, "read_engines", [replica])
+
+    sessions = get_read_db(db_primary_until=None)
+    assert next(sessions).get_bind() is replica
+    sessions.close()
+
+    sessions = get_read_db(db_primary_until=str(time.time() + 5))
+    assert next(sessions).get_bind() is engine
+    sessions.close()
+
+
+def test_committing_request_pins_client_to_primary(client, monkeypatch):
+    monkeypatch.setattr(app.main, "READ_URLS", ["sqlite:///replica.db"])
+
+    read = client.get("/api/habits")
+    assert PRIMARY_UNTIL_COOKIE not in read.cookies
+
+    write = client.post("/api/habits", json={"name": "Stretch"})
+    assert write.status_code == 200
+    assert float(write.cookies[PRIMARY_UNTIL_COOKIE]) > time.time()
+
+
+def test_profile_pages_read_from_replicas(client, monkeypatch, tmp_path):
+    for path in ("/profile", "/u/{user_id}"):
+        route = next(r for r in app.main.app.routes if getattr(r, "path", None) == path and "GET" in r.methods)
+        assert get_read_db in [dependency.call for dependency in route.dependant.dependencies], path
+
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(database, "read_engines", [replica])
+    assert client.get("/profile").status_code == 200
+    assert client.get(f"/u/{client.user['id']}").status_code == 200
+    replica.dispose()
+
+
+def _follow(db, follower, followed):
+    # Written directly, as follows made outside TimelineService.follow would be
+    db.add(Follow(follower_id=follower.user["id"], followed_id=followed.user["id"]))
+    db.commit()
+
+
+def _post(client, is_public):
+    return client.post("/api/posts", json={"content": "hello", "is_public": is_public}).json()["id"]
+
+
+def _feed_ids(client, limit=50):
+    return [post["id"] for post in client.get(f"/api/posts/feed?limit={limit}").json()]
+
+
+def test_followers_only_post_is_fanned_out_to_followers(make_client, db):
+    author, follower, stranger = make_client("Author"), make_client("Follower"), make_client("Stranger")
+    _follow(db, follower, author)
+
+    post_id = _post(author, is_public=False)
+
+    assert post_id in _feed_ids(follower)
+    assert post_id not in _feed_ids(stranger)
+    assert db.query(TimelineEntry).filter(TimelineEntry.author_id == author.user["id"]).count() == 1
+    # The stale counter is refreshed from the follows rows
+    assert db.get(User, author.user["id"]).follower_count == 1
+
+
+def test_home_feed_merges_public_timeline_and_high_fanout_posts(make_client, db, monkeypatch):
+    monkeypatch.setattr(settings, "FEED_FANOUT_MAX_FOLLOWERS", 1)
+    reader, fan, friend, celebrity = (make_client(name) for name in ("Reader", "Fan", "Friend", "Celebrity"))
+    _follow(db, reader, friend)
+    _follow(db, reader, celebrity)
+    _follow(db, fan, celebrity)
+
+    fanned_out = _post(friend, is_public=False)
+    merged = _post(celebrity, is_public=False)
+    public = _post(friend, is_public=True)
+
+    assert db.query(TimelineEntry).filter(TimelineEntry.author_id == celebrity.user["id"]).count() == 0
+    assert db.get(User, celebrity.user["id"]).follower_count == 2
+
+    ours = {fanned_out, merged, public}
+    assert [post_id for post_id in _feed_ids(reader) if post_id in ours] == [public, merged, fanned_out]
+    assert [post_id for post_id in _feed_ids(fan) if post_id in ours] == [public, merged]
+
+
+def _pages(client, path, limit):
+    """Follow X-Next-Cursor to the end; yields each page's ids"""
+    cursor = None
+    while True:
+        response = client.get(path, params={"limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        yield [post["id"] for post in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return
+
+
+def test_keyset_pages_split_created_at_ties_by_id(client, db):
+    tied = datetime(2026, 1, 1, 12, 0, 0)
+    ids = [uuid.uuid4() for _ in range(5)]
+    db.add_all(Post(id=post_id, user_id=client.user["id"], content="tie", created_at=tied) for post_id in ids)
+    db.commit()
+
+    pages = list(_pages(client, "/api/posts/me", limit=2))
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [post_id for page in pages for post_id in page] == [str(post_id) for post_id in sorted(ids, reverse=True)]
+
+
+def test_last_full_page_has_no_next_cursor(client):
+    for _ in range(2):
+        _post(client, is_public=True)
+
+    response = client.get("/api/posts/me?limit=2")
+
+    assert len(response.json()) == 2
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_malformed_or_tampered_cursors_are_rejected(client):
+    encode = lambda raw: base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+    cursors = [
+        "not base64!",
+        encode("no separator"),
+        encode("yesterday|" + str(uuid.uuid4())),
+        encode("2026-01-01T00:00:00|not-a-uuid"),
+        base64.urlsafe_b64encode(b"\xff\xfe|").decode(),
+    ]
+    for path in ("/api/posts/me", "/api/posts/feed", f"/api/posts/user/{client.user['id']}"):
+        for cursor in cursors:
+            response = client.get(path, params={"cursor": cursor})
+            assert response.status_code == 400, (path, cursor)
+            assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_post_page_loads_authors_and_likes_in_batches(make_client):
+    reader, *authors = (make_client(name) for name in ("Reader", "Ann", "Bob", "Cy"))
+    posts = [_post(author, is_public=True) for author in authors for _ in range(2)]
+    reader.post(f"/api/posts/{posts[0]}/like")
+    reader.post(f"/api/posts/{posts[3]}/like")
+
+    def feed(limit):
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            page = reader.get(f"/api/posts/feed?limit={limit}").json()
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+        return page, statements
+
+    page, statements = feed(6)
+    _, one_post_statements = feed(1)
+
+    assert len(statements) == len(one_post_statements)
+    assert sum("FROM post_likes" in statement for statement in statements) == 1
+    ours = {post["id"]: post for post in page if post["id"] in posts}
+    assert set(ours) == set(posts)
+    assert {post_id for post_id, post in ours.items() if post["you_liked"]} == {posts[0], posts[3]}
+    assert {post["user"]["name"] for post in ours.values()} == {"Ann", "Bob", "Cy"}
+    assert all(post["like_count"] == int(post["you_liked"]) for post in ours.values())
+
+
+def test_post_counters_follow_likes_and_comments_and_reconcile(make_client, db):
+    author, fan = make_client("Author"), make_client("Fan")
+    post_id = _post(author, is_public=True)
+    counters = lambda: db.query(Post.like_count, Post.comment_count).filter(Post.id == uuid.UUID(post_id)).one()
+
+    fan.post(f"/api/posts/{post_id}/like")
+    fan.post(f"/api/posts/{post_id}/like")  # already liked
+    fan.post(f"/api/posts/{post_id}/comments", json={"content": "nice"})
+    assert tuple(counters()) == (1, 1)
+
+    fan.delete(f"/api/posts/{post_id}/like")
+    fan.delete(f"/api/posts/{post_id}/like")  # nothing left to unlike
+    db.expire_all()
+    assert tuple(counters()) == (0, 1)
+
+    # Rows written behind the service's back drift until reconciled
+    db.add(PostLike(post_id=uuid.UUID(post_id), user_id=author.user["id"]))
+    db.query(PostComment).filter(PostComment.post_id == uuid.UUID(post_id)).delete()
+    db.commit()
+    assert PostService(db).reconcile_counters() >= 1
+    assert tuple(counters()) == (1, 0)
+    assert PostService(db).reconcile_counters() == 0
+
+
+def _befriend(db, a, b):
+    db.add(Friendship(requester_id=a.user["id"], addressee_id=b.user["id"], status=FriendshipStatus.ACCEPTED))
+    db.commit()
+
+
+def _send(client, to, content):
+    response = client.post("/api/messages/send", params={"to": str(to.user["id"]), "content": content})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_sent_message_is_pushed_over_the_websocket(make_client, db):
+    alice, bob = make_client("Alice"), make_client("Bob")
+    _befriend(db, alice, bob)
+
+    with bob.websocket_connect("/api/messages/ws") as websocket:
+        # The server registers the socket just after accepting it
+        deadline = time.time() + 5
+        while str(bob.user["id"]) not in manager._connections and time.time() < deadline:
+            time.sleep(0.01)
+        sent = _send(alice, bob, "hi bob")
+        pushed = websocket.receive_json()
+
+    assert pushed == {"type": "message", "message": sent}
+
+
+def test_websocket_requires_a_session():
+    with TestClient(app.main.app) as anonymous:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with anonymous.websocket_connect("/api/messages/ws") as websocket:
+                websocket.receive_text()
+    assert closed.value.code == 1008
+
+
+def test_conversation_history_pages_and_syncs(make_client, db):
+    alice, bob = make_client("Alice"), make_client("Bob")
+    _befriend(db, alice, bob)
+    t0 = datetime(2026, 1, 1, 9, 0, 0)
+    # Two messages share t0 + 2s; the id breaks the tie
+    sent_at = [t0, t0 + timedelta(seconds=1), t0 + timedelta(seconds=2), t0 + timedelta(seconds=2), t0 + timedelta(seconds=3)]
+    ids = [uuid.UUID(int=n + 1) for n in range(len(sent_at))]
+    db.add_all(
+        Message(id=message_id, sender_id=alice.user["id"], recipient_id=bob.user["id"], content=str(n), created_at=created_at)
+        for n, (message_id, created_at) in enumerate(zip(ids, sent_at))
+    )
+    db.commit()
+
+    def history(**params):
+        response = bob.get(f"/api/messages/with/{alice.user['id']}", params=params)
+        assert response.status_code == 200, response.text
+        return [message["content"] for message in response.json()]
+
+    assert history() == ["4", "3", "2", "1", "0"]
+    assert history(before=sent_at[2].isoformat()) == ["1", "0"]
+    assert history(after=sent_at[1].isoformat()) == ["4", "3", "2"]
+    # Catching up returns the oldest missing messages first, newest first within the page
+    assert history(after=t0.isoformat(), limit=2) == ["2", "1"]
+    assert history(since_id=str(ids[2])) == ["4", "3"]
+    assert history(since_id=str(ids[4])) == []
+
+    for params in ({"before": "yesterday"}, {"after": "soon"}, {"since_id": str(uuid.uuid4())}):
+        assert bob.get(f"/api/messages/with/{alice.user['id']}", params=params).status_code == 400
+
+
+def test_inbox_tracks_last_message_and_unread_counts(make_client, db):
+    alice, bob, carol = make_client("Alice"), make_client("Bob"), make_client("Carol")
+    _befriend(db, alice, bob)
+    _befriend(db, carol, alice)
+
+    _send(alice, bob, "one")
+    _send(alice, bob, "two")
+    _send(bob, alice, "three")
+    _send(carol, alice, "hey alice")
+
+    # Every message of a pair upserts the same row
+    pair = ConversationService.ordered_pair(alice.user["id"], bob.user["id"])
+    assert db.query(Conversation).filter(Conversation.user_a_id == pair[0], Conversation.user_b_id == pair[1]).count() == 1
+
+    inbox = lambda client: {c["user"]["name"]: c for c in client.get("/api/messages/conversations").json()}
+    assert list(inbox(alice)) == ["Carol", "Bob"]
+    assert (inbox(alice)["Bob"]["unread_count"], inbox(bob)["Alice"]["unread_count"]) == (1, 2)
+    last = inbox(bob)["Alice"]
+    assert (last["last_message_preview"], last["last_sender_id"]) == ("three", str(bob.user["id"]))
+
+    response = bob.post(f"/api/messages/with/{alice.user['id']}/read")
+    assert response.json() == {"updated": 2}
+    assert inbox(bob)["Alice"]["unread_count"] == 0
+    assert inbox(alice)["Bob"]["unread_count"] == 1
+    assert db.query(Message).filter(Message.recipient_id == bob.user["id"], Message.read_at.is_(None)).count() == 0
+
+
+def test_mark_read_leaves_the_commit_to_the_caller(make_client, db):
+    alice, bob = make_client("Alice"), make_client("Bob")
+    _befriend(db, alice, bob)
+    _send(alice, bob, "unread")
+
+    assert ConversationService(db).mark_read(bob.user["id"], alice.user["id"]) == 1
+    db.rollback()
+
+    assert bob.get("/api/messages/conversations").json()[0]["unread_count"] == 1
@@ -0,0 +1,81 @@
+# tests/test_auth.py
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.core.security import create_access_token, user_cache, verify_token
+from app.db.models import User
+from app.main import app
+
+
+def test_repeat_requests_use_cached_user(client):
+    token = client.cookies.get("access_token")
+    client.get("/api/habits")
+    hits = user_cache.hits
+
+    for _ in range(3):
+        assert client.get("/api/habits").status_code == 200
+
+    assert user_cache.hits - hits == 3
+    assert user_cache.get(token) is not None
+
+
+def test_profile_update_invalidates_cached_user(client):
+    assert "Renamed" not in client.get("/dashboard").text
+
+    response = client.post(
+        "/profile/update",
+        data={"name": "Renamed", "email": client.user["email"]},
+        follow_redirects=False,
+    )
+
+    assert response.status_code == 302
+    assert "Renamed" in client.get("/dashboard").text
+
+
+def test_xp_update_outside_orm_invalidates_cached_user(client, db):
+    token = client.cookies.get("access_token")
+    habit = client.post("/api/habits", json={"name": "Read"}).json()
+    assert user_cache.get(token).xp == 0
+
+    client.post(f"/api/habits/{habit['id']}/log", json={"status": "completed"})
+
+    # The bulk UPDATE of xp drops the snapshot; the next request caches the new value
+    assert user_cache.get(token) is None
+    client.get("/api/habits")
+    assert user_cache.get(token).xp == db.get(User, client.user["id"]).xp > 0
+
+
+def test_token_identifies_user_by_id_and_version(client):
+    claims = verify_token(client.cookies.get("access_token"))
+
+    assert claims["sub"] == str(client.user["id"])
+    assert claims["ver"] == 0
+
+
+def test_password_change_revokes_other_sessions(client):
+    other = TestClient(app)
+    other.cookies.set("access_token", client.cookies.get("access_token"))
+    assert other.get("/api/habits").status_code == 200
+
+    response = client.post(
+        "/profile/password",
+        data={"current_password": client.user["password"], "new_password": "newpw1234", "confirm_password": "newpw1234"},
+        follow_redirects=False,
+    )
+
+    assert response.status_code == 302
+    assert client.get("/api/habits").status_code == 200  # re-issued cookie
+    assert other.get("/api/habits").status_code == 401
+    assert verify_token(client.cookies.get("access_token"))["ver"] == 1
+
+
+def test_legacy_email_token_policy(client, monkeypatch):
+    legacy = TestClient(app)
+    legacy.cookies.set("access_token", create_access_token({"sub": client.user["email"]}))
+
+    monkeypatch.setattr(settings, "ACCEPT_LEGACY_EMAIL_TOKENS", True)
+    assert legacy.get("/api/habits").status_code == 200
+
+    user_cache.clear()
+    monkeypatch.setattr(settings, "ACCEPT_LEGACY_EMAIL_TOKENS", False)
+    assert legacy.get("/api/habits").status_code == 401
@@ -0,0 +1,520 @@
+# tests/test_core.py
+import asyncio
+import gzip
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+
+from app.config import settings
+from app.core import compression, database, logging_config, metrics, nplusone, security, slow_queries, templating
+from app.core.events import InMemoryEventBus, UnixSocketEventBus
+from app.core.workers import BoundedPool, PoolSaturated
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'core.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+    yield engine
+    engine.dispose()
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(json.loads(record.getMessage()))
+
+
+@pytest.fixture
+def slow_records(sqlite_engine, monkeypatch):
+    """Every statement on ``sqlite_engine`` counts as slow; yields the logged records"""
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    handler = _Collect()
+    logger = slow_queries.slow_query_log
+    logger.addHandler(handler)
+    monkeypatch.setattr(logger, "level", logging.INFO)
+    event.listen(sqlite_engine, "before_cursor_execute", slow_queries._before_execute)
+    event.listen(sqlite_engine, "after_cursor_execute", slow_queries._after_execute)
+    yield handler.records
+    event.remove(sqlite_engine, "before_cursor_execute", slow_queries._before_execute)
+    event.remove(sqlite_engine, "after_cursor_execute", slow_queries._after_execute)
+    logger.removeHandler(handler)
+
+
+def test_slow_query_log_explains_reads_only(sqlite_engine, slow_records):
+    with sqlite_engine.begin() as conn:
+        conn.execute(text("INSERT INTO items (name) VALUES (:name)"), [{"name": "a"}, {"name": "b"}])
+        conn.execute(text("UPDATE items SET name = :name WHERE id = :id"), {"name": "c", "id": 1})
+        conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": 1})
+
+    insert, update, select = slow_records
+    # SQLite binds positionally, so parameter shapes are lists of types
+    assert insert["params"] == {"rows": 2, "first": ["str"]} and insert["plan"] is None
+    assert update["plan"] is None
+    assert select["params"] == ["int"]
+    assert select["plan"] and "items" in select["plan"][0]
+
+
+def test_failed_explain_leaves_the_transaction_usable(sqlite_engine):
+    with sqlite_engine.begin() as conn:
+        conn.execute(text("INSERT INTO items (name) VALUES ('kept')"))
+
+        plan = slow_queries._explain(conn, "SELECT * FROM missing_table", ())
+
+        assert plan[0].startswith("EXPLAIN failed")
+        assert conn.execute(text("SELECT name FROM items")).scalars().all() == ["kept"]
+    with sqlite_engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM items")).scalar() == 1
+
+
+def test_top_offenders_groups_rotated_logs_by_fingerprint(tmp_path):
+    path = tmp_path / "slow.jsonl"
+    rows = [
+        (path, "SELECT a", 50.0, "/a", ["plan 1"]),
+        (path, "SELECT b", 10.0, "/b", None),
+        (tmp_path / "slow.jsonl.1", "SELECT a", 70.0, "/c", ["plan 2"]),
+    ]
+    for log_file, query, duration, route, plan in rows:
+        with open(log_file, "a") as f:
+            f.write(json.dumps({"fingerprint": query, "duration_ms": duration, "route": route, "plan": plan}) + "\n")
+    with open(path, "a") as f:
+        f.write("not json\n")
+
+    worst, other = slow_queries.top_offenders(str(path))
+
+    assert (worst["fingerprint"], worst["count"], worst["total_ms"], worst["max_ms"]) == ("SELECT a", 2, 120.0, 70.0)
+    assert worst["routes"] == {"/a", "/c"} and worst["plan"] == ["plan 2"]
+    assert (other["fingerprint"], other["count"]) == ("SELECT b", 1)
+
+
+def test_slow_query_log_is_opt_in_outside_debug():
+    # The suite runs without DEBUG and without SLOW_QUERY_MS
+    assert settings.SLOW_QUERY_MS == 0
+
+
+def test_bounded_pool_rejects_beyond_max_pending():
+    pool = BoundedPool("test", max_workers=1, max_pending=2)
+    gate = threading.Event()
+
+    async def scenario():
+        jobs = [asyncio.ensure_future(pool.run(gate.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(PoolSaturated):
+            await pool.run(gate.wait)
+        assert (pool.pending, pool.queue_depth, pool.rejected) == (2, 1, 1)
+        gate.set()
+        await asyncio.gather(*jobs)
+
+    try:
+        asyncio.run(scenario())
+        assert (pool.pending, pool.completed) == (0, 2)
+    finally:
+        gate.set()
+        pool.shutdown()
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_job_finishes():
+    pool = BoundedPool("test", max_workers=1, max_pending=1)
+    started, gate, finished = threading.Event(), threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        gate.wait()
+
+    async def scenario():
+        task = asyncio.ensure_future(pool.run(job))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # The worker thread is still busy, so there is still no room
+        assert pool.pending == 1
+        with pytest.raises(PoolSaturated):
+            await pool.run(job)
+
+    try:
+        asyncio.run(scenario())
+        gate.set()
+        pool._executor.submit(finished.set)
+        assert finished.wait(5)
+        assert pool.pending == 0
+    finally:
+        gate.set()  # never leave a worker blocked, even when an assertion fails
+        pool.shutdown()
+
+
+def test_saturated_password_pool_answers_503(client, monkeypatch):
+    saturated = BoundedPool("password", max_workers=1, max_pending=0)
+    monkeypatch.setattr(security, "password_pool", saturated)
+
+    response = client.post("/api/auth/login", data={"username": client.user["email"], "password": client.user["password"]})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert saturated.rejected == 1
+    saturated.shutdown()
+
+
+def test_registry_renders_prometheus_text():
+    registry = metrics.Registry()
+    requests = registry.register(metrics.Counter("requests_total", "Requests", ("path",)))
+    latency = registry.register(metrics.Histogram("latency_seconds", "Latency", (), buckets=(0.1, 1.0)))
+    registry.register(metrics.Gauge("depth", "Depth", (), lambda: {(): 3}))
+    registry.register(metrics.CallbackCounter("hits_total", "Hits", ("cache",), lambda: {("a",): 7}))
+    requests.inc('say "hi"\\now', amount=2)
+    latency.observe(0.5)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{path="say \\"hi\\"\\\\now"} 2',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 0',
+        'latency_seconds_bucket{le="1.0"} 1',
+        'latency_seconds_bucket{le="+Inf"} 1',
+        "latency_seconds_sum 0.5",
+        "latency_seconds_count 1",
+        "# HELP depth Depth",
+        "# TYPE depth gauge",
+        "depth 3",
+        "# HELP hits_total Hits",
+        "# TYPE hits_total counter",
+        'hits_total{cache="a"} 7',
+    ]
+
+
+def test_metrics_middleware_records_routes_and_queries(client):
+    client.get("/api/habits")
+
+    lines = client.get("/metrics").text.splitlines()
+
+    route = 'route="/api/habits"'
+    assert any(line.startswith("http_request_duration_seconds_count{") and route in line and 'status="200"' in line for line in lines)
+    assert any(line.startswith("db_queries_total{" + route) and float(line.split()[-1]) > 0 for line in lines)
+    assert "# TYPE cache_hits_total counter" in lines
+    assert "# TYPE password_pool_rejected_total counter" in lines
+    assert not any(line.startswith("db_rows_total") for line in lines)
+
+
+def test_in_memory_bus_delivers_to_every_subscriber():
+    bus = InMemoryEventBus()
+    received = []
+
+    def broken(event):
+        raise RuntimeError("handler bug")
+
+    bus.subscribe(broken)
+    bus.subscribe(received.append)
+    bus.publish("like", ["b", "a", "b"], post_id="p1")
+
+    # A failing handler does not keep the event from the others
+    assert received == [{"type": "like", "recipients": ["a", "b"], "data": {"post_id": "p1"}}]
+
+
+def test_unix_socket_bus_reaches_other_workers(tmp_path, monkeypatch):
+    sender, receiver = UnixSocketEventBus(str(tmp_path)), UnixSocketEventBus(str(tmp_path))
+    received = queue.Queue()
+    receiver.subscribe(received.put)
+    local = []
+    sender.subscribe(local.append)
+
+    receiver.start()
+    pid = os.getpid()
+    monkeypatch.setattr(os, "getpid", lambda: pid + 1)  # a second worker
+    sender.start()
+    try:
+        sender.publish("message", ["u1"], message={"id": "m1"})
+
+        event = {"type": "message", "recipients": ["u1"], "data": {"message": {"id": "m1"}}}
+        assert received.get(timeout=5) == event
+        assert local == [event]
+        assert received.empty()  # workers never hear their own broadcasts twice
+    finally:
+        sender.stop()
+        receiver.stop()
+    assert os.listdir(tmp_path) == []
+
+
+def test_async_url_swaps_in_the_asyncio_driver():
+    assert database._async_url("sqlite:///./habitverse.db").render_as_string() == "sqlite+aiosqlite:///./habitverse.db"
+    assert (
+        database._async_url("postgresql://app:secret@db:5432/habits").render_as_string(hide_password=False)
+        == "postgresql+asyncpg://app:secret@db:5432/habits"
+    )
+
+
+def test_async_routes_authenticate_on_the_async_session(client):
+    client.post("/api/habits", json={"name": "Read"})  # committed on the sync session
+
+    assert [habit["name"] for habit in client.get("/api/habits").json()] == ["Read"]
+    client.cookies.set("access_token", "not-a-token")
+    assert client.get("/api/habits").status_code == 401
+    client.cookies.delete("access_token")
+    assert client.get("/api/posts/me").status_code == 401
+
+
+def test_sqlite_profile_is_applied_to_every_connection(sqlite_engine):
+    database.apply_sqlite_pragmas(sqlite_engine, database.sqlite_pragmas())
+    sqlite_engine.dispose()  # drop the connection opened before the listener existed
+
+    for _ in range(2):
+        with sqlite_engine.connect() as conn:
+            pragma = lambda name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            assert pragma("journal_mode") == "wal"
+            assert pragma("synchronous") == 1  # NORMAL
+            assert pragma("busy_timeout") == settings.SQLITE_BUSY_TIMEOUT_MS
+            assert pragma("cache_size") == settings.SQLITE_CACHE_SIZE
+            assert pragma("temp_store") == 2  # MEMORY
+        sqlite_engine.dispose()
+
+
+def test_sqlite_tuning_can_be_switched_off(monkeypatch):
+    monkeypatch.setattr(settings, "SQLITE_TUNING", False)
+    assert database.sqlite_pragmas() == {}
+
+
+def test_fingerprint_collapses_literals_and_parameters():
+    shapes = {
+        nplusone.fingerprint("SELECT * FROM posts WHERE id = ?"),
+        nplusone.fingerprint("SELECT *  FROM posts\n WHERE id = 42"),
+        nplusone.fingerprint("SELECT * FROM posts WHERE id = 'abc'"),
+        nplusone.fingerprint("SELECT * FROM posts WHERE id = %(id_1)s"),
+    }
+    assert shapes == {"SELECT * FROM posts WHERE id = ?"}
+    assert nplusone.fingerprint("SELECT * FROM posts WHERE id IN (?, ?, ?)") == "SELECT * FROM posts WHERE id IN (?)"
+
+
+def test_nplusone_middleware_reports_repeated_queries(sqlite_engine, caplog):
+    api = FastAPI()
+
+    @api.get("/loop/{n}")
+    def loop(n: int):
+        with sqlite_engine.connect() as conn:
+            for i in range(n):
+                conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": i})
+        return {}
+
+    api.add_middleware(nplusone.NPlusOneMiddleware, threshold=3, report_header=True)
+    client = TestClient(api)
+
+    with caplog.at_level(logging.WARNING, logger=nplusone.logger.name):
+        few = client.get("/loop/2")
+        many = client.get("/loop/5")
+
+    assert nplusone.REPORT_HEADER not in few.headers
+    assert many.headers[nplusone.REPORT_HEADER].startswith("5x ")
+    assert "SELECT name FROM items WHERE id = ?" in many.headers[nplusone.REPORT_HEADER]
+    [warning] = caplog.records
+    assert "GET /loop/{n}: 5 x SELECT name FROM items" in warning.getMessage()
+
+
+def test_json_formatter_writes_extras_and_tracebacks():
+    logger = logging.getLogger("app.test")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logger.makeRecord(logger.name, logging.ERROR, __file__, 1, "saved %s", ("habit",), sys.exc_info(), extra={"user_id": "u1"})
+
+    entry = json.loads(logging_config.JsonFormatter().format(record))
+
+    assert (entry["level"], entry["logger"], entry["message"], entry["user_id"]) == ("ERROR", "app.test", "saved habit", "u1")
+    assert "ValueError: boom" in entry["exc_info"]
+    assert entry["ts"].endswith("+00:00")
+
+
+def test_queued_handler_emits_from_the_listener_thread():
+    class Threads(_Collect):
+        def emit(self, record):
+            super().emit(record)
+            self.thread = threading.current_thread()
+
+    collected = Threads()
+    handler = logging_config.queued(collected)
+    listener = logging_config._listeners.pop()
+    logger = logging.getLogger("app.test.queued")
+    logger.addHandler(handler)
+    try:
+        logger.warning(json.dumps({"n": 1}))
+    finally:
+        logger.removeHandler(handler)
+        listener.stop()  # drains the queue
+
+    assert collected.records == [{"n": 1}]
+    assert collected.thread is not threading.current_thread()
+
+
+def test_setup_logging_installs_one_queue_handler():
+    root = logging.getLogger()
+    before = list(root.handlers)
+
+    logging_config.setup_logging()
+
+    assert root.handlers == before
+    assert sum(isinstance(h, logging_config.QueueHandler) for h in root.handlers) == 1
+    assert root.level >= logging.INFO
+
+
+def test_page_shell_matches_a_full_render_and_reuses_the_layout(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", False)
+    templating._cached_shell.cache_clear()
+    body = "<main>{{ not a template }}</main>"
+
+    html = templating.page_shell("Habits", body, footer="<p>f</p>")
+    expected = templating.env.get_template("base.html").render(title="Habits", body=templating.Markup(body), footer="<p>f</p>")
+
+    assert html == expected
+    templating.page_shell("Habits", "<main>other</main>", footer="<p>f</p>")
+    templating.page_shell("Habits", body, footer="<p>g</p>")
+    info = templating._cached_shell.cache_info()
+    assert (info.hits, info.currsize) == (1, 2)
+
+
+def test_page_shell_renders_fresh_in_debug(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", True)
+    templating._cached_shell.cache_clear()
+
+    templating.page_shell("Habits", "<main></main>")
+
+    assert templating._cached_shell.cache_info().currsize == 0
+
+
+def test_negotiate_honours_order_and_q_values():
+    assert compression.negotiate("gzip, br", ("br", "gzip")) == "br"
+    assert compression.negotiate("br;q=0, gzip;q=0.5", ("br", "gzip")) == "gzip"
+    assert compression.negotiate("*", ("br", "gzip")) == "br"
+    assert compression.negotiate("GZIP", ("gzip",)) == "gzip"
+    assert compression.negotiate("gzip;q=oops, identity", ("gzip",)) is None
+    assert compression.negotiate("", ("gzip",)) is None
+
+
+@pytest.fixture
+def compressed_client():
+    api = FastAPI()
+    text_body = "habit " * 200
+
+    @api.get("/text")
+    def large_text():
+        return PlainTextResponse(text_body)
+
+    @api.get("/small")
+    def small_text():
+        return PlainTextResponse("tiny")
+
+    @api.get("/png")
+    def binary():
+        return Response(b"\x89PNG" * 500, media_type="image/png")
+
+    @api.get("/encoded")
+    def already_encoded():
+        return Response(gzip.compress(text_body.encode()), media_type="text/plain", headers={"Content-Encoding": "gzip"})
+
+    @api.get("/stream")
+    def stream():
+        return StreamingResponse(iter([text_body.encode()] * 3), media_type="text/plain")
+
+    api.add_middleware(compression.CompressionMiddleware, minimum_size=500)
+    client = TestClient(api)
+    client.text_body = text_body
+    return client
+
+
+def test_compression_middleware_gzips_large_text_only(compressed_client):
+    get = lambda path, accept="gzip": compressed_client.get(path, headers={"Accept-Encoding": accept})
+    body = compressed_client.text_body
+
+    response = get("/text")
+    assert response.headers["Content-Encoding"] == "gzip" and response.headers["Vary"] == "Accept-Encoding"
+    assert int(response.headers["Content-Length"]) < len(body) and response.text == body
+
+    assert "Content-Encoding" not in get("/text", accept="identity").headers
+    assert "Content-Encoding" not in get("/small").headers
+    assert "Content-Encoding" not in get("/png").headers
+    # Already encoded bodies pass through instead of being compressed twice
+    assert get("/encoded").text == body
+
+
+def test_compression_middleware_streams_gzip_chunks(compressed_client):
+    response = compressed_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert response.text == compressed_client.text_body * 3
+
+
+@pytest.fixture
+def static_tree(tmp_path):
+    source = tmp_path / "static"
+    (source / "css").mkdir(parents=True)
+    (source / "css" / "app.css").write_text("body { color: black; }\n" * 100)
+    (source / "tiny.js").write_text("x")  # gzip would only make it larger
+    (source / "logo.png").write_bytes(b"\x89PNG" * 100)
+    return source
+
+
+def _static_client(directory, precompressed_directory=None):
+    api = FastAPI()
+    api.mount("/static", compression.PrecompressedStaticFiles(
+        directory=str(directory), precompressed_directory=precompressed_directory and str(precompressed_directory),
+    ))
+    return TestClient(api)
+
+
+def test_precompress_writes_smaller_siblings_once(static_tree, tmp_path):
+    output = tmp_path / "precompressed"
+
+    written = compression.precompress(str(static_tree), str(output))
+
+    assert written == [str(output / "css" / "app.css.gz")]
+    assert gzip.decompress((output / "css" / "app.css.gz").read_bytes()) == (static_tree / "css" / "app.css").read_bytes()
+    assert compression.precompress(str(static_tree), str(output)) == []  # up to date
+    assert compression.precompress(str(static_tree)) == [str(static_tree / "css" / "app.css.gz")]
+
+
+def test_precompress_cli(static_tree, tmp_path, monkeypatch, capsys):
+    output = tmp_path / "precompressed"
+    monkeypatch.setattr(sys, "argv", ["compression", "--directory", str(static_tree), "--output", str(output)])
+
+    compression.main()
+
+    assert (output / "css" / "app.css.gz").exists()
+    assert capsys.readouterr().out.splitlines()[-1] == "1 file(s) written"
+
+
+def test_precompressed_static_files_serve_fresh_siblings(static_tree, tmp_path):
+    output = tmp_path / "precompressed"
+    compression.precompress(str(static_tree), str(output))
+    client = _static_client(static_tree, output)
+    css = (static_tree / "css" / "app.css").read_text()
+
+    served = client.get("/static/css/app.css", headers={"Accept-Encoding": "gzip"})
+    assert served.headers["Content-Encoding"] == "gzip" and served.headers["Content-Type"].startswith("text/css")
+    assert int(served.headers["Content-Length"]) == (output / "css" / "app.css.gz").stat().st_size
+    assert served.text == css
+
+    revalidated = client.get("/static/css/app.css", headers={"Accept-Encoding": "gzip", "If-None-Match": served.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+    assert "Content-Encoding" not in client.get("/static/css/app.css", headers={"Accept-Encoding": "identity"}).headers
+
+    # An edited source outranks its older sibling
+    source = static_tree / "css" / "app.css"
+    source.write_text(css + "a {}\n")
+    stat = source.stat()
+    os.utime(source, (stat.st_atime, stat.st_mtime + 10))
+    stale = client.get("/static/css/app.css", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in stale.headers and stale.text.endswith("a {}\n")
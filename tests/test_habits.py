@@ -0,0 +1,231 @@
+# tests/test_habits.py
+import uuid
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+from app.core.database import async_engine
+from app.db.models import Habit, HabitFrequency, HabitLog, LogStatus, User
+from app.services import habit_service
+from app.services.habit_service import COMPLETION_XP, HabitService
+from app.services.streak_service import StreakService, compute_streaks
+
+
+def _create_habits(client, *names, **fields):
+    return [client.post("/api/habits", json={"name": name, **fields}).json()["id"] for name in names]
+
+
+def test_status_returns_every_habit_with_its_logs_in_one_query(client):
+    done, skipped, yesterday_only, deleted = _create_habits(client, "a", "b", "c", "d", target_count=2)
+    yesterday = date.today() - timedelta(days=1)
+    client.post(f"/api/habits/{done}/log", json={"status": "completed", "count": 2})
+    client.post(f"/api/habits/{skipped}/log", json={"status": "skipped"})
+    client.post(f"/api/habits/{yesterday_only}/log", json={"status": "completed", "date": yesterday.isoformat()})
+    client.delete(f"/api/habits/{deleted}")
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        today = client.get("/api/habits/status").json()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+
+    assert [(h["id"], h["count"], h["target"], len(h["logs"])) for h in today] == [
+        (done, 2, 2, 1),
+        (skipped, 0, 2, 1),
+        (yesterday_only, 0, 2, 0),
+    ]
+    assert sum("FROM habits" in statement for statement in statements) == 1
+
+    two_days = client.get(f"/api/habits/status?start={yesterday.isoformat()}").json()
+    assert [(h["count"], h["target"]) for h in two_days] == [(2, 4), (0, 4), (1, 4)]
+
+
+def test_status_rejects_bad_ranges(client):
+    today = date.today()
+
+    assert client.get(f"/api/habits/status?start={(today + timedelta(days=1)).isoformat()}").status_code == 400
+    assert client.get(f"/api/habits/status?start={(today - timedelta(days=400)).isoformat()}").status_code == 400
+
+
+def _counters(db, client, habit_id):
+    db.expire_all()
+    habit = db.get(Habit, uuid.UUID(habit_id))
+    return habit.total_completions, db.get(User, client.user["id"]).xp
+
+
+def test_relogging_a_day_keeps_one_log(client, db):
+    (habit_id,) = _create_habits(client, "Walk")
+
+    first = client.post(f"/api/habits/{habit_id}/log", json={"status": "completed", "note": "a"}).json()
+    second = client.post(f"/api/habits/{habit_id}/log", json={"status": "completed", "note": "b"}).json()
+
+    assert first["id"] == second["id"]
+    assert second["note"] == "b"
+    assert db.query(HabitLog).filter(HabitLog.habit_id == uuid.UUID(habit_id)).count() == 1
+    assert _counters(db, client, habit_id) == (1, COMPLETION_XP)
+
+
+def test_toggling_a_day_does_not_inflate_counters(client, db):
+    (habit_id,) = _create_habits(client, "Meditate")
+
+    for _ in range(3):
+        completed = client.post(f"/api/habits/{habit_id}/log", json={"status": "completed"}).json()
+        assert completed["status"] == "completed"
+        assert _counters(db, client, habit_id) == (1, COMPLETION_XP)
+
+        skipped = client.post(f"/api/habits/{habit_id}/log", json={"status": "skipped"}).json()
+        assert skipped["status"] == "skipped"
+        assert _counters(db, client, habit_id) == (0, 0)
+
+
+def test_idempotency_key_replay_is_not_reapplied(client, db):
+    (habit_id,) = _create_habits(client, "Journal")
+    headers = {"Idempotency-Key": "tap-1"}
+
+    first = client.post(f"/api/habits/{habit_id}/log", json={"status": "completed", "note": "first"}, headers=headers)
+    replay = client.post(f"/api/habits/{habit_id}/log", json={"status": "completed", "note": "retry"}, headers=headers)
+
+    assert first.status_code == replay.status_code == 200
+    assert replay.json()["note"] == "first"
+    assert _counters(db, client, habit_id) == (1, COMPLETION_XP)
+
+    # A new key is a new request
+    client.post(f"/api/habits/{habit_id}/log", json={"status": "skipped"}, headers={"Idempotency-Key": "tap-2"})
+    assert _counters(db, client, habit_id) == (0, 0)
+
+
+def test_requests_sharing_a_timestamp_are_told_apart(client, db, monkeypatch):
+    class FrozenClock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime(2026, 1, 5, 12, 0, 0)
+
+    monkeypatch.setattr(habit_service, "datetime", FrozenClock)
+    (habit_id,) = _create_habits(client, "Floss")
+
+    client.post(f"/api/habits/{habit_id}/log", json={"status": "completed"})
+    client.post(f"/api/habits/{habit_id}/log", json={"status": "completed", "note": "again"})
+
+    assert _counters(db, client, habit_id) == (1, COMPLETION_XP)
+
+
+def test_replay_leaves_the_callers_session_alone(client, db):
+    (habit_id,) = _create_habits(client, "Tea")
+    habit = db.get(Habit, uuid.UUID(habit_id))
+    service = HabitService(db)
+    first = service.log_habit(habit, client.user["id"], date.today(), {"status": "completed"}, "tap-1")
+
+    habit.description = "staged by the caller"
+    replay = service.log_habit(habit, client.user["id"], date.today(), {"status": "skipped"}, "tap-1")
+
+    assert replay.id == first.id and replay.status == "completed"
+    assert db.is_modified(habit) and habit.description == "staged by the caller"
+    db.rollback()
+
+
+def test_only_the_last_applied_key_is_remembered(client, db):
+    (habit_id,) = _create_habits(client, "Stretch")
+    log = lambda status, key: client.post(f"/api/habits/{habit_id}/log", json={"status": status}, headers={"Idempotency-Key": key})
+
+    log("completed", "tap-1")
+    log("skipped", "tap-2")
+    # A late retry of tap-1 is a documented limit: it is applied again
+    log("completed", "tap-1")
+
+    assert db.query(HabitLog).filter(HabitLog.habit_id == uuid.UUID(habit_id)).one().status == LogStatus.COMPLETED
+
+
+def test_postgres_upsert_skips_replays_and_returns_the_log():
+    row = {"id": uuid.uuid4(), "habit_id": uuid.uuid4(), "user_id": uuid.uuid4(), "date": date(2026, 1, 5),
+           "idempotency_key": "tap-1", "status": "completed"}
+    updates = {"status": "completed", "idempotency_key": "tap-1"}
+
+    sql = str(habit_service._log_upsert("postgresql", row, updates, "tap-1").compile(dialect=postgresql.dialect()))
+
+    assert "ON CONFLICT (habit_id, date) DO UPDATE SET" in sql
+    assert "WHERE habit_logs.idempotency_key IS DISTINCT FROM %(idempotency_key_1)s" in sql
+    assert "RETURNING habit_logs.id, habit_logs.habit_id" in sql
+
+    unkeyed = str(habit_service._log_upsert("postgresql", row, updates, None).compile(dialect=postgresql.dialect()))
+    assert "IS DISTINCT FROM" not in unkeyed and "RETURNING" in unkeyed
+
+
+def test_compute_streaks():
+    monday = date(2026, 1, 5)
+    days = lambda *offsets: [monday + timedelta(days=offset) for offset in offsets]
+
+    assert compute_streaks([], HabitFrequency.DAILY, monday) == (0, 0)
+    # A gap ends a run; yesterday still keeps the current one alive
+    assert compute_streaks(days(0, 1, 2, 4, 5), HabitFrequency.DAILY, monday + timedelta(days=6)) == (2, 3)
+    assert compute_streaks(days(0, 1, 2, 4, 5), HabitFrequency.DAILY, monday + timedelta(days=7)) == (0, 3)
+    # Weeks count once they reach target_count days; the week in progress does not break the run
+    weekly = days(0, 3, 7, 8, 14, 21, 22)
+    assert compute_streaks(weekly, HabitFrequency.WEEKLY, monday + timedelta(days=23), target_count=2) == (1, 2)
+    assert compute_streaks(weekly, HabitFrequency.WEEKLY, monday + timedelta(days=29), target_count=2) == (1, 2)
+    assert compute_streaks(weekly, HabitFrequency.WEEKLY, monday + timedelta(days=35), target_count=2) == (0, 2)
+
+
+def test_extending_streaks_matches_a_full_recompute(client, db):
+    (habit_id,) = _create_habits(client, "Run")
+    habit = db.get(Habit, uuid.UUID(habit_id))
+    streaks = StreakService(db)
+    monday = date(2026, 1, 5)
+
+    schedules = [
+        (HabitFrequency.DAILY, 1, [0, 1, 2, 4, 5, 9, 10, 11, 12]),
+        (HabitFrequency.WEEKLY, 2, [0, 3, 7, 8, 9, 15, 21, 22, 28, 29, 30, 42, 43]),
+        (HabitFrequency.CUSTOM, 3, [0, 1, 2, 7, 8, 9, 10, 14, 21, 22, 23]),
+    ]
+    for frequency, target_count, offsets in schedules:
+        habit.frequency, habit.target_count = frequency, target_count
+        habit.current_streak = habit.best_streak = 0
+        logged = []
+        for day in (monday + timedelta(days=offset) for offset in offsets):
+            db.add(HabitLog(habit_id=habit.id, user_id=habit.user_id, date=day, status=LogStatus.COMPLETED))
+            db.flush()
+            logged.append(day)
+
+            assert streaks.extend(habit, day)
+            expected = compute_streaks(logged, frequency, day, target_count)
+            assert (habit.current_streak, habit.best_streak) == expected, (frequency, day)
+        db.rollback()
+
+
+def test_extend_leaves_out_of_order_completions_to_recompute(client, db):
+    (habit_id,) = _create_habits(client, "Swim")
+    habit = db.get(Habit, uuid.UUID(habit_id))
+    today = date.today()
+    db.add(HabitLog(habit_id=habit.id, user_id=habit.user_id, date=today, status=LogStatus.COMPLETED))
+    db.flush()
+
+    assert not StreakService(db).extend(habit, today - timedelta(days=1))
+    db.rollback()
+
+
+def test_logging_keeps_streaks_in_step_with_history(client, db):
+    (habit_id,) = _create_habits(client, "Stretch")
+    today = date.today()
+    log = lambda status, days_ago=0: client.post(
+        f"/api/habits/{habit_id}/log",
+        json={"status": status, "date": (today - timedelta(days=days_ago)).isoformat()},
+    )
+
+    def streaks():
+        db.expire_all()
+        habit = db.get(Habit, uuid.UUID(habit_id))
+        return habit.current_streak, habit.best_streak
+
+    log("completed", 3)
+    log("completed", 1)
+    assert streaks() == (1, 1)
+    log("completed")  # today, extended in place
+    assert streaks() == (2, 2)
+    log("completed", 2)  # backdated gap fill
+    assert streaks() == (4, 4)
+    log("skipped", 1)  # un-completed
+    assert streaks() == (1, 2)
+    log("skipped")
+    assert streaks() == (0, 2)
@@ -0,0 +1,111 @@
+# tests/test_migrations.py
+import uuid
+from datetime import datetime
+
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, inspect, text
+
+from app.config import settings
+from app.core.database import alembic_config, init_db, stamp_legacy_baseline
+from app.db.models import Base
+
+
+@pytest.fixture
+def migrate(tmp_path):
+    """Upgrade a fresh SQLite database to a revision; yields (upgrade, connection)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    with engine.begin() as connection:
+        config = alembic_config(connection)
+        yield lambda revision: command.upgrade(config, revision), connection
+    engine.dispose()
+
+
+def _schema(connection):
+    inspector = inspect(connection)
+    return {
+        table: (
+            sorted(column["name"] for column in inspector.get_columns(table)),
+            sorted((ix["name"], tuple(ix["column_names"]), bool(ix["unique"])) for ix in inspector.get_indexes(table)),
+        )
+        for table in inspector.get_table_names()
+        if table != "alembic_version"
+    }
+
+
+def _revision(connection):
+    return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def _insert(connection, table, **values):
+    values.setdefault("id", str(uuid.uuid4()))
+    columns = ", ".join(values)
+    connection.execute(text(f"INSERT INTO {table} ({columns}) VALUES ({', '.join(':' + c for c in values)})"), values)
+    return values["id"]
+
+
+def test_timeline_backfill_fans_out_existing_followers_only_posts(migrate, monkeypatch):
+    upgrade, connection = migrate
+    monkeypatch.setattr(settings, "FEED_FANOUT_MAX_FOLLOWERS", 1)
+    upgrade("0007_habit_logs_unique_day")
+
+    author, popular, reader, other = (
+        _insert(connection, "users", email=f"{name}@example.com", name=name, password_hash="x")
+        for name in ("author", "popular", "reader", "other")
+    )
+    for follower, followed in ((reader, author), (reader, popular), (other, popular)):
+        _insert(connection, "follows", follower_id=follower, followed_id=followed)
+    now = datetime(2026, 1, 1)
+    private = _insert(connection, "posts", user_id=author, is_public=False, created_at=now)
+    _insert(connection, "posts", user_id=author, is_public=True, created_at=now)
+    _insert(connection, "posts", user_id=popular, is_public=False, created_at=now)
+
+    upgrade("0008_timeline_backfill")
+
+    counts = dict(connection.execute(text("SELECT id, follower_count FROM users")).all())
+    assert counts == {author: 1, popular: 2, reader: 0, other: 0}
+    # Public posts reach readers without fan-out, and high-fanout authors are merged at read time
+    entries = connection.execute(text("SELECT user_id, post_id, author_id FROM timeline_entries")).all()
+    assert entries == [(reader, private, author)]
+
+
+def test_migrations_build_the_models_schema(migrate, tmp_path):
+    upgrade, connection = migrate
+    upgrade("head")
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'models.db'}")
+    with engine.begin() as models:
+        Base.metadata.create_all(bind=models)
+        assert _schema(connection) == _schema(models)
+    engine.dispose()
+
+
+def test_init_db_creates_and_stamps_only_an_empty_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'dev.db'}")
+    init_db(engine)
+    with engine.begin() as conn:
+        head = _revision(conn)
+        assert head is not None and "habits" in inspect(conn).get_table_names()
+        conn.execute(text("DROP TABLE timeline_entries"))
+
+    # A managed database is the migrations' business
+    init_db(engine)
+    with engine.connect() as conn:
+        assert "timeline_entries" not in inspect(conn).get_table_names()
+        assert _revision(conn) == head
+    engine.dispose()
+
+
+def test_pre_migration_database_is_stamped_at_the_baseline(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        command.upgrade(alembic_config(conn), "0000_baseline")
+        conn.execute(text("DROP TABLE alembic_version"))
+
+    assert stamp_legacy_baseline(engine)
+    assert not stamp_legacy_baseline(engine)
+
+    with engine.begin() as conn:
+        command.upgrade(alembic_config(conn), "head")
+        assert "follower_count" in _schema(conn)["users"][0]
+    engine.dispose()